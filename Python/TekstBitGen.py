@@ -1,6 +1,7 @@
 import os
 import sys
-from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+from PIL import Image, ImageDraw
 from PyQt6.QtWidgets import (
     QApplication,
     QFileDialog,
@@ -23,11 +24,27 @@ from PyQt6.QtWidgets import (
     QHeaderView,
     QInputDialog,
 )
-from PyQt6.QtGui import QPixmap, QImage, QCursor
-from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QPixmap, QCursor
+from PyQt6.QtCore import Qt, QTimer
 import re
 from PyQt6.QtGui import QClipboard, QPainter, QColor, QMouseEvent
 
+from c_array_writer import write_hex_rows
+from charset_raster import (
+    charset_file_name,
+    convert_ttf_charset,
+    glyph_placement,
+    load_font,
+    render_charset,
+    write_charset_header,
+)
+from glyph_decode import GlyphCache, glyph_qimage, glyph_rgb, rgb_to_qimage, row_stride, scale_rgb, unpack_glyph
+from header_parser import iter_c_arrays, read_c_arrays
+from parallel_convert import run_parallel
+
+# Delay between the last keystroke in a sample text box and its live preview
+PREVIEW_DEBOUNCE_MS = 150
+
 # Custom clickable label class
 class ClickableLabel(QLabel):
     """QLabel that emits a signal when clicked."""
@@ -52,32 +69,9 @@ class BitmapEditor(QLabel):
     
     def draw_bitmap(self):
         """Draw the current bitmap state."""
-        img = Image.new('RGB', (self.width, self.height))
-        pixels = img.load()
-        
-        data_index = 0
-        bytes_per_row = (self.width + 7) // 8
-        
-        for y in range(self.height):
-            row_start = y * bytes_per_row
-            for byte_in_row in range(bytes_per_row):
-                byte_index = row_start + byte_in_row
-                if byte_index >= len(self.bitmap_data):
-                    break
-                
-                byte = self.bitmap_data[byte_index]
-                
-                for bit in range(8):
-                    x = byte_in_row * 8 + bit
-                    if x < self.width:
-                        bit_value = (byte >> (7 - bit)) & 1
-                        pixels[x, y] = (255, 255, 255) if bit_value else (0, 0, 0)
-        
+        pixels = unpack_glyph(self.bitmap_data, self.width, self.height)
         # Scale for display
-        img_scaled = img.resize((self.width * self.cell_size, self.height * self.cell_size), Image.NEAREST)
-        b = img_scaled.tobytes()
-        qimg = QImage(b, img_scaled.width, img_scaled.height, img_scaled.width * 3, QImage.Format.Format_RGB888)
-        self.setPixmap(QPixmap.fromImage(qimg))
+        self.setPixmap(QPixmap.fromImage(glyph_qimage(pixels, self.cell_size)))
     
     def mousePressEvent(self, event):
         """Toggle pixel on click."""
@@ -124,7 +118,7 @@ def show_error_dialog(parent, title, message):
     
     dlg.exec()
 
-def text_to_bitmap(text, font_size=20, font_name=None, padding=10, fixed_width=None, fixed_height=None):
+def text_to_bitmap(text, font_size=20, font_name=None, padding=10, fixed_width=None, fixed_height=None, bbox=None):
     """Convert text to a monochrome bitmap array (1 bit per pixel).
     
     Returns (text_sanitized, width, height, bitmap_data)
@@ -137,71 +131,27 @@ def text_to_bitmap(text, font_size=20, font_name=None, padding=10, fixed_width=N
         padding: Padding around text
         fixed_width: If set, force this width (centers text)
         fixed_height: If set, force this height (centers text vertically)
+        bbox: Bounding box of text from glyph_metrics, measured here when not given
     """
     
-    # Try to load system font, fallback to default
-    try:
-        if font_name:
-            font = ImageFont.truetype(font_name, font_size)
-        else:
-            # Try common system fonts
-            font = ImageFont.load_default()
-    except Exception:
-        font = ImageFont.load_default()
-    
-    # Create temporary image to measure text
-    temp_img = Image.new('RGB', (1, 1))
-    temp_draw = ImageDraw.Draw(temp_img)
-    bbox = temp_draw.textbbox((0, 0), text, font=font)
-    text_width = bbox[2] - bbox[0]
-    text_height = bbox[3] - bbox[1]
-    
-    # Store bbox offsets to properly position text with descenders
-    bbox_left = bbox[0]
-    bbox_top = bbox[1]
-    
-    # Use fixed dimensions if provided, otherwise calculate from text
-    if fixed_width is not None:
-        width = fixed_width
-    else:
-        width = text_width + (padding * 2)
+    # Load the font once per path and size, fallback to default
+    font = load_font(font_name, font_size)
     
-    if fixed_height is not None:
-        height = fixed_height
-    else:
-        height = text_height + (padding * 2)
+    # Measure text without rendering it
+    if bbox is None:
+        bbox = font.getbbox(text)
+    width, height, x_pos, y_pos = glyph_placement(bbox, padding, fixed_width, fixed_height)
     
     # Create actual image with black background (0)
     img = Image.new('1', (width, height), 0)  # 1-bit image, black background
     draw = ImageDraw.Draw(img)
     
-    # Calculate text position
-    if fixed_width is not None or fixed_height is not None:
-        # For fixed dimensions, horizontally center but align to baseline (bottom)
-        x_pos = (width - text_width) // 2 - bbox_left
-        # Align to bottom - let descenders extend to the bottom edge
-        # bbox[3] is the bottom of the text including descenders
-        y_pos = height - bbox[3]
-    else:
-        x_pos = padding - bbox_left
-        y_pos = padding - bbox_top
-    
     # Draw text in white (1), compensating for bbox offset
     draw.text((x_pos, y_pos), text, font=font, fill=1)
     
-    # Convert to bitmap data (1 bit per pixel, packed into bytes)
+    # Convert to bitmap data (1 bit per pixel, 8 pixels per byte, MSB first, every row starts on a new byte)
     bitmap_data = [width & 0xFF, height & 0xFF]
-    pixels = img.load()
-    
-    # Pack bits into bytes (8 pixels per byte, MSB first)
-    for y in range(height):
-        for x in range(0, width, 8):
-            byte = 0
-            for bit in range(8):
-                if x + bit < width:
-                    if pixels[x + bit, y]:
-                        byte |= (1 << (7 - bit))  # MSB first
-            bitmap_data.append(byte)
+    bitmap_data.extend(np.packbits(np.asarray(img), axis=1).tobytes())
     
     # Sanitize text for variable name
     text_sanitized = re.sub(r'[^a-zA-Z0-9_]', '_', text)
@@ -234,53 +184,26 @@ def text_to_c_bitmap(text, output_file, font_size=20, font_name=None, padding=10
         f.write(f"#define TEXT_HEIGHT {height}\n\n")
         f.write(f"const uint8_t {var_name}[{len(bitmap_data)}] = {{\n")
         
-        for i, byte in enumerate(bitmap_data):
-            if i % 16 == 0:
-                f.write("    ")
-            f.write(f"0x{byte:02X}")
-            if i < len(bitmap_data) - 1:
-                f.write(", ")
-            if (i + 1) % 16 == 0:
-                f.write("\n")
+        write_hex_rows(f, bitmap_data)
         
         f.write("\n};\n\n")
         f.write("#endif // TEXT_BITMAP_H\n")
 
 def bitmap_to_image(width, height, bitmap_data):
     """Convert 1-bit monochrome bitmap data back to PIL Image (RGB for display)."""
-    img = Image.new('RGB', (width, height))
-    pixels = img.load()
-    
-    # Skip first 2 bytes (width and height)
-    data_index = 2
-    
-    for y in range(height):
-        for x in range(0, width, 8):
-            if data_index >= len(bitmap_data):
-                break
-            
-            byte = bitmap_data[data_index]
-            data_index += 1
-            
-            # Unpack bits from byte (MSB first)
-            for bit in range(8):
-                if x + bit < width:
-                    if byte & (1 << (7 - bit)):
-                        pixels[x + bit, y] = (255, 255, 255)  # White for 1
-                    else:
-                        pixels[x + bit, y] = (0, 0, 0)  # Black for 0
-    
-    return img
+    # Skip first 2 bytes (width and height); white for 1, black for 0
+    return Image.fromarray(glyph_rgb(unpack_glyph(bitmap_data, width, height, offset=2)))
 
 def load_bitmap_from_header(header_file):
     """Extract bitmap data and dimensions from .h file."""
     try:
-        with open(header_file, 'r') as f:
-            content = f.read()
-        
-        # Extract hex values
-        hex_values = re.findall(r'0x([0-9A-Fa-f]{2})', content)
-        bitmap_data = [int(h, 16) for h in hex_values]
+        # The first byte array holds the bitmap, starting with its width and height
+        for array in iter_c_arrays(header_file):
+            if array.ctype == 'uint8_t':
+                bitmap_data = array.data
+                break
+        else:
+            raise ValueError("no uint8_t array found")
         
         width = bitmap_data[0]
         height = bitmap_data[1]
@@ -289,6 +212,22 @@ def load_bitmap_from_header(header_file):
     except Exception as e:
         raise Exception(f"Failed to parse header file: {e}")
 
+def find_charset_arrays(arrays):
+    """Find the character index table ([N][4] uint16_t) and the bitmap data (uint8_t) of a charset.
+    Returns (index_array, bitmap_array); either is None when it is missing."""
+    index_array = None
+    bitmap_array = None
+    for array in arrays:
+        if index_array is None and array.ctype == 'uint16_t' and len(array.dims) == 2 and array.dims[1] == 4:
+            index_array = array
+        elif bitmap_array is None and array.ctype == 'uint8_t':
+            bitmap_array = array
+    return index_array, bitmap_array
+
+def charset_specs(index_array):
+    """Return the rows of a character index table as (ascii_code, width, height, offset) tuples."""
+    return [tuple(row) for row in index_array.data if len(row) == 4]
+
 def generate_ascii_charset(parent=None):
     """Generate all printable ASCII characters as individual bitmaps."""
     dlg = QDialog(parent)
@@ -342,41 +281,8 @@ def generate_ascii_charset(parent=None):
             use_uniform_height = uniform_height_check.isChecked()
             use_monospace = monospace_check.isChecked()
             
-            # First pass: determine maximum dimensions if uniform sizing is requested
-            max_width = 0
-            max_height = 0
-            
-            if use_uniform_height or use_monospace:
-                for ascii_code in range(32, 127):
-                    char = chr(ascii_code)
-                    _, w, h, _ = text_to_bitmap(char, font_size, padding=padding)
-                    max_width = max(max_width, w)
-                    max_height = max(max_height, h)
-            
-            # Determine fixed dimensions
-            fixed_width = max_width if use_monospace else None
-            fixed_height = max_height if use_uniform_height else None
-            
-            # Generate all printable ASCII characters (32-126)
-            all_bitmaps = []
-            all_data = []
-            char_index_table = []
-            offset = 0
-            
-            for ascii_code in range(32, 127):
-                char = chr(ascii_code)
-                text_sanitized, width, height, bitmap_data = text_to_bitmap(
-                    char, font_size, padding=padding, 
-                    fixed_width=fixed_width, fixed_height=fixed_height
-                )
-                all_bitmaps.append((char, ascii_code, text_sanitized, width, height, bitmap_data))
-                
-                # Store offset and size for this character
-                char_index_table.append((ascii_code, width, height, offset))
-                
-                # Add bitmap data to single array (skip first 2 bytes which are width/height)
-                all_data.extend(bitmap_data[2:])
-                offset += len(bitmap_data[2:])
+            # Rasterize all printable ASCII characters (32-126) in one pass, packed into a single array
+            char_index_table, all_data = render_charset(font_size, None, padding, use_uniform_height, use_monospace)
             
             # Save all characters in a single array file
             output_file = os.path.join(output_dir, f"ascii_charset_size{font_size}.h")
@@ -386,7 +292,7 @@ def generate_ascii_charset(parent=None):
                 f.write("#include <stdint.h>\n\n")
                 f.write(f"// ASCII Character Set (Size: {font_size}px)\n")
                 f.write(f"// All characters (ASCII 32-126) stored in single array\n")
-                f.write(f"// Total characters: {len(all_bitmaps)}\n\n")
+                f.write(f"// Total characters: {len(char_index_table)}\n\n")
                 
                 # Write character index table
                 f.write("// Character Index Table: [ASCII code, width, height, offset in data array]\n")
@@ -406,19 +312,12 @@ def generate_ascii_charset(parent=None):
                 f.write(f"// Bitmap data for all characters (1-bit monochrome)\n")
                 f.write(f"const uint8_t ascii_bitmap_data[{len(all_data)}] = {{\n")
                 
-                for i, byte in enumerate(all_data):
-                    if i % 16 == 0:
-                        f.write("    ")
-                    f.write(f"0x{byte:02X}")
-                    if i < len(all_data) - 1:
-                        f.write(", ")
-                    if (i + 1) % 16 == 0:
-                        f.write("\n")
+                write_hex_rows(f, all_data)
                 
                 f.write("\n};\n\n")
                 f.write("#endif // ASCII_CHARSET_H\n")
             
-            QMessageBox.information(dlg, "Success", f"Generated ASCII charset with {len(all_bitmaps)} characters\nFile: ascii_charset_size{font_size}.h")
+            QMessageBox.information(dlg, "Success", f"Generated ASCII charset with {len(char_index_table)} characters\nFile: ascii_charset_size{font_size}.h")
             dlg.accept()
         except Exception as e:
             show_error_dialog(dlg, "Error", f"Failed to generate ASCII charset:\n{e}")
@@ -444,39 +343,21 @@ def view_charset_file(parent=None, file_path=None):
     
     try:
         # Read the header file
-        with open(header_path, 'r') as f:
-            content = f.read()
-        
-        # Extract the character index table (flexible pattern for different naming)
-        index_match = re.search(r'const\s+uint16_t\s+(\w+)\s*\[\s*(\d+)\s*\]\s*\[\s*4\s*\]\s*=\s*\{(.*?)\};', content, re.DOTALL)
-        if not index_match:
+        index_array, bitmap_array = find_charset_arrays(read_c_arrays(header_path))
+        if index_array is None:
             show_error_dialog(parent, "Error", "Could not find character index table in file")
             return
         
-        num_chars = int(index_match.group(2))
-        index_data = index_match.group(3)
-        
-        # Parse the index table
-        char_specs = []
-        lines = index_data.split('\n')
-        for line in lines:
-            # Extract numbers from lines like: {32, 8, 16, 0},  // SPACE
-            match = re.search(r'\{(\d+),\s*(\d+),\s*(\d+),\s*(\d+)\}', line)
-            if match:
-                ascii_code = int(match.group(1))
-                width = int(match.group(2))
-                height = int(match.group(3))
-                offset = int(match.group(4))
-                char_specs.append((ascii_code, width, height, offset))
-        
-        # Extract bitmap data (flexible pattern for different naming)
-        bitmap_match = re.search(r'const\s+uint8_t\s+(\w+)\s*\[\s*(\d+)\s*\]\s*=\s*\{(.*?)\};', content, re.DOTALL)
-        if not bitmap_match:
+        num_chars = index_array.dims[0]
+        char_specs = charset_specs(index_array)
+        
+        if bitmap_array is None:
             show_error_dialog(parent, "Error", "Could not find bitmap data in file")
             return
         
-        hex_values = re.findall(r'0x([0-9A-Fa-f]{2})', bitmap_match.group(3))
-        bitmap_data = [int(h, 16) for h in hex_values]
+        bitmap_data = bitmap_array.data
+        # Glyphs are decoded once and reused by every preview until a character is edited
+        glyph_cache = GlyphCache(bitmap_data, char_specs)
         
         # Get font size from filename
         filename = os.path.basename(header_path)
@@ -527,83 +408,23 @@ def view_charset_file(parent=None, file_path=None):
                 sample_preview_label.clear()
                 return
             
-            # Create a lookup dictionary for quick character access
-            char_lookup = {}
-            for ascii_code, width, height, offset in char_specs:
-                char_lookup[ascii_code] = (width, height, offset)
-            
-            # Calculate total width and max height
-            total_width = 0
-            max_height = 0
-            char_images = []
-            
-            for char in text:
-                ascii_code = ord(char)
-                if ascii_code in char_lookup:
-                    width, height, offset = char_lookup[ascii_code]
-                    
-                    # Extract character bitmap
-                    bytes_per_row = (width + 7) // 8
-                    data_size = bytes_per_row * height
-                    char_bitmap_data = bitmap_data[offset:offset + data_size]
-                    
-                    # Create image for this character
-                    img = Image.new('RGB', (width, height))
-                    pixels = img.load()
-                    
-                    for y in range(height):
-                        row_start = y * bytes_per_row
-                        for byte_in_row in range(bytes_per_row):
-                            byte_index = row_start + byte_in_row
-                            if byte_index >= len(char_bitmap_data):
-                                break
-                            
-                            byte = char_bitmap_data[byte_index]
-                            
-                            for bit in range(8):
-                                x = byte_in_row * 8 + bit
-                                if x < width:
-                                    if byte & (1 << (7 - bit)):
-                                        pixels[x, y] = (0, 0, 0)  # Black text
-                                    else:
-                                        pixels[x, y] = (255, 255, 255)  # White background
-                    
-                    char_images.append(img)
-                    total_width += width
-                    max_height = max(max_height, height)
-                else:
-                    # Character not found, add placeholder
-                    placeholder_width = max_height // 2 if max_height > 0 else 8
-                    img = Image.new('RGB', (placeholder_width, max_height if max_height > 0 else 16), (255, 200, 200))
-                    char_images.append(img)
-                    total_width += placeholder_width
-            
-            if not char_images:
-                sample_preview_label.setText("No valid characters to display")
-                return
-            
-            # Combine all character images
-            combined = Image.new('RGB', (total_width, max_height), (255, 255, 255))
-            x_offset = 0
-            for img in char_images:
-                # Align to baseline (bottom of image)
-                y_offset = max_height - img.height
-                combined.paste(img, (x_offset, y_offset))
-                x_offset += img.width
+            # Lay out the text with the cached glyphs of the charset, black on white
+            combined, _ = glyph_cache.text_rgb(text)
+            total_width = combined.shape[1]
             
             # Scale up for better visibility
             scale = min(4, 800 // max(1, total_width))
-            if scale > 1:
-                combined = combined.resize((total_width * scale, max_height * scale), Image.NEAREST)
-            
-            # Convert to QPixmap and display
-            b = combined.tobytes()
-            bytes_per_line = combined.width * 3
-            qimg = QImage(b, combined.width, combined.height, bytes_per_line, QImage.Format.Format_RGB888)
-            sample_preview_label.setPixmap(QPixmap.fromImage(qimg))
+            sample_preview_label.setPixmap(QPixmap.fromImage(rgb_to_qimage(scale_rgb(combined, scale))))
         
         btn_preview.clicked.connect(render_sample_text)
         
+        # Live preview: render once typing pauses for PREVIEW_DEBOUNCE_MS
+        preview_timer = QTimer(dlg)
+        preview_timer.setSingleShot(True)
+        preview_timer.setInterval(PREVIEW_DEBOUNCE_MS)
+        preview_timer.timeout.connect(render_sample_text)
+        sample_input.textChanged.connect(preview_timer.start)
+        
         # Initial preview
         render_sample_text()
         
@@ -651,42 +472,12 @@ def view_charset_file(parent=None, file_path=None):
             while container_layout.count() > 0:
                 container_layout.takeAt(0).widget()
             
-            # Rebuild with filtered characters
+            # Rebuild with filtered characters from the cached glyphs
+            glyphs = glyph_cache.glyphs()
             for ascii_code, width, height, offset in filtered_specs:
-                # Create bitmap image
-                # Calculate proper data size: bytes_per_row * height
-                bytes_per_row = (width + 7) // 8
-                data_size = bytes_per_row * height
-                char_bitmap_data = bitmap_data[offset:offset + data_size]
-                img = Image.new('RGB', (width, height))
-                pixels = img.load()
-                
-                # Read bitmap row by row
-                for y in range(height):
-                    row_start = y * bytes_per_row
-                    for byte_in_row in range(bytes_per_row):
-                        byte_index = row_start + byte_in_row
-                        if byte_index >= len(char_bitmap_data):
-                            break
-                        
-                        byte = char_bitmap_data[byte_index]
-                        
-                        for bit in range(8):
-                            x = byte_in_row * 8 + bit
-                            if x < width:
-                                if byte & (1 << (7 - bit)):
-                                    pixels[x, y] = (255, 255, 255)
-                                else:
-                                    pixels[x, y] = (0, 0, 0)
-                
                 # Scale up for visibility
                 scale = max(2, 24 // max(1, max(width, height)))
-                img_scaled = img.resize((width * scale, height * scale), Image.NEAREST)
-                
-                # Convert to QImage
-                b = img_scaled.tobytes()
-                bytes_per_line = img_scaled.width * 3
-                qimg = QImage(b, img_scaled.width, img_scaled.height, bytes_per_line, QImage.Format.Format_RGB888)
+                qimg = glyph_qimage(glyphs[ascii_code], scale)
                 
                 # Create character row
                 char_row = QHBoxLayout()
@@ -740,42 +531,6 @@ def view_charset_file(parent=None, file_path=None):
         
         def show_enlarged_char(ascii_code, width, height, offset):
             """Show enlarged character in popup dialog."""
-            # Extract this character's bitmap data
-            bytes_per_row = (width + 7) // 8
-            data_size = bytes_per_row * height
-            char_bitmap_data = bitmap_data[offset:offset + data_size]
-            
-            # Convert to image
-            img = Image.new('RGB', (width, height))
-            pixels = img.load()
-            
-            # Read bitmap row by row
-            for y in range(height):
-                row_start = y * bytes_per_row
-                for byte_in_row in range(bytes_per_row):
-                    byte_index = row_start + byte_in_row
-                    if byte_index >= len(char_bitmap_data):
-                        break
-                    
-                    byte = char_bitmap_data[byte_index]
-                    
-                    for bit in range(8):
-                        x = byte_in_row * 8 + bit
-                        if x < width:
-                            if byte & (1 << (7 - bit)):
-                                pixels[x, y] = (255, 255, 255)
-                            else:
-                                pixels[x, y] = (0, 0, 0)
-            
-            # Scale up for visibility (much larger)
-            scale = 10
-            img_scaled = img.resize((width * scale, height * scale), Image.NEAREST)
-            
-            # Convert to QImage
-            b = img_scaled.tobytes()
-            bytes_per_line = img_scaled.width * 3
-            qimg = QImage(b, img_scaled.width, img_scaled.height, bytes_per_line, QImage.Format.Format_RGB888)
-            
             # Create popup dialog
             popup = QDialog(dlg)
             popup.setWindowTitle(f"Character: ASCII {ascii_code}")
@@ -797,10 +552,8 @@ def view_charset_file(parent=None, file_path=None):
             )
             popup_layout.addWidget(info_label)
             
-            # Bitmap editor (clickable grid)
-            bytes_per_row = (width + 7) // 8
-            data_size = bytes_per_row * height
-            char_bitmap_data = bitmap_data[offset:offset + data_size]
+            # Bitmap editor (clickable grid), it unpacks and draws the glyph itself
+            char_bitmap_data = bitmap_data[offset:offset + row_stride(width) * height]
             editor = BitmapEditor(width, height, char_bitmap_data, popup)
             popup_layout.addWidget(editor)
             
@@ -813,10 +566,13 @@ def view_charset_file(parent=None, file_path=None):
                 for i, byte_val in enumerate(editor.bitmap_data):
                     if offset + i < len(bitmap_data):
                         bitmap_data[offset + i] = byte_val
+                # Decode the edited character again on its next use
+                glyph_cache.invalidate(ascii_code)
                 QMessageBox.information(popup, "Success", "Character changes saved!")
                 popup.accept()
-                # Refresh the character grid display
+                # Refresh the character grid display and the sample text
                 filter_characters()
+                render_sample_text()
             
             btn_save = QPushButton("Save Changes", popup)
             btn_save.clicked.connect(save_changes)
@@ -897,14 +653,7 @@ def view_charset_file(parent=None, file_path=None):
                     
                     # Write bitmap data
                     f.write(f"const uint8_t ascii_bitmap_data[{len(bitmap_data)}] = {{\n")
-                    for i, byte in enumerate(bitmap_data):
-                        if i % 16 == 0:
-                            f.write("    ")
-                        f.write(f"0x{byte:02X}")
-                        if i < len(bitmap_data) - 1:
-                            f.write(", ")
-                        if (i + 1) % 16 == 0:
-                            f.write("\n")
+                    write_hex_rows(f, bitmap_data)
                     if len(bitmap_data) % 16 != 0:
                         f.write("\n")
                     f.write("};\n\n")
@@ -1003,86 +752,14 @@ def convert_ttf_to_charset(parent=None):
             if not output_dir:
                 return
             
-            # First pass: determine maximum dimensions if uniform sizing is requested
-            max_width = 0
-            max_height = 0
-            
-            if use_uniform_height or use_monospace:
-                for ascii_code in range(32, 127):
-                    char = chr(ascii_code)
-                    _, w, h, _ = text_to_bitmap(char, font_size, ttf_path, padding=padding)
-                    max_width = max(max_width, w)
-                    max_height = max(max_height, h)
-            
-            # Determine fixed dimensions
-            fixed_width = max_width if use_monospace else None
-            fixed_height = max_height if use_uniform_height else None
-            
-            # Generate all ASCII characters using the TTF font
-            all_bitmaps = []
-            all_data = []
-            char_index_table = []
-            offset = 0
-            
-            for ascii_code in range(32, 127):
-                char = chr(ascii_code)
-                text_sanitized, width, height, bitmap_data = text_to_bitmap(
-                    char, font_size, ttf_path, padding=padding,
-                    fixed_width=fixed_width, fixed_height=fixed_height
-                )
-                all_bitmaps.append((char, ascii_code, text_sanitized, width, height, bitmap_data))
-                
-                # Store offset and size for this character
-                char_index_table.append((ascii_code, width, height, offset))
-                
-                # Add bitmap data to single array (skip first 2 bytes which are width/height)
-                all_data.extend(bitmap_data[2:])
-                offset += len(bitmap_data[2:])
+            # Rasterize all printable ASCII characters (32-126) in one pass, packed into a single array
+            char_index_table, all_data = render_charset(font_size, ttf_path, padding, use_uniform_height, use_monospace)
             
             # Save charset file
-            font_basename = os.path.splitext(os.path.basename(ttf_path))[0]
-            output_file = os.path.join(output_dir, f"{font_basename}_size{font_size}.h")
+            output_file = os.path.join(output_dir, charset_file_name(ttf_path, font_size))
+            write_charset_header(output_file, font_name, font_size, char_index_table, all_data)
             
-            with open(output_file, 'w', newline='\n') as f:
-                f.write("#ifndef ASCII_CHARSET_H\n")
-                f.write("#define ASCII_CHARSET_H\n\n")
-                f.write("#include <stdint.h>\n\n")
-                f.write(f"// ASCII Character Set from {font_name} (Size: {font_size}px)\n")
-                f.write(f"// All characters (ASCII 32-126) stored in single array\n")
-                f.write(f"// Total characters: {len(all_bitmaps)}\n\n")
-                
-                # Write character index table
-                f.write("// Character Index Table: [ASCII code, width, height, offset in data array]\n")
-                f.write(f"const uint16_t ascii_char_index[{len(char_index_table)}][4] = {{\n")
-                for i, (ascii_code, width, height, offset) in enumerate(char_index_table):
-                    f.write(f"    {{{ascii_code}, {width}, {height}, {offset}}}")
-                    if i < len(char_index_table) - 1:
-                        f.write(",")
-                    # Add character as comment
-                    if ascii_code == 32:
-                        f.write(f"  // SPACE\n")
-                    else:
-                        f.write(f"  // '{chr(ascii_code)}'\n")
-                f.write("};\n\n")
-                
-                # Write all bitmap data in single array
-                f.write(f"// Bitmap data for all characters (1-bit monochrome)\n")
-                f.write(f"const uint8_t ascii_bitmap_data[{len(all_data)}] = {{\n")
-                
-                for i, byte in enumerate(all_data):
-                    if i % 16 == 0:
-                        f.write("    ")
-                    f.write(f"0x{byte:02X}")
-                    if i < len(all_data) - 1:
-                        f.write(", ")
-                    if (i + 1) % 16 == 0:
-                        f.write("\n")
-                if len(all_data) % 16 != 0:
-                    f.write("\n")
-                f.write("};\n\n")
-                f.write("#endif // ASCII_CHARSET_H\n")
-            
-            QMessageBox.information(dlg, "Success", f"Generated charset from TTF with {len(all_bitmaps)} characters\nFile: {output_file}")
+            QMessageBox.information(dlg, "Success", f"Generated charset from TTF with {len(char_index_table)} characters\nFile: {output_file}")
             dlg.accept()
         except Exception as e:
             show_error_dialog(dlg, "Error", f"Failed to generate charset from TTF:\n{e}")
@@ -1201,97 +878,16 @@ def convert_ttf_folder_to_charset(parent=None):
             successful = 0
             failed = []
             
-            for ttf_path in ttf_files:
-                for font_size in font_sizes:
-                    try:
-                        font_name = os.path.basename(ttf_path)
-                        
-                        # Load font
-                        font = ImageFont.truetype(ttf_path, font_size)
-                        
-                        # First pass: determine maximum dimensions if uniform sizing is requested
-                        max_width = 0
-                        max_height = 0
-                        
-                        if use_uniform_height or use_monospace:
-                            for ascii_code in range(32, 127):
-                                char = chr(ascii_code)
-                                _, w, h, _ = text_to_bitmap(char, font_size, ttf_path, padding=padding)
-                                max_width = max(max_width, w)
-                                max_height = max(max_height, h)
-                        
-                        # Determine fixed dimensions
-                        fixed_width = max_width if use_monospace else None
-                        fixed_height = max_height if use_uniform_height else None
-                        
-                        # Generate all ASCII characters
-                        all_bitmaps = []
-                        all_data = []
-                        char_index_table = []
-                        offset = 0
-                        
-                        for ascii_code in range(32, 127):
-                            char = chr(ascii_code)
-                            text_sanitized, width, height, bitmap_data = text_to_bitmap(
-                                char, font_size, ttf_path, padding=padding,
-                                fixed_width=fixed_width, fixed_height=fixed_height
-                            )
-                            all_bitmaps.append((char, ascii_code, text_sanitized, width, height, bitmap_data))
-                            
-                            # Store offset and size for this character
-                            char_index_table.append((ascii_code, width, height, offset))
-                            
-                            # Add bitmap data to single array (skip first 2 bytes which are width/height)
-                            all_data.extend(bitmap_data[2:])
-                            offset += len(bitmap_data[2:])
-                        
-                        # Save charset file
-                        font_basename = os.path.splitext(os.path.basename(ttf_path))[0]
-                        output_file = os.path.join(output_dir, f"{font_basename}_size{font_size}.h")
-                        
-                        with open(output_file, 'w', newline='\n') as f:
-                            f.write("#ifndef ASCII_CHARSET_H\n")
-                            f.write("#define ASCII_CHARSET_H\n\n")
-                            f.write("#include <stdint.h>\n\n")
-                            f.write(f"// ASCII Character Set from {font_name} (Size: {font_size}px)\n")
-                            f.write(f"// All characters (ASCII 32-126) stored in single array\n")
-                            f.write(f"// Total characters: {len(all_bitmaps)}\n\n")
-                            
-                            # Write character index table
-                            f.write("// Character Index Table: [ASCII code, width, height, offset in data array]\n")
-                            f.write(f"const uint16_t ascii_char_index[{len(char_index_table)}][4] = {{\n")
-                            for i, (ascii_code, width, height, offset) in enumerate(char_index_table):
-                                f.write(f"    {{{ascii_code}, {width}, {height}, {offset}}}")
-                                if i < len(char_index_table) - 1:
-                                    f.write(",")
-                                # Add character as comment
-                                if ascii_code == 32:
-                                    f.write(f"  // SPACE\n")
-                                else:
-                                    f.write(f"  // '{chr(ascii_code)}'\n")
-                            f.write("};\n\n")
-                            
-                            # Write all bitmap data in single array
-                            f.write(f"// Bitmap data for all characters (1-bit monochrome)\n")
-                            f.write(f"const uint8_t ascii_bitmap_data[{len(all_data)}] = {{\n")
-                            
-                            for i, byte in enumerate(all_data):
-                                if i % 16 == 0:
-                                    f.write("    ")
-                                f.write(f"0x{byte:02X}")
-                                if i < len(all_data) - 1:
-                                    f.write(", ")
-                                if (i + 1) % 16 == 0:
-                                    f.write("\n")
-                            if len(all_data) % 16 != 0:
-                                f.write("\n")
-                            f.write("};\n\n")
-                            f.write("#endif // ASCII_CHARSET_H\n")
-                        
-                        successful += 1
-                    
-                    except Exception as e:
-                        failed.append((f"{font_name} (size {font_size})", str(e)))
+            # Every font and size is a job on its own; the grid runs on all cores and a job that
+            # fails (e.g. a font file that can not be loaded) only costs its own combination
+            grid = [(ttf_path, font_size) for ttf_path in ttf_files for font_size in font_sizes]
+            jobs = [(ttf_path, font_size, output_dir, padding, use_uniform_height, use_monospace)
+                    for ttf_path, font_size in grid]
+            for (ttf_path, font_size), (_, error) in zip(grid, run_parallel(convert_ttf_charset, jobs)):
+                if error is None:
+                    successful += 1
+                else:
+                    failed.append((f"{os.path.basename(ttf_path)} (size {font_size})", error))
             
             # Show results
             result_msg = f"Successfully converted {successful} of {len(ttf_files) * len(font_sizes)} font/size combination(s)\n"
@@ -1525,11 +1121,8 @@ def combine_charset_files(parent=None):
         
         # Read each charset file
         for file_path, custom_name, custom_size in organized_data:
-            with open(file_path, 'r') as f:
-                content = f.read()
-            
             # Check if file has actual content
-            if len(content.strip()) < 100:
+            if os.path.getsize(file_path) < 100:
                 show_error_dialog(parent, "Error", f"File appears to be empty or incomplete:\n{file_path}\n\nPlease regenerate this charset file.")
                 return
             
@@ -1537,37 +1130,19 @@ def combine_charset_files(parent=None):
             font_name = custom_name
             font_size = custom_size
             
-            # Extract character index table (flexible pattern for different naming)
-            index_match = re.search(r'const\s+uint16_t\s+(\w+)\s*\[\s*(\d+)\s*\]\s*\[\s*4\s*\]\s*=\s*\{(.*?)\};', content, re.DOTALL)
-            if not index_match:
+            index_array, bitmap_array = find_charset_arrays(read_c_arrays(file_path))
+            if index_array is None:
                 show_error_dialog(parent, "Error", f"Could not find character index table in:\n{file_path}\n\nThe file may be incomplete or corrupted.\nPlease regenerate this charset file.")
                 return
             
-            index_var_name = index_match.group(1)
-            num_chars = int(index_match.group(2))
-            index_data = index_match.group(3)
-            
-            # Parse the index table
-            char_specs = []
-            lines = index_data.split('\n')
-            for line in lines:
-                match = re.search(r'\{(\d+),\s*(\d+),\s*(\d+),\s*(\d+)\}', line)
-                if match:
-                    ascii_code = int(match.group(1))
-                    width = int(match.group(2))
-                    height = int(match.group(3))
-                    offset = int(match.group(4))
-                    char_specs.append((ascii_code, width, height, offset))
-            
-            # Extract bitmap data (flexible pattern for different naming)
-            bitmap_match = re.search(r'const\s+uint8_t\s+(\w+)\s*\[\s*(\d+)\s*\]\s*=\s*\{(.*?)\};', content, re.DOTALL)
-            if not bitmap_match:
+            num_chars = index_array.dims[0]
+            char_specs = charset_specs(index_array)
+            
+            if bitmap_array is None:
                 show_error_dialog(parent, "Error", f"Could not find bitmap data in:\n{file_path}\n\nThe file may be incomplete or corrupted.\nPlease regenerate this charset file.")
                 return
             
-            bitmap_var_name = bitmap_match.group(1)
-            hex_values = re.findall(r'0x([0-9A-Fa-f]{2})', bitmap_match.group(3))
-            bitmap_data = [int(h, 16) for h in hex_values]
+            bitmap_data = bitmap_array.data
             
             # Use custom size (already set above)
             combined_charsets.append({
@@ -1639,14 +1214,7 @@ def combine_charset_files(parent=None):
                 
                 # Write bitmap data
                 f.write(f"const uint8_t {safe_name}_data[{len(charset['bitmap_data'])}] = {{\n")
-                for i, byte in enumerate(charset['bitmap_data']):
-                    if i % 16 == 0:
-                        f.write("    ")
-                    f.write(f"0x{byte:02X}")
-                    if i < len(charset['bitmap_data']) - 1:
-                        f.write(", ")
-                    if (i + 1) % 16 == 0:
-                        f.write("\n")
+                write_hex_rows(f, charset['bitmap_data'])
                 if len(charset['bitmap_data']) % 16 != 0:
                     f.write("\n")
                 f.write("};\n\n")
@@ -1693,25 +1261,21 @@ def view_multiple_charsets(parent=None):
         return
     
     try:
-        # Read the file
-        with open(file_path, 'r') as f:
-            content = f.read()
+        # Read the file once and index all arrays by name
+        arrays = {array.name: array for array in iter_c_arrays(file_path)}
         
         # Check if this is a combined charset file by looking for available_fonts array
-        fonts_array_match = re.search(r'const\s+FontInfo\s+available_fonts\s*\[\s*(\d+)\s*\]\s*=\s*\{(.*?)\};', content, re.DOTALL)
+        fonts_array = arrays.get('available_fonts')
         
-        if not fonts_array_match:
+        if fonts_array is None or fonts_array.ctype != 'FontInfo':
             QMessageBox.warning(parent, "Not a Combined File", 
                               "This file does not appear to be a combined charset file.\n\n"
                               "Please use 'View Charset File' for single font files, or\n"
                               "use 'Combine Charset Files' to create a combined file first.")
             return
         
-        num_fonts = int(fonts_array_match.group(1))
-        fonts_array_data = fonts_array_match.group(2)
-        
-        # Parse the available_fonts array to get font names and references
-        font_entries = re.findall(r'\{"([^"]+)",\s*(\d+),\s*(\d+),\s*(\w+),\s*(\w+)\}', fonts_array_data)
+        # Rows of the available_fonts array: {"name", size, num_chars, index_name, data_name}
+        font_entries = [entry for entry in fonts_array.data if len(entry) == 5]
         
         if not font_entries:
             show_error_dialog(parent, "Error", "Could not parse font entries from combined file.")
@@ -1720,38 +1284,23 @@ def view_multiple_charsets(parent=None):
         # Load all fonts from the combined file
         charsets = []
         for font_name, font_size, num_chars, index_name, data_name in font_entries:
-            # Extract the character index table for this font
-            index_pattern = rf'const\s+uint16_t\s+{re.escape(index_name)}\s*\[\s*(\d+)\s*\]\s*\[\s*4\s*\]\s*=\s*\{{(.*?)\}};'
-            index_match = re.search(index_pattern, content, re.DOTALL)
+            # Find the character index table for this font
+            index_array = arrays.get(index_name)
             
-            if not index_match:
+            if index_array is None or index_array.ctype != 'uint16_t':
                 show_error_dialog(parent, "Error", f"Could not find index table '{index_name}' for font '{font_name}'")
                 continue
             
-            index_data = index_match.group(2)
-            
-            # Parse the index table
-            char_specs = []
-            lines = index_data.split('\n')
-            for line in lines:
-                match = re.search(r'\{(\d+),\s*(\d+),\s*(\d+),\s*(\d+)\}', line)
-                if match:
-                    ascii_code = int(match.group(1))
-                    width = int(match.group(2))
-                    height = int(match.group(3))
-                    offset = int(match.group(4))
-                    char_specs.append((ascii_code, width, height, offset))
-            
-            # Extract bitmap data for this font
-            data_pattern = rf'const\s+uint8_t\s+{re.escape(data_name)}\s*\[\s*(\d+)\s*\]\s*=\s*\{{(.*?)\}};'
-            bitmap_match = re.search(data_pattern, content, re.DOTALL)
-            
-            if not bitmap_match:
+            char_specs = charset_specs(index_array)
+            
+            # Find the bitmap data for this font
+            bitmap_array = arrays.get(data_name)
+            
+            if bitmap_array is None or bitmap_array.ctype != 'uint8_t':
                 show_error_dialog(parent, "Error", f"Could not find bitmap data '{data_name}' for font '{font_name}'")
                 continue
             
-            hex_values = re.findall(r'0x([0-9A-Fa-f]{2})', bitmap_match.group(2))
-            bitmap_data = [int(h, 16) for h in hex_values]
+            bitmap_data = bitmap_array.data
             
             charsets.append({
                 'filename': font_name,
@@ -1759,7 +1308,8 @@ def view_multiple_charsets(parent=None):
                 'size': int(font_size),
                 'num_chars': int(num_chars),
                 'char_specs': char_specs,
-                'bitmap_data': bitmap_data
+                'bitmap_data': bitmap_data,
+                'glyph_cache': GlyphCache(bitmap_data, char_specs)
             })
         
         if not charsets:
@@ -1806,124 +1356,63 @@ def view_multiple_charsets(parent=None):
         sample_container = QDialog()
         sample_container_layout = QVBoxLayout(sample_container)
         
+        # One set of widgets per font, made once and updated in place by every preview
+        sample_status_label = QLabel(sample_container)
+        sample_container_layout.addWidget(sample_status_label)
+        sample_rows = []
+        for charset in charsets:
+            # Font name label
+            font_label = QLabel(f"<b>{charset['filename']} ({charset['size']}px)</b>", sample_container)
+            preview_label = QLabel(sample_container)
+            preview_label.setStyleSheet("background-color: white; border: 1px solid gray; padding: 5px;")
+            missing_label = QLabel(sample_container)
+            missing_label.setStyleSheet("color: red;")
+            for widget in (font_label, preview_label, missing_label):
+                sample_container_layout.addWidget(widget)
+            sample_rows.append((font_label, preview_label, missing_label))
+        sample_container_layout.addStretch()
+        
         def render_all_sample_text():
             """Render sample text using all selected fonts."""
-            # Clear existing layout
-            while sample_container_layout.count() > 0:
-                child = sample_container_layout.takeAt(0)
-                if child.widget():
-                    child.widget().deleteLater()
-            
             text = sample_input.toPlainText()
+            selected = [checkbox.isChecked() for checkbox in font_checkboxes]
             if not text:
-                no_text_label = QLabel("Enter text to preview", sample_container)
-                sample_container_layout.addWidget(no_text_label)
-                return
-            
-            # Get selected charsets
-            selected_charsets = [charset for i, charset in enumerate(charsets) if font_checkboxes[i].isChecked()]
-            
-            if not selected_charsets:
-                no_selection_label = QLabel("No fonts selected. Please select at least one font.", sample_container)
-                sample_container_layout.addWidget(no_selection_label)
-                return
-            
-            # Render text with each font
-            for charset in selected_charsets:
-                # Create a lookup dictionary for quick character access
-                char_lookup = {}
-                for ascii_code, width, height, offset in charset['char_specs']:
-                    char_lookup[ascii_code] = (width, height, offset)
-                
-                # Calculate total width and max height
-                total_width = 0
-                max_height = 0
-                char_images = []
-                missing_chars = []
-                
-                for char in text:
-                    ascii_code = ord(char)
-                    if ascii_code in char_lookup:
-                        width, height, offset = char_lookup[ascii_code]
-                        
-                        # Extract character bitmap
-                        bytes_per_row = (width + 7) // 8
-                        data_size = bytes_per_row * height
-                        char_bitmap_data = charset['bitmap_data'][offset:offset + data_size]
-                        
-                        # Create image for this character
-                        img = Image.new('RGB', (width, height))
-                        pixels = img.load()
-                        
-                        for y in range(height):
-                            row_start = y * bytes_per_row
-                            for byte_in_row in range(bytes_per_row):
-                                byte_index = row_start + byte_in_row
-                                if byte_index >= len(char_bitmap_data):
-                                    break
-                                
-                                byte = char_bitmap_data[byte_index]
-                                
-                                for bit in range(8):
-                                    x = byte_in_row * 8 + bit
-                                    if x < width:
-                                        if byte & (1 << (7 - bit)):
-                                            pixels[x, y] = (0, 0, 0)  # Black text
-                                        else:
-                                            pixels[x, y] = (255, 255, 255)  # White background
-                        
-                        char_images.append(img)
-                        total_width += width
-                        max_height = max(max_height, height)
-                    else:
-                        # Character not found
-                        missing_chars.append(char)
-                        placeholder_width = max_height // 2 if max_height > 0 else 8
-                        img = Image.new('RGB', (placeholder_width, max_height if max_height > 0 else 16), (255, 200, 200))
-                        char_images.append(img)
-                        total_width += placeholder_width
-                
-                if not char_images:
+                status = "Enter text to preview"
+            elif not any(selected):
+                status = "No fonts selected. Please select at least one font."
+            else:
+                status = ""
+            sample_status_label.setText(status)
+            sample_status_label.setVisible(bool(status))
+            
+            # Render text with each selected font from its cached glyphs, black on white
+            for charset, is_selected, (font_label, preview_label, missing_label) in zip(charsets, selected, sample_rows):
+                show = bool(text) and is_selected
+                font_label.setVisible(show)
+                preview_label.setVisible(show)
+                if not show:
+                    missing_label.setVisible(False)
                     continue
                 
-                # Combine all character images
-                combined = Image.new('RGB', (total_width, max_height), (255, 255, 255))
-                x_offset = 0
-                for img in char_images:
-                    # Align to baseline (bottom of image)
-                    y_offset = max_height - img.height
-                    combined.paste(img, (x_offset, y_offset))
-                    x_offset += img.width
+                combined, missing_chars = charset['glyph_cache'].text_rgb(text)
                 
                 # Scale up for better visibility
-                scale = min(3, 600 // max(1, total_width))
-                if scale > 1:
-                    combined = combined.resize((total_width * scale, max_height * scale), Image.NEAREST)
-                
-                # Font name label
-                font_label = QLabel(f"<b>{charset['filename']} ({charset['size']}px)</b>", sample_container)
-                sample_container_layout.addWidget(font_label)
-                
-                # Convert to QPixmap and display
-                b = combined.tobytes()
-                bytes_per_line = combined.width * 3
-                qimg = QImage(b, combined.width, combined.height, bytes_per_line, QImage.Format.Format_RGB888)
-                
-                preview_label = QLabel(sample_container)
-                preview_label.setPixmap(QPixmap.fromImage(qimg))
-                preview_label.setStyleSheet("background-color: white; border: 1px solid gray; padding: 5px;")
-                sample_container_layout.addWidget(preview_label)
+                scale = min(3, 600 // max(1, combined.shape[1]))
+                preview_label.setPixmap(QPixmap.fromImage(rgb_to_qimage(scale_rgb(combined, scale))))
                 
                 # Show missing characters if any
-                if missing_chars:
-                    missing_label = QLabel(f"<i>Missing characters: {', '.join(set(missing_chars))}</i>", sample_container)
-                    missing_label.setStyleSheet("color: red;")
-                    sample_container_layout.addWidget(missing_label)
-            
-            sample_container_layout.addStretch()
+                missing_label.setText(f"<i>Missing characters: {', '.join(set(missing_chars))}</i>")
+                missing_label.setVisible(bool(missing_chars))
         
         btn_preview_sample.clicked.connect(render_all_sample_text)
         
+        # Live preview: render once typing pauses for PREVIEW_DEBOUNCE_MS
+        sample_timer = QTimer(dlg)
+        sample_timer.setSingleShot(True)
+        sample_timer.setInterval(PREVIEW_DEBOUNCE_MS)
+        sample_timer.timeout.connect(render_all_sample_text)
+        sample_input.textChanged.connect(sample_timer.start)
+        
         sample_scroll.setWidget(sample_container)
         sample_section.addWidget(sample_scroll)
         layout.addLayout(sample_section)
@@ -2030,6 +1519,9 @@ def view_multiple_charsets(parent=None):
                 container_layout.addWidget(no_chars_label)
                 return
             
+            # Decoded glyphs of every selected charset, from their caches
+            charset_glyphs = [charset['glyph_cache'].glyphs() for charset in selected_charsets]
+            
             # Create comparison table
             for ascii_code in all_codes:
                 # Character header
@@ -2046,51 +1538,16 @@ def view_multiple_charsets(parent=None):
                 # Row for all fonts showing this character
                 char_row = QHBoxLayout()
                 
-                for charset in selected_charsets:
+                for charset, glyphs in zip(selected_charsets, charset_glyphs):
                     # Find character in this charset
-                    char_found = None
-                    for spec_ascii, width, height, offset in charset['char_specs']:
-                        if spec_ascii == ascii_code:
-                            char_found = (width, height, offset)
-                            break
+                    pixels = glyphs.get(ascii_code)
                     
-                    if char_found:
-                        width, height, offset = char_found
-                        
-                        # Extract bitmap data
-                        bytes_per_row = (width + 7) // 8
-                        data_size = bytes_per_row * height
-                        char_bitmap_data = charset['bitmap_data'][offset:offset + data_size]
-                        
-                        # Create image
-                        img = Image.new('RGB', (width, height))
-                        pixels = img.load()
-                        
-                        for y in range(height):
-                            row_start = y * bytes_per_row
-                            for byte_in_row in range(bytes_per_row):
-                                byte_index = row_start + byte_in_row
-                                if byte_index >= len(char_bitmap_data):
-                                    break
-                                
-                                byte = char_bitmap_data[byte_index]
-                                
-                                for bit in range(8):
-                                    x = byte_in_row * 8 + bit
-                                    if x < width:
-                                        if byte & (1 << (7 - bit)):
-                                            pixels[x, y] = (255, 255, 255)
-                                        else:
-                                            pixels[x, y] = (0, 0, 0)
+                    if pixels is not None:
+                        height, width = pixels.shape
                         
                         # Scale up for visibility
                         scale = max(3, 30 // max(1, max(width, height)))
-                        img_scaled = img.resize((width * scale, height * scale), Image.NEAREST)
-                        
-                        # Convert to QImage
-                        b = img_scaled.tobytes()
-                        bytes_per_line = img_scaled.width * 3
-                        qimg = QImage(b, img_scaled.width, img_scaled.height, bytes_per_line, QImage.Format.Format_RGB888)
+                        qimg = glyph_qimage(pixels, scale)
                         
                         # Create font column
                         font_col = QVBoxLayout()
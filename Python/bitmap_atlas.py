@@ -0,0 +1,339 @@
+import os
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from bitmap_layout import VGA_DISPLAY_X, VGA_DISPLAY_Y
+from c_array_writer import write_hex_rows
+from header_parser import iter_c_arrays
+
+# An atlas stores the pixels of all bitmaps on a few pages of at most ATLAS_PAGE_WIDTH byte rows instead of one
+# array per bitmap. Every bitmap is first trimmed to the bounding box of the pixels that differ from its background
+# colour; the rectangle table then tells where that box is on which page and where it goes in the full bitmap.
+# The trimmed margin holds only the background colour ("fill") and is not drawn by the firmware.
+#
+# Rectangles are packed with a skyline bottom-left packer: largest first (in a few orders, see pack_rects),
+# every rectangle goes where its top edge ends up lowest, and a new page is only started when it fits on none
+# of the open ones. Every page is then cropped to the bounding box of its rectangles; its row length is in the
+# atlas_page_widths table.
+DEFAULT_PAGE_SIZE = (VGA_DISPLAY_X, VGA_DISPLAY_Y)
+
+ATLAS_TABLE_NAME = 'bitmap_atlas'
+ATLAS_PAGE_PREFIX = 'atlas_page_'
+ATLAS_WIDTHS_NAME = 'atlas_page_widths'
+
+# Position of one bitmap in the atlas: page, x, y, width, height of the trimmed box on the page,
+# offset_x, offset_y of that box in the full bitmap, full_width, full_height, and the colour of the margin
+AtlasRect = namedtuple('AtlasRect', ['page', 'x', 'y', 'width', 'height', 'offset_x', 'offset_y',
+                                     'full_width', 'full_height', 'fill'])
+# names: variable names, rects: AtlasRect per bitmap in the same order, pages: 2D pixel arrays,
+# page_width: the largest page width the rectangles were packed for
+Atlas = namedtuple('Atlas', ['names', 'page_width', 'pages', 'rects'])
+
+# Numbers for the atlas report; efficiency is sprite_pixels / page_pixels
+AtlasStats = namedtuple('AtlasStats', ['pages', 'page_pixels', 'sprite_pixels', 'full_pixels', 'raw_bytes', 'atlas_bytes'])
+
+# Bytes per entry of the C rectangle table: eight uint16 fields and two uint8 fields
+ATLAS_RECT_BYTES = 18
+# Bytes per entry of the page width table
+ATLAS_PAGE_WIDTH_BYTES = 2
+
+_TABLE_ROW = re.compile(r'^\s*\{([^{}]*)\},?\s*//\s*(\w+)')
+
+
+def _pixels(width, height, bitmap_data):
+    pixels = bytes(bitmap_data[2:2 + width * height]).ljust(width * height, b'\0')
+    return np.frombuffer(pixels, dtype=np.uint8).reshape(height, width)
+
+
+def parse_page_size(text):
+    """Parse "WIDTHxHEIGHT", e.g. "320x240". Returns (width, height)."""
+    match = re.match(r'^(\d+)x(\d+)$', text.strip())
+    if not match or 0 in (int(match.group(1)), int(match.group(2))):
+        raise ValueError(f"Invalid page size '{text}', expected WIDTHxHEIGHT")
+    width, height = int(match.group(1)), int(match.group(2))
+    if width > 0xFFFF or height > 0xFFFF:
+        raise ValueError(f"Page size {width}x{height} does not fit the uint16 rectangle table")
+    return width, height
+
+
+def auto_trim_color(pixels):
+    """Background colour of a bitmap for trimming: the most common colour of its border.
+    Only rows and columns of that colour alone are trimmed, so a wrong guess just trims nothing."""
+    border = np.concatenate([pixels[0], pixels[-1], pixels[:, 0], pixels[:, -1]])
+    return int(np.bincount(border, minlength=256).argmax())
+
+
+def trim_box(pixels, color):
+    """Bounding box (x, y, width, height) of the pixels that are not color; (0, 0, 0, 0) when there are none."""
+    if color is None:
+        return 0, 0, pixels.shape[1], pixels.shape[0]
+    content = pixels != color
+    rows = np.flatnonzero(content.any(axis=1))
+    if not rows.size:
+        return 0, 0, 0, 0
+    columns = np.flatnonzero(content.any(axis=0))
+    return int(columns[0]), int(rows[0]), int(columns[-1] - columns[0] + 1), int(rows[-1] - rows[0] + 1)
+
+
+class _Skyline:
+    """One atlas page: the top edge of the packed rectangles as [x, y, width] segments from left to right."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.segments = [[0, 0, width]]
+        self.used_height = 0
+
+    def find(self, width, height):
+        """Bottom-left position (x, y) for a width x height rectangle, or None when it does not fit."""
+        best = None
+        for index, (x, _, _) in enumerate(self.segments):
+            if x + width > self.width:
+                break
+            # The rectangle rests on the highest segment below it
+            y = 0
+            remaining = width
+            for _, segment_y, segment_width in self.segments[index:]:
+                y = max(y, segment_y)
+                remaining -= segment_width
+                if remaining <= 0:
+                    break
+            if y + height <= self.height and (best is None or (y + height, x) < best[0]):
+                best = ((y + height, x), x, y)
+        return None if best is None else best[1:]
+
+    def place(self, x, y, width, height):
+        """Raise the skyline over [x, x + width) to y + height."""
+        right = x + width
+        segments = []
+        for segment in self.segments:
+            segment_x, segment_y, segment_width = segment
+            segment_right = segment_x + segment_width
+            if segment_right <= x or segment_x >= right:
+                segments.append(segment)
+                continue
+            # Keep the parts left and right of the new rectangle
+            if segment_x < x:
+                segments.append([segment_x, segment_y, x - segment_x])
+            if segment_x <= x < segment_right:
+                segments.append([x, y + height, width])
+            if segment_right > right:
+                segments.append([right, segment_y, segment_right - right])
+
+        # Merge neighbours of the same height so the skyline stays short
+        merged = [segments[0]]
+        for segment in segments[1:]:
+            if segment[1] == merged[-1][1]:
+                merged[-1][2] += segment[2]
+            else:
+                merged.append(segment)
+        self.segments = merged
+        self.used_height = max(self.used_height, y + height)
+
+
+# Orders to pack in, largest first; no single one is best for every set of sizes, so all are tried
+_PACK_ORDERS = (
+    lambda size: (size[1], size[0]),            # height
+    lambda size: (size[0], size[1]),            # width
+    lambda size: (size[0] * size[1], size[1]),  # area
+    lambda size: (max(size), min(size)),        # longest side
+)
+
+
+def _pack(sizes, order, page_width, page_height):
+    pages = []
+    used_widths = []
+    positions = [(0, 0, 0)] * len(sizes)
+    for index in order:
+        width, height = sizes[index]
+        if width == 0 or height == 0:
+            continue
+        for page_index, page in enumerate(pages):
+            position = page.find(width, height)
+            if position is not None:
+                break
+        else:
+            pages.append(_Skyline(page_width, page_height))
+            page_index, page = len(pages) - 1, pages[-1]
+            position = page.find(width, height)
+        page.place(*position, width, height)
+        positions[index] = (page_index, *position)
+        if page_index == len(used_widths):
+            used_widths.append(0)
+        used_widths[page_index] = max(used_widths[page_index], position[0] + width)
+    return positions, [(width, page.used_height) for width, page in zip(used_widths, pages)]
+
+
+def pack_rects(sizes, page_width, page_height):
+    """Pack (width, height) rectangles onto pages of page_width x page_height.
+    Every order of _PACK_ORDERS is packed and the one with the smallest total page area is kept.
+    Returns (positions, page_sizes): (page, x, y) per rectangle in the order of sizes, and the used
+    (width, height) of every page. Empty rectangles are put at (0, 0, 0)."""
+    for width, height in sizes:
+        if width > page_width or height > page_height:
+            raise ValueError(f"A {width}x{height} bitmap does not fit a {page_width}x{page_height} atlas page")
+
+    best = None
+    for key in _PACK_ORDERS:
+        order = sorted(range(len(sizes)), key=lambda index: key(sizes[index]), reverse=True)
+        positions, page_sizes = _pack(sizes, order, page_width, page_height)
+        area = sum(width * height for width, height in page_sizes)
+        if best is None or area < best[0]:
+            best = area, positions, page_sizes
+    return best[1:]
+
+
+def build_atlas(bitmaps, page_size=DEFAULT_PAGE_SIZE, trim=None):
+    """Trim and pack bitmaps (var_name, width, height, raw bitmap_data) into atlas pages.
+    trim: None keeps every bitmap whole, an R3G3B2 colour trims that background colour off every bitmap,
+          'auto' trims the most common border colour of every bitmap (see auto_trim_color).
+    Every page is cropped to the bounding box of its rectangles.
+    Returns (atlas, stats)."""
+    page_width, page_height = page_size
+    frames = [_pixels(width, height, bitmap_data) for _, width, height, bitmap_data in bitmaps]
+    colors = [auto_trim_color(pixels) if trim == 'auto' else trim for pixels in frames]
+    boxes = [trim_box(pixels, color) for pixels, color in zip(frames, colors)]
+
+    positions, page_sizes = pack_rects([(w, h) for _, _, w, h in boxes], page_width, page_height)
+    pages = [np.zeros((height, width), dtype=np.uint8) for width, height in page_sizes]
+
+    rects = []
+    for pixels, color, (box_x, box_y, w, h), (page, x, y) in zip(frames, colors, boxes, positions):
+        if w and h:
+            pages[page][y:y + h, x:x + w] = pixels[box_y:box_y + h, box_x:box_x + w]
+        fill = color if color is not None else 0
+        rects.append(AtlasRect(page, x, y, w, h, box_x, box_y, pixels.shape[1], pixels.shape[0], fill))
+
+    atlas = Atlas([var_name for var_name, _, _, _ in bitmaps], page_width, pages, rects)
+    return atlas, atlas_stats(atlas)
+
+
+def atlas_stats(atlas):
+    """AtlasStats of an atlas; raw_bytes is what the same bitmaps take as raw arrays with their size bytes."""
+    page_pixels = sum(page.size for page in atlas.pages)
+    return AtlasStats(
+        len(atlas.pages),
+        page_pixels,
+        sum(rect.width * rect.height for rect in atlas.rects),
+        sum(rect.full_width * rect.full_height for rect in atlas.rects),
+        sum(rect.full_width * rect.full_height + 2 for rect in atlas.rects),
+        page_pixels + ATLAS_RECT_BYTES * len(atlas.rects) + ATLAS_PAGE_WIDTH_BYTES * len(atlas.pages),
+    )
+
+
+def atlas_bitmaps(atlas):
+    """Cut every bitmap back out of the atlas with its trimmed margin in the fill colour.
+    Returns a list of (var_name, width, height, bitmap_data) tuples with raw bitmap_data."""
+    bitmaps = []
+    for var_name, rect in zip(atlas.names, atlas.rects):
+        pixels = np.full((rect.full_height, rect.full_width), rect.fill, dtype=np.uint8)
+        if rect.width and rect.height:
+            page = atlas.pages[rect.page]
+            pixels[rect.offset_y:rect.offset_y + rect.height, rect.offset_x:rect.offset_x + rect.width] = \
+                page[rect.y:rect.y + rect.height, rect.x:rect.x + rect.width]
+        bitmap_data = bytearray([rect.full_width & 0xFF, rect.full_height & 0xFF]) + pixels.tobytes()
+        bitmaps.append((var_name, rect.full_width, rect.full_height, bitmap_data))
+    return bitmaps
+
+
+def reorder_atlas(atlas, names):
+    """Return atlas with its rectangle table in the order of names (all variable names of atlas).
+    The pages stay as they are, only the bitmap indices change."""
+    index_of = {name: index for index, name in enumerate(atlas.names)}
+    order = [index_of[name] for name in names]
+    return Atlas(list(names), atlas.page_width, atlas.pages, [atlas.rects[index] for index in order])
+
+
+def write_atlas_header(output_file, atlas):
+    """Write an atlas as a C header: the pages, then the rectangle table indexed by bitmap number."""
+    out_dir = os.path.dirname(output_file)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    with open(output_file, 'w', newline='\n') as f:
+        f.write("#ifndef BITMAPS_H\n")
+        f.write("#define BITMAPS_H\n\n")
+        f.write("#include <stdint.h>\n\n")
+        f.write(f"#define NUM_BITMAPS {len(atlas.rects)}\n\n")
+        f.write("// Bitmaps are trimmed rectangles on atlas pages of atlas_page_widths[page] byte rows. A bitmap is drawn by\n")
+        f.write("// copying its rectangle row by row to (offset_x, offset_y) inside its full size; the margin around it is not drawn.\n")
+        f.write("#define BITMAP_ATLAS 1\n")
+        f.write(f"#define ATLAS_PAGE_WIDTH {atlas.page_width}\n")
+        f.write(f"#define NUM_ATLAS_PAGES {len(atlas.pages)}\n\n")
+        f.write("typedef struct {\n")
+        f.write("    uint16_t x, y, width, height;        // trimmed rectangle on the page\n")
+        f.write("    uint16_t offset_x, offset_y;          // position of the rectangle in the full bitmap\n")
+        f.write("    uint16_t full_width, full_height;\n")
+        f.write("    uint8_t page;\n")
+        f.write("    uint8_t fill;                         // colour of the trimmed margin\n")
+        f.write("} AtlasRect;\n\n")
+
+        for index, page in enumerate(atlas.pages):
+            f.write(f"// Atlas page {index} ({page.shape[1]}x{page.shape[0]})\n")
+            f.write(f"const uint8_t {ATLAS_PAGE_PREFIX}{index}[{page.size}] = {{\n")
+            write_hex_rows(f, page.tobytes())
+            f.write("\n};\n\n")
+
+        f.write("const uint8_t* const atlas_pages[NUM_ATLAS_PAGES] = {\n")
+        f.write(",\n".join(f"    {ATLAS_PAGE_PREFIX}{index}" for index in range(len(atlas.pages))))
+        f.write("\n};\n\n")
+        f.write("// Row length of every page in bytes\n")
+        f.write(f"const uint16_t {ATLAS_WIDTHS_NAME}[NUM_ATLAS_PAGES] = {{\n")
+        f.write(",\n".join(f"    {page.shape[1]}" for page in atlas.pages))
+        f.write("\n};\n\n")
+
+        f.write("// Rectangle of every bitmap, indexed by bitmap number\n")
+        f.write(f"const AtlasRect {ATLAS_TABLE_NAME}[NUM_BITMAPS] = {{\n")
+        rows = [f"    {{{r.x}, {r.y}, {r.width}, {r.height}, {r.offset_x}, {r.offset_y}, {r.full_width}, "
+                f"{r.full_height}, {r.page}, 0x{r.fill:02X}}}" for r in atlas.rects]
+        for index, (row, var_name) in enumerate(zip(rows, atlas.names)):
+            separator = "," if index < len(rows) - 1 else ""
+            f.write(f"{row}{separator} // {var_name.replace('_bitmap_data', '')}\n")
+        f.write("};\n\n")
+        f.write("#endif // BITMAPS_H\n")
+
+
+def load_atlas_header(header_file):
+    """Read an atlas header written by write_atlas_header. Returns an Atlas."""
+    pages = {}
+    table = None
+    page_widths = None
+    page_width = None
+    for array in iter_c_arrays(header_file):
+        if array.name.startswith(ATLAS_PAGE_PREFIX) and array.name[len(ATLAS_PAGE_PREFIX):].isdigit():
+            pages[int(array.name[len(ATLAS_PAGE_PREFIX):])] = array.data
+        elif array.name == ATLAS_TABLE_NAME:
+            table = array.data
+        elif array.name == ATLAS_WIDTHS_NAME:
+            page_widths = list(array.data)
+    if table is None:
+        raise ValueError(f"No {ATLAS_TABLE_NAME} table found in {header_file}")
+
+    # The table rows carry the bitmap names in their comments, which the array parser drops
+    names = []
+    with open(header_file, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = re.match(r'^#define ATLAS_PAGE_WIDTH (\d+)', line)
+            if match:
+                page_width = int(match.group(1))
+            match = _TABLE_ROW.match(line)
+            if match:
+                names.append(f"{match.group(2)}_bitmap_data")
+    if page_width is None or len(names) != len(table):
+        raise ValueError(f"Incomplete atlas header {header_file}")
+
+    rects = [AtlasRect(page, x, y, w, h, ox, oy, fw, fh, fill) for x, y, w, h, ox, oy, fw, fh, page, fill in table]
+    # Headers without a width table have every page ATLAS_PAGE_WIDTH wide
+    if page_widths is None:
+        page_widths = [page_width] * len(pages)
+    if len(page_widths) != len(pages):
+        raise ValueError(f"{ATLAS_WIDTHS_NAME} has {len(page_widths)} entries for {len(pages)} atlas pages")
+    page_arrays = []
+    for index, width in enumerate(page_widths):
+        data = pages.get(index)
+        if data is None or not width or len(data) % width:
+            raise ValueError(f"Atlas page {index} is missing or not a whole number of rows")
+        page_arrays.append(np.frombuffer(bytes(data), dtype=np.uint8).reshape(-1, width))
+    return Atlas(names, page_width, page_arrays, rects)
@@ -0,0 +1,90 @@
+import numpy as np
+from PIL import Image
+
+
+# Pixels with an alpha below this count as transparent
+ALPHA_THRESHOLD = 128
+
+
+def image_has_alpha(img):
+    """Whether a PIL image has an alpha channel or a transparent palette entry."""
+    return img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+
+
+def rgb_to_r3g3b2(rgb, alpha=None, transparent=None, tolerance=None):
+    """Quantize an array of (..., 3) RGB values to R3G3B2 in a single NumPy pass, for one image or a whole
+    stack of frames. With transparent (an R3G3B2 value), pixels with an alpha below ALPHA_THRESHOLD get
+    that colour; with tolerance as well, so do the pixels whose channels all lie within tolerance of it.
+    Returns a uint8 array of the leading shape."""
+    # Same packing as ((r >> 5) << 5) | ((g >> 5) << 2) | (b >> 6), for all pixels at once
+    color_8bit = (rgb[..., 0] & 0xE0) | ((rgb[..., 1] >> 5) << 2) | (rgb[..., 2] >> 6)
+    if transparent is not None and alpha is not None:
+        color_8bit[alpha < ALPHA_THRESHOLD] = transparent
+    if transparent is not None and tolerance is not None:
+        # A background that is not one exact colour, e.g. a slight gradient behind a sprite
+        distance = np.abs(rgb.astype(np.int16) - R3G3B2_PALETTE[transparent]).max(axis=-1)
+        color_8bit[distance <= tolerance] = transparent
+    return color_8bit.astype(np.uint8)
+
+
+def image_to_r3g3b2(img, transparent=None, tolerance=None):
+    """Quantize a PIL image to 8-bit R3G3B2 colour in a single NumPy pass (see rgb_to_r3g3b2).
+    Returns (width, height, payload) where payload holds one byte per pixel, row by row."""
+    alpha = None
+    if transparent is not None and image_has_alpha(img):
+        img = img.convert('RGBA')
+        alpha = np.asarray(img, dtype=np.uint8)[..., 3]
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    width, height = img.size
+    rgb = np.asarray(img, dtype=np.uint8)
+    return width, height, rgb_to_r3g3b2(rgb, alpha, transparent, tolerance).tobytes()
+
+
+def _build_r3g3b2_palette():
+    """Build the 256-entry RGB lookup table for every possible R3G3B2 byte."""
+    codes = np.arange(256, dtype=np.uint8)
+    palette = np.empty((256, 3), dtype=np.uint8)
+    palette[:, 0] = (codes >> 5) << 5
+    palette[:, 1] = ((codes >> 2) & 0x07) << 5
+    palette[:, 2] = (codes & 0x03) << 6
+    return palette
+
+# Index with an array of R3G3B2 bytes to get the matching (r, g, b) rows
+R3G3B2_PALETTE = _build_r3g3b2_palette()
+
+
+def _payload_view(width, height, bitmap_data):
+    """Return the pixel bytes of bitmap_data (after the 2 size bytes) as exactly width*height values.
+    Missing pixels at the end are filled with 0 (black), like the old per-pixel decoder left them."""
+    pixels = np.frombuffer(bytes(bitmap_data[2:2 + width * height]), dtype=np.uint8)
+    if pixels.size < width * height:
+        pixels = np.concatenate([pixels, np.zeros(width * height - pixels.size, dtype=np.uint8)])
+    return pixels
+
+
+def r3g3b2_to_image(width, height, bitmap_data):
+    """Convert 8-bit bitmap data (R3G3B2, first 2 bytes width/height) back to a PIL RGB Image."""
+    rgb = R3G3B2_PALETTE[_payload_view(width, height, bitmap_data)]
+    return Image.frombytes('RGB', (width, height), rgb.tobytes())
+
+
+def r3g3b2_to_images(bitmaps):
+    """Decode many bitmaps at once.
+    bitmaps: list of tuples (width, height, bitmap_data)
+    Returns a list of PIL RGB Images in the same order."""
+    if not bitmaps:
+        return []
+
+    # One palette lookup over all payloads, then cut the result back into images
+    payloads = [_payload_view(width, height, bitmap_data) for width, height, bitmap_data in bitmaps]
+    rgb = R3G3B2_PALETTE[np.concatenate(payloads)]
+
+    images = []
+    start = 0
+    for (width, height, _), payload in zip(bitmaps, payloads):
+        end = start + payload.size
+        images.append(Image.frombytes('RGB', (width, height), rgb[start:end].tobytes()))
+        start = end
+    return images
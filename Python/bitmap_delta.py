@@ -0,0 +1,209 @@
+import os
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from bitmap_header import header_version_for, is_header_v2, to_header_v1, to_header_v2
+from c_array_writer import write_hex_rows
+from header_parser import iter_c_arrays
+
+# An animation is a keyframe (normal bitmap data: width, height, pixels) followed by one delta per later frame.
+# A delta only holds the dirty rectangles against the frame before it (all values little-endian uint16):
+#   rect count, then per rect x, y, width, height followed by width * height R3G3B2 pixels row by row
+_DELTA_COUNT = struct.Struct('<H')
+_DELTA_RECT = struct.Struct('<HHHH')
+
+# Per-frame numbers for the animation report
+# rects: dirty rectangles, dirty_pixels: pixels they cover, delta_bytes: size of the delta,
+# frame_bytes: size of the same frame stored as a full bitmap
+DeltaStats = namedtuple('DeltaStats', ['rects', 'dirty_pixels', 'delta_bytes', 'frame_bytes'])
+
+
+def _spans(flags, max_gap):
+    """Return (start, end) pairs of the True runs in a 1D bool array, joining runs split by at most max_gap False values."""
+    indices = np.flatnonzero(flags)
+    if not len(indices):
+        return []
+    breaks = np.flatnonzero(np.diff(indices) > max_gap + 1)
+    starts = indices[np.concatenate(([0], breaks + 1))]
+    ends = indices[np.concatenate((breaks, [len(indices) - 1]))] + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def _band_rects(changed):
+    """Rectangles from bands of consecutive changed rows. Inside a band, columns are split at unchanged gaps
+    wide enough that a new rectangle header is cheaper than copying the gap; every rectangle is then
+    trimmed to its changed rows. Cheap when the changes are a few compact blobs."""
+    rects = []
+    for top, bottom in _spans(changed.any(axis=1), 0):
+        band = changed[top:bottom]
+        max_gap = _DELTA_RECT.size // (bottom - top)
+        for left, right in _spans(band.any(axis=0), max_gap):
+            rows = np.flatnonzero(band[:, left:right].any(axis=1))
+            rects.append((left, top + int(rows[0]), right - left, int(rows[-1]) - int(rows[0]) + 1))
+    return rects
+
+
+def _row_span_rects(changed):
+    """Rectangles from the changed spans of every row, with identical spans of consecutive rows stacked into
+    one rectangle. Cheap when the changes are scattered over the whole frame."""
+    rects = []
+    open_rects = {}
+    for y in range(changed.shape[0]):
+        spans = _spans(changed[y], _DELTA_RECT.size)
+        still_open = {}
+        for left, right in spans:
+            rect = open_rects.get((left, right))
+            if rect is not None and rect[1] + rect[3] == y:
+                rect[3] += 1
+            else:
+                rect = [left, y, right - left, 1]
+                rects.append(rect)
+            still_open[(left, right)] = rect
+        open_rects = still_open
+    return [tuple(rect) for rect in rects]
+
+
+def _delta_size(rects):
+    return _DELTA_COUNT.size + sum(_DELTA_RECT.size + width * height for _, _, width, height in rects)
+
+
+def dirty_rects(previous, current):
+    """Return the dirty rectangles (x, y, width, height) that turn previous into current (2D pixel arrays).
+    Both the band and the row span strategy are tried and the one giving the smaller delta is used."""
+    changed = previous != current
+    if not changed.any():
+        return []
+    return min(_band_rects(changed), _row_span_rects(changed), key=_delta_size)
+
+
+def encode_delta(previous, current):
+    """Encode the delta from previous to current (2D pixel arrays). Returns (delta, rects)."""
+    rects = dirty_rects(previous, current)
+    delta = bytearray(_DELTA_COUNT.pack(len(rects)))
+    for x, y, width, height in rects:
+        delta += _DELTA_RECT.pack(x, y, width, height)
+        delta += current[y:y + height, x:x + width].tobytes()
+    return delta, rects
+
+
+def apply_delta(frame, delta):
+    """Apply one delta in place to frame (2D pixel array) and return it."""
+    (count,) = _DELTA_COUNT.unpack_from(delta, 0)
+    position = _DELTA_COUNT.size
+    for _ in range(count):
+        x, y, width, height = _DELTA_RECT.unpack_from(delta, position)
+        position += _DELTA_RECT.size
+        if x + width > frame.shape[1] or y + height > frame.shape[0]:
+            raise ValueError(f"Dirty rectangle {width}x{height}+{x}+{y} is outside the frame")
+        pixels = np.frombuffer(bytes(delta[position:position + width * height]), dtype=np.uint8)
+        if pixels.size != width * height:
+            raise ValueError("Delta data ends inside a dirty rectangle")
+        frame[y:y + height, x:x + width] = pixels.reshape(height, width)
+        position += width * height
+    if position != len(delta):
+        raise ValueError(f"Delta has {len(delta) - position} trailing bytes")
+    return frame
+
+
+def _frame_pixels(width, height, bitmap_data):
+    pixels = bytes(bitmap_data[2:2 + width * height]).ljust(width * height, b'\0')
+    return np.frombuffer(pixels, dtype=np.uint8).reshape(height, width)
+
+
+def encode_animation(frames):
+    """Encode an ordered frame sequence as a keyframe plus deltas.
+    frames: list of tuples (width, height, bitmap_data) with raw bitmap_data, all of the same size
+    Returns (keyframe, deltas, stats) with a DeltaStats per frame (the keyframe included)."""
+    if not frames:
+        raise ValueError("An animation needs at least one frame")
+    width, height, keyframe = frames[0]
+    for index, (frame_width, frame_height, _) in enumerate(frames):
+        if (frame_width, frame_height) != (width, height):
+            raise ValueError(f"Frame {index} is {frame_width}x{frame_height}, expected {width}x{height}")
+
+    frame_bytes = width * height + 2
+    stats = [DeltaStats(1, width * height, len(keyframe), frame_bytes)]
+    deltas = []
+    previous = _frame_pixels(width, height, keyframe)
+    for _, _, bitmap_data in frames[1:]:
+        current = _frame_pixels(width, height, bitmap_data)
+        delta, rects = encode_delta(previous, current)
+        deltas.append(delta)
+        stats.append(DeltaStats(len(rects), sum(w * h for _, _, w, h in rects), len(delta), frame_bytes))
+        previous = current
+    return bytearray(keyframe), deltas, stats
+
+
+def play_animation(width, height, keyframe, deltas):
+    """Playback decoder: yield the raw bitmap data (2 size bytes + pixels) of every frame in order."""
+    frame = _frame_pixels(width, height, keyframe).copy()
+    size_bytes = bytes(keyframe[:2])
+    yield bytearray(size_bytes) + frame.tobytes()
+    for delta in deltas:
+        apply_delta(frame, delta)
+        yield bytearray(size_bytes) + frame.tobytes()
+
+
+def write_animation_header(output_file, name, width, height, keyframe, deltas, header_version=None):
+    """Write an animation as a C header: the keyframe, one array per delta and a frame pointer table.
+    The keyframe carries the usual "// name (WxH)" label, so it also shows up as a bitmap when inspected.
+    header_version: header of the keyframe, 1 or 2 (see bitmap_header); None picks 2 only for frames
+    larger than 255 pixels. The deltas store 16-bit rectangles and need no header."""
+    header_version = header_version_for([(name, width, height, keyframe)], header_version)
+    if header_version == 2:
+        keyframe = to_header_v2(width, height, keyframe)
+    out_dir = os.path.dirname(output_file)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    guard = f"{name.upper()}_ANIMATION_H"
+    frame_names = [f"{name}_keyframe"] + [f"{name}_delta_{index:02d}" for index in range(1, len(deltas) + 1)]
+    with open(output_file, 'w', newline='\n') as f:
+        f.write(f"#ifndef {guard}\n")
+        f.write(f"#define {guard}\n\n")
+        f.write("#include <stdint.h>\n\n")
+        f.write("// Frame 0 is a normal bitmap, every later frame a delta against the frame before it:\n")
+        f.write("// uint16 rect count, then per rect uint16 x, y, width, height and width * height pixels (little-endian)\n")
+        f.write(f"#define {name.upper()}_FRAMES {len(frame_names)}\n")
+        f.write(f"#define {name.upper()}_WIDTH {width}\n")
+        f.write(f"#define {name.upper()}_HEIGHT {height}\n\n")
+        if header_version == 2:
+            f.write("// The keyframe starts with a version 2 header: 0, 0, version, format, uint16 width, uint16 height\n")
+            f.write("#define BITMAP_HEADER_VERSION 2\n\n")
+
+        f.write(f"// {name} ({width}x{height})\n")
+        f.write(f"const uint8_t {frame_names[0]}[{len(keyframe)}] = {{\n")
+        write_hex_rows(f, keyframe)
+        f.write("\n};\n\n")
+
+        for frame_name, delta in zip(frame_names[1:], deltas):
+            f.write(f"// {frame_name}: {_DELTA_COUNT.unpack_from(delta, 0)[0]} dirty rectangle(s)\n")
+            f.write(f"const uint8_t {frame_name}[{len(delta)}] = {{\n")
+            write_hex_rows(f, delta)
+            f.write("\n};\n\n")
+
+        f.write(f"const uint8_t* const {name}_frames[{name.upper()}_FRAMES] = {{\n")
+        f.write(",\n".join(f"    {frame_name}" for frame_name in frame_names))
+        f.write("\n};\n\n")
+        f.write(f"#endif // {guard}\n")
+
+
+def load_animation_header(header_file):
+    """Read an animation header written by write_animation_header.
+    Returns (name, width, height, keyframe, deltas); a keyframe with a version 2 header comes back
+    with the two size bytes play_animation reads."""
+    keyframe = None
+    deltas = []
+    for array in iter_c_arrays(header_file):
+        if keyframe is None:
+            if array.ctype == 'uint8_t' and array.name.endswith('_keyframe') and array.width is not None:
+                name, width, height, keyframe = array.label, array.width, array.height, array.data
+        elif array.name.startswith(f"{name}_delta_"):
+            deltas.append(array.data)
+    if keyframe is None:
+        raise ValueError(f"No animation keyframe found in {header_file}")
+    if is_header_v2(keyframe):
+        keyframe = to_header_v1(keyframe)
+    return name, width, height, keyframe, deltas
@@ -0,0 +1,75 @@
+import struct
+from collections import namedtuple
+
+# Version 1 bitmap data starts with width & 0xFF and height & 0xFF, so anything over 255 pixels is cut off.
+# Version 2 bitmap data replaces those two bytes with an 8-byte header (little-endian):
+#   0x00, 0x00   marker; a version 1 reader sees a 0x0 bitmap and draws nothing
+#   version      HEADER_VERSION
+#   format       index into BITMAP_FORMATS
+#   width, height  uint16
+# The rest is the data of that format after its two size bytes, unchanged, so a decoder that skips
+# HEADER_V2_SIZE - 2 bytes reads it exactly like version 1 data. The one exception is "aligned" data:
+# ALIGNED_V2_PADDING zero bytes follow its uint16 stride, so its rows still start on a word.
+HEADER_VERSION = 2
+_HEADER_V2 = struct.Struct('<BBBBHH')
+HEADER_V2_SIZE = _HEADER_V2.size
+ALIGNED_V2_PADDING = 2
+
+# Format byte values; the first ones match the encodings of a combined header
+BITMAP_FORMATS = ('raw', 'rle', 'tiles', 'palette', 'spans', 'aligned', 'transform')
+
+BitmapHeader = namedtuple('BitmapHeader', ['version', 'format', 'width', 'height'])
+
+
+def needs_header_v2(width, height):
+    """Whether a bitmap of this size loses its dimensions in a version 1 header."""
+    return width > 0xFF or height > 0xFF
+
+
+def header_version_for(bitmaps, header_version=None):
+    """Bitmap header version to write: header_version if given, otherwise 1 unless a bitmap needs 16-bit sizes.
+    bitmaps: list of tuples (var_name, width, height, bitmap_data)"""
+    if header_version is not None:
+        return header_version
+    return 2 if any(needs_header_v2(width, height) for _, width, height, _ in bitmaps) else 1
+
+
+def is_header_v2(bitmap_data):
+    return len(bitmap_data) >= HEADER_V2_SIZE and bitmap_data[0] == 0 and bitmap_data[1] == 0 \
+        and bitmap_data[2] == HEADER_VERSION
+
+
+def to_header_v2(width, height, bitmap_data, bitmap_format='raw'):
+    """Return version 1 bitmap data (of any format) with a version 2 header instead of its size bytes."""
+    if bitmap_format not in BITMAP_FORMATS:
+        raise ValueError(f"Unknown bitmap format '{bitmap_format}'")
+    if width > 0xFFFF or height > 0xFFFF:
+        raise ValueError(f"{width}x{height} does not fit a 16-bit bitmap header")
+    header = _HEADER_V2.pack(0, 0, HEADER_VERSION, BITMAP_FORMATS.index(bitmap_format), width, height)
+    if bitmap_format == 'aligned':
+        return bytearray(header) + bitmap_data[2:4] + bytes(ALIGNED_V2_PADDING) + bitmap_data[4:]
+    return bytearray(header) + bitmap_data[2:]
+
+
+def read_bitmap_header(bitmap_data):
+    """Return the BitmapHeader of version 1 or 2 bitmap data; format is None for version 1, which does not store it."""
+    if is_header_v2(bitmap_data):
+        _, _, version, format_index, width, height = _HEADER_V2.unpack_from(bitmap_data)
+        if format_index >= len(BITMAP_FORMATS):
+            raise ValueError(f"Unknown bitmap format byte {format_index}")
+        return BitmapHeader(version, BITMAP_FORMATS[format_index], width, height)
+    if len(bitmap_data) < 2:
+        raise ValueError("Bitmap data has no size bytes")
+    return BitmapHeader(1, None, bitmap_data[0], bitmap_data[1])
+
+
+def to_header_v1(bitmap_data):
+    """Return bitmap data with two size bytes (low bytes of the size) in front, the form every decoder reads.
+    Version 1 data is returned as is."""
+    if not is_header_v2(bitmap_data):
+        return bitmap_data
+    header = read_bitmap_header(bitmap_data)
+    body = bytes(bitmap_data[HEADER_V2_SIZE:])
+    if header.format == 'aligned':
+        body = body[:2] + body[2 + ALIGNED_V2_PADDING:]
+    return bytearray([header.width & 0xFF, header.height & 0xFF]) + body
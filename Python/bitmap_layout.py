@@ -0,0 +1,116 @@
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from bitmap_header import ALIGNED_V2_PADDING, HEADER_V2_SIZE, is_header_v2
+
+# Framebuffer of the firmware (stm32_ub_vga_screen.h): VGA_DISPLAY_X x VGA_DISPLAY_Y pixels, and every row
+# one byte longer than the display, that last byte is the black pixel sent during horizontal blanking
+VGA_DISPLAY_X = 320
+VGA_DISPLAY_Y = 240
+FRAMEBUFFER_STRIDE = VGA_DISPLAY_X + 1
+
+# Aligned bitmap data: width & 0xFF, height & 0xFF, little-endian uint16 stride, then height rows of
+# stride bytes: width pixels and zero padding. The header is one word, so in a word-aligned array
+# every row starts on a word and can be copied with one memcpy or DMA transfer.
+# With a version 2 header (see bitmap_header) the stride follows that header and is padded to a word too.
+ROW_ALIGN = 4
+_ALIGNED_HEADER = struct.Struct('<BBH')
+ALIGNED_HEADER = _ALIGNED_HEADER.size
+
+# Per-asset numbers for the layout report
+LayoutStats = namedtuple('LayoutStats', ['raw_bytes', 'aligned_bytes', 'stride'])
+
+
+def row_stride(width):
+    """Bytes per stored row: width rounded up to a multiple of ROW_ALIGN."""
+    return -(-width // ROW_ALIGN) * ROW_ALIGN
+
+
+def _pixels(width, height, bitmap_data):
+    pixels = bytes(bitmap_data[2:2 + width * height]).ljust(width * height, b'\0')
+    return np.frombuffer(pixels, dtype=np.uint8).reshape(height, width)
+
+
+def align_rows(width, height, bitmap_data):
+    """Return raw bitmap data in the aligned layout. Returns (aligned, stats)."""
+    stride = row_stride(width)
+    rows = np.zeros((height, stride), dtype=np.uint8)
+    rows[:, :width] = _pixels(width, height, bitmap_data)
+    aligned = bytearray(_ALIGNED_HEADER.pack(width & 0xFF, height & 0xFF, stride)) + rows.tobytes()
+    return aligned, LayoutStats(len(bitmap_data), len(aligned), stride)
+
+
+def aligned_header(aligned_data):
+    """Return (stride, rows_offset) of aligned bitmap data with a version 1 or 2 header:
+    the row stride and the byte offset of the first row."""
+    if is_header_v2(aligned_data):
+        return struct.unpack_from('<H', aligned_data, HEADER_V2_SIZE)[0], HEADER_V2_SIZE + 2 + ALIGNED_V2_PADDING
+    return struct.unpack_from('<H', aligned_data, 2)[0], ALIGNED_HEADER
+
+
+def aligned_rows(width, height, aligned_data):
+    """Return the 2D pixel array (height, width) of aligned bitmap data, as a view without the padding."""
+    stride, rows_offset = aligned_header(aligned_data)
+    if stride < width:
+        raise ValueError(f"Row stride {stride} is smaller than the width {width}")
+    rows = np.frombuffer(bytes(aligned_data[rows_offset:]), dtype=np.uint8)
+    if rows.size != stride * height:
+        raise ValueError(f"Aligned bitmap has {rows.size} row bytes, expected {stride * height}")
+    return rows.reshape(height, stride)[:, :width]
+
+
+def unalign_rows(width, height, aligned_data):
+    """Return aligned bitmap data as raw bitmap data (2 size bytes + pixels)."""
+    return bytearray([width & 0xFF, height & 0xFF]) + aligned_rows(width, height, aligned_data).tobytes()
+
+
+def blit_rows(framebuffer, x, y, width, height, aligned_data):
+    """Draw aligned bitmap data into a flat framebuffer of FRAMEBUFFER_STRIDE byte rows like the firmware:
+    one width-byte copy per row from the start of each stored row."""
+    stride, rows_offset = aligned_header(aligned_data)
+    for row in range(height):
+        source = rows_offset + row * stride
+        destination = (y + row) * FRAMEBUFFER_STRIDE + x
+        framebuffer[destination:destination + width] = np.frombuffer(
+            bytes(aligned_data[source:source + width]), dtype=np.uint8)
+
+
+def validate_aligned_layout(width, height, aligned_data, bitmap_data):
+    """Check aligned bitmap data against the raw bitmap_data it was made from, on a simulated
+    FRAMEBUFFER_STRIDE x VGA_DISPLAY_Y framebuffer. Returns a list of problems (empty when it is valid).
+    The bitmap is drawn in the top left and bottom right corner with blit_rows and compared to a per-pixel
+    reference; the blanking column and everything around the bitmap must stay untouched."""
+    problems = []
+    if width > VGA_DISPLAY_X or height > VGA_DISPLAY_Y:
+        return [f"{width}x{height} does not fit the {VGA_DISPLAY_X}x{VGA_DISPLAY_Y} display"]
+
+    stride, rows_offset = aligned_header(aligned_data) if len(aligned_data) >= ALIGNED_HEADER else (0, ALIGNED_HEADER)
+    if rows_offset % ROW_ALIGN:
+        problems.append(f"rows start at byte {rows_offset}, not on a multiple of {ROW_ALIGN}")
+    if stride % ROW_ALIGN or stride < width:
+        problems.append(f"row stride {stride} is not a multiple of {ROW_ALIGN} of at least {width}")
+    if len(aligned_data) != rows_offset + stride * height:
+        problems.append(f"{len(aligned_data)} bytes, expected {rows_offset + stride * height}")
+    if problems:
+        return problems
+
+    rows = np.frombuffer(bytes(aligned_data[rows_offset:]), dtype=np.uint8).reshape(height, stride)
+    if rows[:, width:].any():
+        problems.append("row padding is not zero")
+
+    pixels = _pixels(width, height, bitmap_data)
+    # Fill with a value no pixel has, so a stray write is always visible
+    unused = np.setdiff1d(np.arange(256), pixels)
+    background = int(unused[0]) if unused.size else 0
+    for x, y in ((0, 0), (VGA_DISPLAY_X - width, VGA_DISPLAY_Y - height)):
+        framebuffer = np.full(FRAMEBUFFER_STRIDE * VGA_DISPLAY_Y, background, dtype=np.uint8)
+        blit_rows(framebuffer, x, y, width, height, aligned_data)
+
+        expected = np.full((VGA_DISPLAY_Y, FRAMEBUFFER_STRIDE), background, dtype=np.uint8)
+        expected[y:y + height, x:x + width] = pixels
+        wrong = np.flatnonzero((framebuffer.reshape(VGA_DISPLAY_Y, FRAMEBUFFER_STRIDE) != expected).any(axis=1))
+        if wrong.size:
+            problems.append(f"drawn at ({x}, {y}) framebuffer rows {wrong[:8].tolist()} differ")
+    return problems
@@ -0,0 +1,152 @@
+from collections import namedtuple
+
+import numpy as np
+
+from bitmap_codec import R3G3B2_PALETTE
+from bitmap_layout import ALIGNED_HEADER, row_stride
+from bitmap_palette import PALETTE_DEPTHS, palette_encode
+from bitmap_rle import rle_encode
+from bitmap_spans import DEFAULT_TRANSPARENT, spans_encode
+from bitmap_tiles import TILE_SIZE, build_tile_dictionary
+
+# Minimum PSNR (dB) against the R3G3B2 reference a reduced-colour bitmap has to keep
+DEFAULT_MIN_PSNR = 30.0
+
+# Colour counts tried below the lossless one: exactly what fits a 4, 2 and 1 bpp palette
+COLOR_LEVELS = tuple(1 << bpp for bpp in sorted(PALETTE_DEPTHS, reverse=True))
+
+# Rounds of weighted k-means over the colour histogram when reducing colours
+_KMEANS_ROUNDS = 8
+
+# Result of optimize_bitmap for one bitmap.
+# encoding, colors, psnr, encoded_bytes: the smallest candidate that keeps min_psnr
+# (psnr is inf for a lossless one), raw_bytes: the raw bitmap data size,
+# candidates: {encoding: (encoded_bytes, colors, psnr)} with the best candidate of every encoding
+OptimizeResult = namedtuple('OptimizeResult', ['encoding', 'colors', 'psnr', 'raw_bytes', 'encoded_bytes', 'candidates'])
+
+_RGB = R3G3B2_PALETTE.astype(np.int32)
+
+
+def _nearest(points, targets):
+    """Index of the nearest target (RGB rows) for every point (RGB rows), with one distance matrix."""
+    distances = ((points[:, None, :] - targets[None, :, :]) ** 2).sum(axis=2)
+    return distances.argmin(axis=1)
+
+
+def reduce_colors(counts, num_colors):
+    """Pick num_colors R3G3B2 colours for a colour histogram (bincount over the 256 R3G3B2 values).
+    Weighted k-means over the histogram, so the cost does not depend on the image size; the centres
+    are snapped to R3G3B2 values every round. Returns a 256-entry lookup from old to new colour."""
+    colors = np.flatnonzero(counts)
+    lookup = np.arange(256, dtype=np.uint8)
+    if len(colors) <= num_colors:
+        return lookup
+
+    weights = counts[colors].astype(np.float64)
+    points = _RGB[colors]
+    # Start from the most used colours; a stable sort keeps the result deterministic
+    centres = colors[np.argsort(-weights, kind='stable')[:num_colors]]
+    for _ in range(_KMEANS_ROUNDS):
+        assignment = _nearest(points, _RGB[centres])
+        sums = np.zeros((num_colors, 3))
+        np.add.at(sums, assignment, points * weights[:, None])
+        totals = np.bincount(assignment, weights=weights, minlength=num_colors)
+        used = totals > 0
+        means = sums[used] / totals[used, None]
+        new_centres = centres.copy()
+        new_centres[used] = _nearest(np.rint(means).astype(np.int32), _RGB)
+        if np.array_equal(new_centres, centres):
+            break
+        centres = new_centres
+
+    lookup[colors] = centres[_nearest(points, _RGB[centres])]
+    return lookup
+
+
+def lookup_psnr(counts, lookup):
+    """PSNR (dB) of mapping every colour through lookup, against the R3G3B2 reference, from the histogram alone."""
+    errors = ((_RGB - _RGB[lookup]) ** 2).sum(axis=1)
+    mse = float((counts * errors).sum()) / (3 * max(1, int(counts.sum())))
+    if mse == 0:
+        return float('inf')
+    return 10 * np.log10(255 ** 2 / mse)
+
+
+def _pixels(width, height, bitmap_data):
+    pixels = bytes(bitmap_data[2:2 + width * height]).ljust(width * height, b'\0')
+    return np.frombuffer(pixels, dtype=np.uint8)
+
+
+def quantize_bitmap(width, height, bitmap_data, num_colors):
+    """Return raw bitmap data with at most num_colors colours (bitmap_data itself when it already fits)."""
+    pixels = _pixels(width, height, bitmap_data)
+    counts = np.bincount(pixels, minlength=256)
+    if np.count_nonzero(counts) <= num_colors:
+        return bitmap_data
+    lookup = reduce_colors(counts, num_colors)
+    return bytearray(bitmap_data[:2]) + lookup[pixels].tobytes()
+
+
+def encoded_sizes(width, height, bitmap_data, tile_size=TILE_SIZE, transparent=DEFAULT_TRANSPARENT):
+    """Size of bitmap_data in every combined header encoding.
+    The tile size counts a dictionary of this bitmap alone; in a combined header it is shared."""
+    dictionary, tile_maps, _ = build_tile_dictionary([("", width, height, bitmap_data)], tile_size)
+    return {
+        'raw': len(bitmap_data),
+        'rle': len(rle_encode(width, height, bitmap_data)[0]),
+        'tiles': len(dictionary) + len(tile_maps[0]),
+        'palette': len(palette_encode(width, height, bitmap_data)[0]),
+        'spans': len(spans_encode(width, height, bitmap_data, transparent)[0]),
+        'aligned': ALIGNED_HEADER + row_stride(width) * height,
+    }
+
+
+def optimize_bitmap(width, height, bitmap_data, min_psnr=DEFAULT_MIN_PSNR, tile_size=TILE_SIZE,
+                    transparent=DEFAULT_TRANSPARENT):
+    """Search the smallest encoding of one bitmap whose PSNR stays at or above min_psnr.
+    Tries the lossless bitmap and every colour level of COLOR_LEVELS below its colour count, each in
+    every encoding. "spans" only takes the levels that keep the transparent pixels where they were.
+    Module-level so run_parallel can send it to the worker processes."""
+    pixels = _pixels(width, height, bitmap_data)
+    counts = np.bincount(pixels, minlength=256)
+    num_colors = int(np.count_nonzero(counts))
+
+    levels = [(num_colors, bitmap_data, float('inf'))]
+    for level in COLOR_LEVELS:
+        if level >= num_colors:
+            continue
+        lookup = reduce_colors(counts, level)
+        psnr = lookup_psnr(counts, lookup)
+        if psnr < min_psnr:
+            break  # Fewer colours only lose more
+        levels.append((level, bytearray(bitmap_data[:2]) + lookup[pixels].tobytes(), psnr))
+
+    # Per encoding the smallest level; on equal size the earlier (better) level wins
+    candidates = {}
+    keyed = pixels == transparent
+    for level, data, psnr in levels:
+        sizes = encoded_sizes(width, height, data, tile_size, transparent)
+        if data is not bitmap_data and not np.array_equal(_pixels(width, height, data) == transparent, keyed):
+            del sizes['spans']
+        for encoding, size in sizes.items():
+            if encoding not in candidates or size < candidates[encoding][0]:
+                candidates[encoding] = (size, level, psnr)
+
+    encoding = min(candidates, key=lambda name: candidates[name][0])
+    size, colors, psnr = candidates[encoding]
+    return OptimizeResult(encoding, colors, psnr, len(bitmap_data), size, candidates)
+
+
+def encoding_totals(results):
+    """Total size per encoding over all bitmaps, when each bitmap uses its best level for that encoding."""
+    totals = {}
+    for result in results:
+        for encoding, (size, _, _) in result.candidates.items():
+            totals[encoding] = totals.get(encoding, 0) + size
+    return totals
+
+
+def best_file_encoding(results):
+    """The encoding with the smallest total; a combined header has one encoding for all bitmaps."""
+    totals = encoding_totals(results)
+    return min(totals, key=totals.get)
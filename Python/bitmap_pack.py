@@ -0,0 +1,152 @@
+import mmap
+import os
+import struct
+
+from bitmap_header import header_version_for, is_header_v2, to_header_v1, to_header_v2
+
+# Layout of a .bin bitmap pack (all values little-endian):
+#   header   "BPK1", uint16 version, uint16 count
+#   entries  count x (uint32 offset, uint32 size, uint16 width, uint16 height, uint32 name_offset)
+#   names    NUL-terminated bitmap names, name_offset is relative to the start of the pack
+#   payloads bitmap_data of every bitmap (2 size bytes + pixels, or a version 2 header + pixels, see
+#            bitmap_header), each starting on an aligned offset
+# Offsets are from the start of the pack, so firmware can use bitmap_pack + offset directly.
+PACK_MAGIC = b'BPK1'
+PACK_VERSION = 1
+_PACK_HEADER = struct.Struct('<4sHH')
+_PACK_ENTRY = struct.Struct('<IIHHI')
+
+
+def _align(value, align):
+    return (value + align - 1) // align * align
+
+
+def build_bitmap_pack(bitmaps, align=4):
+    """Build the bytes of a bitmap pack.
+    bitmaps: list of tuples (var_name, width, height, bitmap_data)
+    Returns (pack_bytes, offsets) with the payload offset of every bitmap."""
+    names = bytearray()
+    name_offsets = []
+    names_start = _PACK_HEADER.size + _PACK_ENTRY.size * len(bitmaps)
+    for var_name, _, _, _ in bitmaps:
+        name_offsets.append(names_start + len(names))
+        names += var_name.replace('_bitmap_data', '').encode('ascii') + b'\0'
+
+    offsets = []
+    position = _align(names_start + len(names), align)
+    for _, _, _, bitmap_data in bitmaps:
+        offsets.append(position)
+        position = _align(position + len(bitmap_data), align)
+
+    pack = bytearray(position)
+    _PACK_HEADER.pack_into(pack, 0, PACK_MAGIC, PACK_VERSION, len(bitmaps))
+    for index, ((_, width, height, bitmap_data), offset, name_offset) in enumerate(zip(bitmaps, offsets, name_offsets)):
+        _PACK_ENTRY.pack_into(pack, _PACK_HEADER.size + index * _PACK_ENTRY.size,
+                              offset, len(bitmap_data), width, height, name_offset)
+        pack[offset:offset + len(bitmap_data)] = bitmap_data
+    pack[names_start:names_start + len(names)] = names
+
+    return bytes(pack), offsets
+
+
+def write_bitmap_pack(bitmaps, bin_file, header_file, asm_file=None, align=4, header_version=None):
+    """Write the raw payloads of bitmaps into one aligned .bin pack plus a small C header.
+    The header declares the pack as extern bitmap_pack[] and keeps NUM_BITMAPS and bitmap_array,
+    so existing drawing code works unchanged once the pack is linked in.
+    If asm_file is given, an assembler file that pulls the pack in with .incbin is written too.
+    bitmaps: list of tuples (var_name, width, height, bitmap_data)
+    header_version: 1 or 2 (see bitmap_header); None picks 2 only when a bitmap is larger than 255 pixels"""
+    header_version = header_version_for(bitmaps, header_version)
+    if header_version == 2:
+        bitmaps = [(var_name, width, height, to_header_v2(width, height, bitmap_data))
+                   for var_name, width, height, bitmap_data in bitmaps]
+    pack, offsets = build_bitmap_pack(bitmaps, align)
+
+    for path in (bin_file, header_file, asm_file):
+        out_dir = os.path.dirname(path) if path else ""
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+
+    with open(bin_file, 'wb') as f:
+        f.write(pack)
+
+    bin_name = os.path.basename(bin_file)
+    with open(header_file, 'w', newline='\n') as f:
+        f.write("#ifndef BITMAPS_H\n")
+        f.write("#define BITMAPS_H\n\n")
+        f.write("#include <stdint.h>\n\n")
+        f.write(f"// Bitmap data is stored in {bin_name} ({len(pack)} bytes) and linked in as bitmap_pack, either with\n")
+        f.write(f"//     .balign {align}\n")
+        f.write("//     bitmap_pack: .incbin \"" + bin_name + "\"\n")
+        f.write("// or with objcopy -I binary (then define bitmap_pack as the _binary_..._start symbol).\n")
+        f.write("// Each entry is the usual bitmap data: width, height, then one R3G3B2 byte per pixel.\n\n")
+        if header_version == 2:
+            f.write("// Bitmap data starts with a version 2 header: 0, 0, version, format, uint16 width, uint16 height\n")
+            f.write("#define BITMAP_HEADER_VERSION 2\n\n")
+
+        f.write(f"#define NUM_BITMAPS {len(bitmaps)}\n")
+        f.write(f"#define BITMAP_PACK_SIZE {len(pack)}\n\n")
+        f.write("extern const uint8_t bitmap_pack[];\n\n")
+
+        f.write("// Offset of every bitmap in bitmap_pack\n")
+        f.write("const uint32_t bitmap_offsets[NUM_BITMAPS] = {\n")
+        for i, ((var_name, width, height, _), offset) in enumerate(zip(bitmaps, offsets)):
+            name_base = var_name.replace('_bitmap_data', '')
+            separator = "," if i < len(bitmaps) - 1 else ""
+            f.write(f"    {offset}{separator}  // {name_base} ({width}x{height})\n")
+        f.write("};\n\n")
+
+        f.write("const uint16_t bitmap_widths[NUM_BITMAPS] = {")
+        f.write(", ".join(str(width) for _, width, _, _ in bitmaps))
+        f.write("};\n")
+        f.write("const uint16_t bitmap_heights[NUM_BITMAPS] = {")
+        f.write(", ".join(str(height) for _, _, height, _ in bitmaps))
+        f.write("};\n\n")
+
+        # Array of pointers to all bitmap data
+        f.write("// Array of pointers to all bitmap data\n")
+        f.write("const uint8_t* const bitmap_array[NUM_BITMAPS] = {\n")
+        for i, offset in enumerate(offsets):
+            separator = "," if i < len(offsets) - 1 else ""
+            f.write(f"    bitmap_pack + {offset}{separator}\n")
+        f.write("};\n\n")
+
+        f.write("#endif // BITMAPS_H\n")
+
+    if asm_file:
+        with open(asm_file, 'w', newline='\n') as f:
+            f.write(f"/* Links {bin_name} into flash as bitmap_pack (generated by png2bit) */\n")
+            f.write("    .section .rodata.bitmap_pack,\"a\"\n")
+            f.write(f"    .balign {align}\n")
+            f.write("    .global bitmap_pack\n")
+            f.write("bitmap_pack:\n")
+            f.write(f"    .incbin \"{bin_name}\"\n")
+            f.write("    .size bitmap_pack, . - bitmap_pack\n")
+
+    return len(pack)
+
+
+def load_bitmap_pack(bin_file):
+    """Memory-map a bitmap pack and return a list of tuples (var_name, width, height, bitmap_data).
+    bitmap_data are read-only memoryviews into the mapping, so nothing is copied until it is used;
+    only data with a version 2 header is copied, to the two size bytes every decoder reads."""
+    with open(bin_file, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, count = _PACK_HEADER.unpack_from(mapped, 0)
+    if magic != PACK_MAGIC:
+        raise ValueError(f"{bin_file} is not a bitmap pack")
+    if version != PACK_VERSION:
+        raise ValueError(f"Unsupported bitmap pack version {version}")
+
+    view = memoryview(mapped)
+    bitmaps = []
+    for index in range(count):
+        offset, size, width, height, name_offset = _PACK_ENTRY.unpack_from(mapped, _PACK_HEADER.size + index * _PACK_ENTRY.size)
+        name_end = mapped.find(b'\0', name_offset)
+        name = mapped[name_offset:name_end].decode('ascii')
+        bitmap_data = view[offset:offset + size]
+        if is_header_v2(bitmap_data):
+            bitmap_data = to_header_v1(bitmap_data)
+        bitmaps.append((f"{name}_bitmap_data", width, height, bitmap_data))
+    return bitmaps
@@ -0,0 +1,98 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Palette bitmap data: width & 0xFF, height & 0xFF, bits per pixel, palette size, the palette (R3G3B2 bytes),
+# then every row packed MSB first at bits per pixel, each row starting on a new byte.
+# 8 bits per pixel is the fallback for images with more than 16 colours: no palette, one R3G3B2 byte per pixel.
+PALETTE_DEPTHS = (1, 2, 4)
+PALETTE_HEADER = 4
+
+# Per-asset numbers for the palette report
+PaletteStats = namedtuple('PaletteStats', ['raw_bytes', 'encoded_bytes', 'colors', 'bpp'])
+
+
+def count_colors(pixels):
+    """Return the distinct R3G3B2 values of a pixel array, sorted, with one bincount over all pixels."""
+    return np.flatnonzero(np.bincount(pixels.ravel(), minlength=256))
+
+
+def smallest_depth(num_colors):
+    """Return the smallest palette depth that holds num_colors, or 8 when no palette depth does."""
+    for bpp in PALETTE_DEPTHS:
+        if num_colors <= 1 << bpp:
+            return bpp
+    return 8
+
+
+def pack_indices(indices, bpp):
+    """Pack a 2D array of palette indices into rows of bytes, MSB first. Returns the packed bytes."""
+    height, width = indices.shape
+    per_byte = 8 // bpp
+    row_bytes = -(-width // per_byte)
+
+    padded = np.zeros((height, row_bytes * per_byte), dtype=np.uint8)
+    padded[:, :width] = indices
+    # Shift every index to its place in the byte and add the per_byte indices of each byte together
+    shifts = np.arange(8 - bpp, -1, -bpp, dtype=np.uint8)
+    packed = (padded.reshape(height, row_bytes, per_byte) << shifts).sum(axis=2, dtype=np.uint8)
+    return packed.tobytes()
+
+
+def unpack_indices(packed, width, height, bpp):
+    """Unpack rows of MSB-first packed palette indices into a 2D array of shape (height, width)."""
+    per_byte = 8 // bpp
+    row_bytes = -(-width // per_byte)
+    data = np.frombuffer(bytes(packed[:row_bytes * height]), dtype=np.uint8)
+    if data.size != row_bytes * height:
+        raise ValueError(f"Packed pixel data has {data.size} bytes, expected {row_bytes * height}")
+
+    shifts = np.arange(8 - bpp, -1, -bpp, dtype=np.uint8)
+    indices = (data.reshape(height, row_bytes, 1) >> shifts) & ((1 << bpp) - 1)
+    return indices.reshape(height, row_bytes * per_byte)[:, :width]
+
+
+def palette_encode(width, height, bitmap_data):
+    """Encode raw bitmap data with the smallest lossless palette depth (1, 2 or 4 bpp), or 8 bpp without palette.
+    Returns (encoded, stats)."""
+    pixels = np.frombuffer(bytes(bitmap_data[2:2 + width * height]).ljust(width * height, b'\0'), dtype=np.uint8)
+    colors = count_colors(pixels)
+    bpp = smallest_depth(len(colors))
+
+    encoded = bytearray(bitmap_data[:2])
+    if bpp == 8:
+        encoded += bytes([8, 0])
+        encoded += pixels.tobytes()
+    else:
+        # Map every R3G3B2 value to its palette index with one table lookup
+        lookup = np.zeros(256, dtype=np.uint8)
+        lookup[colors] = np.arange(len(colors), dtype=np.uint8)
+        encoded += bytes([bpp, len(colors)])
+        encoded += colors.astype(np.uint8).tobytes()
+        encoded += pack_indices(lookup[pixels].reshape(height, width), bpp)
+
+    return encoded, PaletteStats(len(bitmap_data), len(encoded), len(colors), bpp)
+
+
+def palette_decode(width, height, encoded):
+    """Vectorized decoder: turn palette bitmap data back into raw bitmap data (2 size bytes + pixels)."""
+    bpp = encoded[2]
+    num_colors = encoded[3]
+    start = PALETTE_HEADER + num_colors
+
+    decoded = bytearray(encoded[:2])
+    if bpp == 8:
+        pixels = bytes(encoded[start:start + width * height])
+        if len(pixels) != width * height:
+            raise ValueError(f"8 bpp bitmap has {len(pixels)} pixels, expected {width * height}")
+        decoded += pixels
+        return decoded
+    if bpp not in PALETTE_DEPTHS:
+        raise ValueError(f"Unsupported palette depth {bpp}")
+
+    palette = np.frombuffer(bytes(encoded[PALETTE_HEADER:start]), dtype=np.uint8)
+    indices = unpack_indices(encoded[start:], width, height, bpp)
+    if indices.size and int(indices.max()) >= len(palette):
+        raise ValueError("Palette index outside the palette")
+    decoded += palette[indices].tobytes()
+    return decoded
@@ -0,0 +1,127 @@
+from collections import namedtuple
+
+import numpy as np
+
+# RLE bitmap data keeps the 2 size bytes and then holds one PackBits packet stream per row.
+# Packets never cross a row, so the decoder can write each row straight into the framebuffer.
+#   control 0..127    the next control + 1 bytes are literal pixels
+#   control 129..255  the next byte is repeated 257 - control times (2..128 pixels)
+#   control 128       never written
+_MAX_PACKET = 128
+
+# Rough Cortex-M4 cycle costs of API_draw_bitmap, only used for the report.
+# The raw loop calls UB_VGA_SetPixel for every pixel (call, two bounds checks, index multiply, store).
+# The RLE loop reads a control byte and branches once per packet, then copies literals (load + store)
+# and fills runs (store only) straight into VGA_RAM1.
+CYCLES_PER_PACKET = 6
+CYCLES_PER_LITERAL = 2
+CYCLES_PER_RUN_PIXEL = 1
+CYCLES_PER_RAW_PIXEL = 10
+
+# Per-asset numbers for the compression report
+RleStats = namedtuple('RleStats', ['raw_bytes', 'rle_bytes', 'packets', 'decode_cycles', 'raw_cycles'])
+
+
+def _find_runs(pixels, width):
+    """Return (starts, lengths) of the runs of equal values in pixels, a flat array of whole rows.
+    Every row starts a new run, so no run crosses a row."""
+    change = np.ones(pixels.size, dtype=bool)
+    change[1:] = pixels[1:] != pixels[:-1]
+    change[::width] = True
+    starts = np.flatnonzero(change)
+    lengths = np.diff(np.append(starts, pixels.size))
+    return starts, lengths
+
+
+def _write_literals(out, pixels, start, end):
+    """Write pixels[start:end] as literal packets. Returns the number of packets written."""
+    packets = 0
+    while start < end:
+        count = min(_MAX_PACKET, end - start)
+        out.append(count - 1)
+        out += pixels[start:start + count]
+        start += count
+        packets += 1
+    return packets
+
+
+def rle_encode(width, height, bitmap_data):
+    """Encode raw bitmap data (2 size bytes + one byte per pixel) as RLE bitmap data.
+    Returns (encoded, stats): the encoded bytearray and the RleStats of this bitmap."""
+    pixels = bytes(bitmap_data[2:2 + width * height]).ljust(width * height, b'\0')
+    out = bytearray(bitmap_data[:2])
+    packets = 0
+    run_pixels = 0
+
+    if not pixels:
+        return out, RleStats(len(bitmap_data), len(out), 0, 0, 0)
+
+    # Runs are found for the whole bitmap at once; only the (much shorter) run list is walked in Python
+    starts, lengths = _find_runs(np.frombuffer(pixels, dtype=np.uint8), width)
+
+    literal_start = None
+    for start, length in zip(starts.tolist(), lengths.tolist()):
+        if literal_start is not None and start % width == 0:
+            # Rows never share a packet
+            packets += _write_literals(out, pixels, literal_start, start)
+            literal_start = None
+
+        # A run of 2 only pays off when it does not split a literal packet
+        if length < 2 or (length == 2 and literal_start is not None):
+            if literal_start is None:
+                literal_start = start
+            continue
+
+        if literal_start is not None:
+            packets += _write_literals(out, pixels, literal_start, start)
+            literal_start = None
+
+        end = start + length
+        while end - start >= 2:
+            count = min(_MAX_PACKET, end - start)
+            out.append(257 - count)
+            out.append(pixels[start])
+            packets += 1
+            run_pixels += count
+            start += count
+        if start < end:
+            literal_start = start
+
+    if literal_start is not None:
+        packets += _write_literals(out, pixels, literal_start, len(pixels))
+
+    literal_pixels = len(pixels) - run_pixels
+    decode_cycles = (packets * CYCLES_PER_PACKET + literal_pixels * CYCLES_PER_LITERAL
+                     + run_pixels * CYCLES_PER_RUN_PIXEL)
+    stats = RleStats(len(bitmap_data), len(out), packets, decode_cycles, len(pixels) * CYCLES_PER_RAW_PIXEL)
+    return out, stats
+
+
+def rle_decode(width, height, encoded):
+    """Reference decoder: turn RLE bitmap data back into raw bitmap data (2 size bytes + pixels).
+    Follows the firmware decoder packet by packet and raises ValueError on a malformed stream."""
+    out = bytearray(encoded[:2])
+    position = 2
+    for row in range(height):
+        row_end = len(out) + width
+        while len(out) < row_end:
+            if position >= len(encoded):
+                raise ValueError(f"RLE data ends in row {row}")
+            control = encoded[position]
+            if control < 128:
+                count = control + 1
+                literals = encoded[position + 1:position + 1 + count]
+                if len(literals) < count:
+                    raise ValueError(f"RLE data ends in row {row}")
+                out += literals
+                position += 1 + count
+            elif control > 128:
+                if position + 1 >= len(encoded):
+                    raise ValueError(f"RLE data ends in row {row}")
+                out += bytes([encoded[position + 1]]) * (257 - control)
+                position += 2
+            else:
+                raise ValueError(f"Invalid RLE control byte 128 in row {row}")
+        if len(out) > row_end:
+            raise ValueError(f"RLE packet crosses the end of row {row}")
+    return out
@@ -0,0 +1,98 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Span bitmap data: width & 0xFF, height & 0xFF, transparent colour, 0 (padding), then
+#   row index  height + 1 little-endian uint16: the spans of row y are span row_index[y] .. row_index[y + 1] - 1
+#   spans      per opaque span uint16 x, uint16 length, uint32 payload offset (little-endian)
+#   payload    the opaque pixels only, row by row
+# Transparent pixels are the pixels of the transparent colour; they have no payload and are never drawn.
+SPAN_HEADER = 4
+SPAN_DTYPE = np.dtype([('x', '<u2'), ('length', '<u2'), ('offset', '<u4')])
+
+# Magenta (R3G3B2 0xE3) is the transparent colour unless another one is given
+DEFAULT_TRANSPARENT = 0xE3
+
+# Per-asset numbers for the span report
+SpanStats = namedtuple('SpanStats', ['raw_bytes', 'span_bytes', 'spans', 'opaque_pixels'])
+
+
+def _pixels(width, height, bitmap_data):
+    pixels = bytes(bitmap_data[2:2 + width * height]).ljust(width * height, b'\0')
+    return np.frombuffer(pixels, dtype=np.uint8).reshape(height, width)
+
+
+def find_spans(opaque):
+    """Return (rows, starts, lengths) of the opaque runs of a 2D bool array, row by row and left to right."""
+    height, width = opaque.shape
+    edges = np.zeros((height, width + 2), dtype=np.int8)
+    edges[:, 1:-1] = opaque
+    edges = np.diff(edges, axis=1)
+    # Starts and ends come out in the same row-major order, so they pair up
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends - starts
+
+
+def spans_encode(width, height, bitmap_data, transparent=DEFAULT_TRANSPARENT):
+    """Encode raw bitmap data as opaque span tables; pixels of colour transparent are skipped.
+    Returns (encoded, stats)."""
+    pixels = _pixels(width, height, bitmap_data)
+    opaque = pixels != transparent
+    rows, starts, lengths = find_spans(opaque)
+    if len(rows) > 0xFFFF:
+        raise ValueError(f"{len(rows)} opaque spans do not fit the uint16 row index")
+
+    row_index = np.zeros(height + 1, dtype='<u2')
+    row_index[1:] = np.cumsum(np.bincount(rows, minlength=height))
+
+    spans = np.zeros(len(rows), dtype=SPAN_DTYPE)
+    spans['x'] = starts
+    spans['length'] = lengths
+    spans['offset'][1:] = np.cumsum(lengths)[:-1]
+
+    encoded = bytearray(bitmap_data[:2])
+    encoded += bytes([transparent, 0])
+    encoded += row_index.tobytes()
+    encoded += spans.tobytes()
+    encoded += pixels[opaque].tobytes()
+    return encoded, SpanStats(len(bitmap_data), len(encoded), len(rows), int(lengths.sum()))
+
+
+def walk_spans(width, height, encoded):
+    """Walk the span tables like the firmware renderer: yield (y, x, pixels) for every opaque span in order."""
+    row_index = np.frombuffer(bytes(encoded[SPAN_HEADER:SPAN_HEADER + 2 * (height + 1)]), dtype='<u2')
+    if row_index.size != height + 1:
+        raise ValueError("Span data ends inside the row index")
+    spans_start = SPAN_HEADER + 2 * (height + 1)
+    payload_start = spans_start + SPAN_DTYPE.itemsize * int(row_index[-1])
+    spans = np.frombuffer(bytes(encoded[spans_start:payload_start]), dtype=SPAN_DTYPE)
+    if spans.size != row_index[-1]:
+        raise ValueError("Span data ends inside the span table")
+
+    for y in range(height):
+        for x, length, offset in spans[row_index[y]:row_index[y + 1]].tolist():
+            if x + length > width:
+                raise ValueError(f"Span {x}+{length} in row {y} is outside the bitmap")
+            start = payload_start + offset
+            pixels = encoded[start:start + length]
+            if len(pixels) != length:
+                raise ValueError(f"Span payload of row {y} is outside the bitmap data")
+            yield y, x, pixels
+
+
+def spans_decode(width, height, encoded):
+    """Preview decoder: turn span bitmap data back into raw bitmap data (2 size bytes + pixels)
+    with the transparent colour in every pixel that is not drawn."""
+    frame = np.full((height, width), encoded[2], dtype=np.uint8)
+    for y, x, pixels in walk_spans(width, height, encoded):
+        frame[y, x:x + len(pixels)] = np.frombuffer(bytes(pixels), dtype=np.uint8)
+    return bytearray(encoded[:2]) + frame.tobytes()
+
+
+def verify_spans(width, height, bitmap_data, encoded):
+    """Walk the span tables of encoded and compare the result to the source bitmap_data.
+    Returns the list of rows that differ."""
+    source = _pixels(width, height, bitmap_data)
+    drawn = _pixels(width, height, spans_decode(width, height, encoded))
+    return np.flatnonzero((source != drawn).any(axis=1)).tolist()
@@ -0,0 +1,107 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Tile map bitmap data: width & 0xFF, height & 0xFF, tile size, tiles per row, then one little-endian
+# uint16 index into the shared tile dictionary per tile, row by row.
+# The dictionary holds tile_size * tile_size pixels per tile. Tiles on the right and bottom edge are
+# padded with 0 up to a full tile; the decoder only copies the part inside the bitmap.
+TILE_SIZE = 8
+TILE_MAP_HEADER = 4
+MAX_TILES = 0x10000
+
+# Per-asset numbers for the dedupe report
+# tiles: tiles in this bitmap, new_tiles: tiles this bitmap added to the dictionary
+TileStats = namedtuple('TileStats', ['raw_bytes', 'map_bytes', 'tiles', 'new_tiles'])
+
+
+def _bitmap_tiles(width, height, bitmap_data, tile_size):
+    """Cut raw bitmap data into tiles. Returns (tiles_x, tiles_y, tiles) with tiles shaped (count, tile_size ** 2)."""
+    tiles_x = -(-width // tile_size)
+    tiles_y = -(-height // tile_size)
+
+    pixels = np.frombuffer(bytes(bitmap_data[2:2 + width * height]).ljust(width * height, b'\0'), dtype=np.uint8)
+    padded = np.zeros((tiles_y * tile_size, tiles_x * tile_size), dtype=np.uint8)
+    padded[:height, :width] = pixels.reshape(height, width)
+
+    # (rows of tiles, row in tile, tiles in row, column in tile) -> one flat tile per row
+    tiles = padded.reshape(tiles_y, tile_size, tiles_x, tile_size).transpose(0, 2, 1, 3)
+    return tiles_x, tiles_y, tiles.reshape(tiles_x * tiles_y, tile_size * tile_size)
+
+
+def build_tile_dictionary(bitmaps, tile_size=TILE_SIZE):
+    """Cut every bitmap into tile_size x tile_size tiles and deduplicate them into one shared dictionary.
+    bitmaps: list of tuples (var_name, width, height, bitmap_data) with raw bitmap_data
+    Returns (dictionary, tile_maps, stats): dictionary is the bytes of all unique tiles in order of first use,
+    tile_maps the tile map bitmap data of every bitmap and stats a TileStats per bitmap."""
+    if not 1 <= tile_size <= 255:
+        raise ValueError(f"Tile size must be between 1 and 255, not {tile_size}")
+
+    cut = [_bitmap_tiles(width, height, bitmap_data, tile_size) for _, width, height, bitmap_data in bitmaps]
+    for (var_name, _, _, _), (tiles_x, _, _) in zip(bitmaps, cut):
+        if tiles_x > 255:
+            raise ValueError(f"{var_name} is too wide for {tile_size}px tiles")
+
+    tile_bytes = tile_size * tile_size
+    if cut:
+        all_tiles = np.concatenate([tiles for _, _, tiles in cut])
+    else:
+        all_tiles = np.zeros((0, tile_bytes), dtype=np.uint8)
+
+    # Every tile as one opaque value, so np.unique compares whole tiles in a single vectorized pass
+    keys = np.ascontiguousarray(all_tiles).view(np.dtype((np.void, tile_bytes))).ravel()
+    _, first_use, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    if len(first_use) > MAX_TILES:
+        raise ValueError(f"{len(first_use)} unique tiles do not fit in 16-bit tile indices")
+
+    # np.unique sorts the tiles by value; renumber them in order of first use instead
+    order = np.argsort(first_use, kind='stable')
+    renumber = np.empty(len(order), dtype=np.uint16)
+    renumber[order] = np.arange(len(order), dtype=np.uint16)
+    indices = renumber[inverse.ravel()]
+    dictionary = all_tiles[first_use[order]].tobytes()
+
+    tile_maps = []
+    stats = []
+    start = 0
+    seen = 0
+    for (_, width, height, bitmap_data), (tiles_x, tiles_y, tiles) in zip(bitmaps, cut):
+        bitmap_indices = indices[start:start + len(tiles)]
+        start += len(tiles)
+
+        tile_map = bytearray([width & 0xFF, height & 0xFF, tile_size, tiles_x])
+        tile_map += bitmap_indices.astype('<u2').tobytes()
+        tile_maps.append(tile_map)
+
+        # Indices are numbered by first use, so the new tiles of a bitmap are those above every earlier index
+        newest = int(bitmap_indices.max()) + 1 if len(bitmap_indices) else seen
+        stats.append(TileStats(len(bitmap_data), len(tile_map), len(tiles), max(0, newest - seen)))
+        seen = max(seen, newest)
+
+    return dictionary, tile_maps, stats
+
+
+def tile_map_to_bitmap_data(width, height, tile_map, dictionary):
+    """Vectorized decoder: rebuild raw bitmap data (2 size bytes + pixels) from tile map bitmap data
+    and the shared tile dictionary."""
+    tile_size = tile_map[2]
+    tiles_x = tile_map[3]
+    tiles_y = -(-height // tile_size) if tile_size else 0
+    if tile_size == 0 or tiles_x * tile_size < width:
+        raise ValueError("Tile map does not cover the bitmap width")
+
+    indices = np.frombuffer(bytes(tile_map[TILE_MAP_HEADER:]), dtype='<u2')
+    if len(indices) != tiles_x * tiles_y:
+        raise ValueError(f"Tile map has {len(indices)} tiles, expected {tiles_x * tiles_y}")
+
+    tiles = np.frombuffer(bytes(dictionary), dtype=np.uint8).reshape(-1, tile_size * tile_size)
+    if len(indices) and int(indices.max()) >= len(tiles):
+        raise ValueError("Tile map refers to a tile outside the dictionary")
+
+    # Gather every tile at once, then lay the tiles back out as rows of pixels
+    pixels = tiles[indices].reshape(tiles_y, tiles_x, tile_size, tile_size).transpose(0, 2, 1, 3)
+    pixels = pixels.reshape(tiles_y * tile_size, tiles_x * tile_size)[:height, :width]
+
+    bitmap_data = bytearray(tile_map[:2])
+    bitmap_data += pixels.tobytes()
+    return bitmap_data
@@ -0,0 +1,104 @@
+import hashlib
+
+import numpy as np
+
+# Transforms a bitmap can be stored as, by descriptor value. For a source of W x H pixels, pixel (x, y)
+# of the drawn bitmap comes from source pixel:
+#   0 none           (x, y)
+#   1 flip_h         (W-1-x, y)
+#   2 flip_v         (x, H-1-y)
+#   3 rotate_180     (W-1-x, H-1-y)
+#   4 rotate_90      (y, H-1-x)        clockwise, drawn H x W
+#   5 rotate_270     (W-1-y, x)        drawn H x W
+#   6 transpose      (y, x)            drawn H x W
+#   7 antitranspose  (W-1-y, H-1-x)    drawn H x W
+#   8 copy           (x, y)            exact copy of the source
+# 0 means the bitmap is stored itself, so an exact copy has its own value.
+TRANSFORM_NAMES = ('none', 'flip_h', 'flip_v', 'rotate_180', 'rotate_90', 'rotate_270', 'transpose', 'antitranspose', 'copy')
+COPY = 8
+
+# Transform descriptor bitmap data: width & 0xFF, height & 0xFF (as drawn), transform,
+# then the little-endian uint16 index of the stored source bitmap
+DESCRIPTOR_SIZE = 5
+
+
+def apply_transform(pixels, transform):
+    """Return the 2D pixel array pixels (rows of the source) as drawn with transform."""
+    if transform in (0, COPY):
+        return pixels
+    if transform == 1:
+        return pixels[:, ::-1]
+    if transform == 2:
+        return pixels[::-1, :]
+    if transform == 3:
+        return pixels[::-1, ::-1]
+    if transform == 4:
+        return np.rot90(pixels, -1)
+    if transform == 5:
+        return np.rot90(pixels, 1)
+    if transform == 6:
+        return pixels.T
+    if transform == 7:
+        return pixels[::-1, ::-1].T
+    raise ValueError(f"Unknown bitmap transform {transform}")
+
+
+def _pixels(width, height, bitmap_data):
+    pixels = bytes(bitmap_data[2:2 + width * height]).ljust(width * height, b'\0')
+    return np.frombuffer(pixels, dtype=np.uint8).reshape(height, width)
+
+
+def _digest(pixels):
+    """Hash of a 2D pixel array, including its shape so a 4x6 and a 6x4 bitmap never collide."""
+    digest = hashlib.sha1(f"{pixels.shape[1]}x{pixels.shape[0]};".encode())
+    digest.update(np.ascontiguousarray(pixels).tobytes())
+    return digest.digest()
+
+
+def find_transformed_duplicates(bitmaps):
+    """Find bitmaps that are an exact copy, flip or 90-degree rotation of an earlier bitmap.
+    bitmaps: list of tuples (var_name, width, height, bitmap_data) with raw bitmap_data
+    Returns a list with (source_index, transform) for every duplicate and None for every bitmap that is stored.
+    Every stored bitmap hashes its 8 variants once, every other bitmap is looked up with one hash,
+    and a hash hit is confirmed by comparing the pixels."""
+    variants = {}
+    duplicates = []
+    stored = {}
+    for index, (_, width, height, bitmap_data) in enumerate(bitmaps):
+        pixels = _pixels(width, height, bitmap_data)
+
+        match = variants.get(_digest(pixels))
+        if match is not None:
+            source_index, transform = match
+            if np.array_equal(apply_transform(stored[source_index], transform), pixels):
+                duplicates.append(match)
+                continue
+
+        duplicates.append(None)
+        stored[index] = pixels
+        # Exact copies first, so a symmetric bitmap is matched as a copy rather than as its own flip
+        for transform in (COPY, *range(1, COPY)):
+            variants.setdefault(_digest(apply_transform(pixels, transform)), (index, transform))
+    return duplicates
+
+
+def transform_descriptor(width, height, source_index, transform):
+    """Return the bitmap data that draws bitmap source_index with transform (width, height as drawn)."""
+    return bytearray([width & 0xFF, height & 0xFF, transform, source_index & 0xFF, source_index >> 8])
+
+
+def expand_descriptor(descriptor, bitmaps):
+    """Rebuild the raw bitmap data a transform descriptor draws.
+    bitmaps: the bitmaps before it, as (var_name, width, height, bitmap_data) tuples with raw bitmap_data"""
+    if len(descriptor) != DESCRIPTOR_SIZE:
+        raise ValueError(f"Transform descriptor has {len(descriptor)} bytes, expected {DESCRIPTOR_SIZE}")
+    transform = descriptor[2]
+    source_index = descriptor[3] | (descriptor[4] << 8)
+    if source_index >= len(bitmaps):
+        raise ValueError(f"Transform descriptor refers to bitmap {source_index}, which comes after it")
+
+    _, width, height, bitmap_data = bitmaps[source_index]
+    pixels = apply_transform(_pixels(width, height, bitmap_data), transform)
+    expanded = bytearray(descriptor[:2])
+    expanded += np.ascontiguousarray(pixels).tobytes()
+    return expanded
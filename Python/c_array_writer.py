@@ -0,0 +1,82 @@
+import time
+
+
+def format_hex_rows(data, bytes_per_line=16):
+    """Format bytes as the body of a C array: "    0x00, 0x01, ..." with bytes_per_line values per line.
+    The layout matches the per-byte writers exactly: every line but the last ends with ", " and a newline,
+    the last value has no separator and the last line only ends with a newline when it is full.
+    Callers write the opening "{" and the closing "};" themselves."""
+    data = bytes(data)
+    if not data:
+        return ""
+
+    # "AA BB CC" -> "0xAA, 0xBB, 0xCC", every value takes 6 characters including its ", "
+    values = "0x" + data.hex(' ').upper().replace(' ', ', 0x')
+    row_chars = bytes_per_line * 6
+    body = "".join(
+        "    " + values[start:start + row_chars] + "\n"
+        for start in range(0, len(values), row_chars)
+    )
+
+    if len(data) % bytes_per_line != 0:
+        body = body[:-1]
+    return body
+
+
+def write_hex_rows(f, data, bytes_per_line=16):
+    """Write the body of a C array to f with a single write call."""
+    f.write(format_hex_rows(data, bytes_per_line))
+
+
+def _write_hex_per_byte(f, data):
+    """Original writer loop: one write per value and per separator. Kept as the benchmark reference."""
+    for i, byte in enumerate(data):
+        if i % 16 == 0:
+            f.write("    ")
+        f.write(f"0x{byte:02X}")
+        if i < len(data) - 1:
+            f.write(", ")
+        if (i + 1) % 16 == 0:
+            f.write("\n")
+
+
+def benchmark(num_bytes=200000, repeats=5):
+    """Compare format_hex_rows against the per-byte loop on random data written to a temp file.
+    Returns (per_byte_seconds, bulk_seconds) as the best of repeats runs."""
+    import io
+    import os
+    import tempfile
+
+    data = bytearray(os.urandom(num_bytes))
+
+    # Both writers must produce the same text before timing them
+    reference = io.StringIO()
+    _write_hex_per_byte(reference, data)
+    if reference.getvalue() != format_hex_rows(data):
+        raise AssertionError("format_hex_rows output differs from the per-byte writer")
+
+    def best_time(writer):
+        best = None
+        for _ in range(repeats):
+            with tempfile.TemporaryFile('w', newline='\n') as f:
+                start = time.perf_counter()
+                writer(f, data)
+                f.flush()
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    return best_time(_write_hex_per_byte), best_time(write_hex_rows)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark the bulk C array writer against the per-byte loop")
+    parser.add_argument('--bytes', type=int, default=200000, help='Number of bytes to format')
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per writer (best time is reported)')
+    args = parser.parse_args()
+
+    per_byte, bulk = benchmark(args.bytes, args.repeats)
+    print(f"{args.bytes} bytes")
+    print(f"  per-byte loop: {per_byte * 1000:8.2f} ms")
+    print(f"  bulk rows:     {bulk * 1000:8.2f} ms  ({per_byte / max(bulk, 1e-9):.1f}x faster)")
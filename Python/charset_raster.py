@@ -0,0 +1,247 @@
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from c_array_writer import write_hex_rows
+
+# Printable ASCII characters of a charset (32-126)
+CHARSET_CODES = range(32, 127)
+
+# Fonts stay loaded between calls; a charset or a folder of charsets loads every path and size once
+FONT_CACHE_SIZE = 32
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def load_font(font_name=None, font_size=20, fallback=True):
+    """Return the font for a font file path and size, or the default font when font_name is None
+    or can not be loaded. With fallback=False a font file that can not be loaded raises instead.
+    Cached per (font_name, font_size, fallback)."""
+    try:
+        if font_name:
+            return ImageFont.truetype(font_name, font_size)
+        return ImageFont.load_default()
+    except Exception:
+        if not fallback:
+            raise
+        return ImageFont.load_default()
+
+
+def glyph_metrics(font_size=20, font_name=None, fallback=True):
+    """Measure every charset character once without rendering it.
+    Returns {ascii_code: (left, top, right, bottom)}, the same boxes text_to_bitmap measures."""
+    font = load_font(font_name, font_size, fallback)
+    return {ascii_code: font.getbbox(chr(ascii_code)) for ascii_code in CHARSET_CODES}
+
+
+def charset_fixed_size(metrics, padding, uniform_height, monospace):
+    """Return (fixed_width, fixed_height) for text_to_bitmap from glyph_metrics: the largest padded glyph
+    width for a monospace charset and the largest padded glyph height for a uniform height, None otherwise."""
+    max_width = max(right - left for left, _, right, _ in metrics.values()) + padding * 2
+    max_height = max(bottom - top for _, top, _, bottom in metrics.values()) + padding * 2
+    return (max_width if monospace else None), (max_height if uniform_height else None)
+
+
+def glyph_placement(bbox, padding, fixed_width=None, fixed_height=None):
+    """Cell size and text position of one glyph (or text) with bounding box bbox.
+    Returns (width, height, x_pos, y_pos): with a fixed size the text is centred horizontally and its
+    bottom (descenders included) sits on the bottom edge, otherwise it gets padding on every side."""
+    left, top, right, bottom = bbox
+    text_width = right - left
+    text_height = bottom - top
+    width = fixed_width if fixed_width is not None else text_width + padding * 2
+    height = fixed_height if fixed_height is not None else text_height + padding * 2
+    if fixed_width is not None or fixed_height is not None:
+        return width, height, (width - text_width) // 2 - left, height - bottom
+    return width, height, padding - left, padding - top
+
+
+def render_charset(font_size=20, font_name=None, padding=2, uniform_height=True, monospace=False, fallback=True):
+    """Rasterize the whole charset of a font and size in one draw pass.
+    All glyphs are drawn side by side onto one 1-bit strip image, every cell is sliced out of it as an array
+    view and packed with numpy.packbits (MSB first, every row starting on a new byte).
+    fallback: see load_font.
+    Returns (char_index_table, bitmap_data): (ascii_code, width, height, offset) per character and the
+    packed data of all characters, the ascii_char_index and ascii_bitmap_data of a charset header."""
+    font = load_font(font_name, font_size, fallback)
+    metrics = glyph_metrics(font_size, font_name, fallback)
+    fixed_width, fixed_height = charset_fixed_size(metrics, padding, uniform_height, monospace)
+    placements = [glyph_placement(metrics[ascii_code], padding, fixed_width, fixed_height)
+                  for ascii_code in CHARSET_CODES]
+
+    # Cells are separated by a gutter, so ink that the rasterizer puts outside a glyph's box is clipped
+    # away like it is on a glyph's own image instead of landing in the next cell
+    gutter = max(8, font_size)
+    cell_x = np.cumsum([0] + [width + gutter for width, _, _, _ in placements])[:-1] + gutter
+    strip_width = int(cell_x[-1]) + placements[-1][0] + gutter
+    strip_height = max(height for _, height, _, _ in placements) + gutter * 2
+
+    strip = Image.new('1', (strip_width, strip_height), 0)
+    draw = ImageDraw.Draw(strip)
+    for ascii_code, x, (_, _, x_pos, y_pos) in zip(CHARSET_CODES, cell_x.tolist(), placements):
+        draw.text((x + x_pos, gutter + y_pos), chr(ascii_code), font=font, fill=1)
+    pixels = np.asarray(strip)
+
+    char_index_table = []
+    packed = []
+    offset = 0
+    for ascii_code, x, (width, height, _, _) in zip(CHARSET_CODES, cell_x.tolist(), placements):
+        cell = np.packbits(pixels[gutter:gutter + height, x:x + width], axis=1)
+        char_index_table.append((ascii_code, width, height, offset))
+        packed.append(cell.tobytes())
+        offset += cell.size
+    return char_index_table, b''.join(packed)
+
+
+def write_charset_header(output_file, font_name, font_size, char_index_table, bitmap_data):
+    """Write a charset from render_charset to a C header of the TTF converters.
+    font_name is the font file name shown in the header comment."""
+    with open(output_file, 'w', newline='\n') as f:
+        f.write("#ifndef ASCII_CHARSET_H\n")
+        f.write("#define ASCII_CHARSET_H\n\n")
+        f.write("#include <stdint.h>\n\n")
+        f.write(f"// ASCII Character Set from {font_name} (Size: {font_size}px)\n")
+        f.write(f"// All characters (ASCII 32-126) stored in single array\n")
+        f.write(f"// Total characters: {len(char_index_table)}\n\n")
+
+        # Write character index table
+        f.write("// Character Index Table: [ASCII code, width, height, offset in data array]\n")
+        f.write(f"const uint16_t ascii_char_index[{len(char_index_table)}][4] = {{\n")
+        for i, (ascii_code, width, height, offset) in enumerate(char_index_table):
+            f.write(f"    {{{ascii_code}, {width}, {height}, {offset}}}")
+            if i < len(char_index_table) - 1:
+                f.write(",")
+            # Add character as comment
+            if ascii_code == 32:
+                f.write(f"  // SPACE\n")
+            else:
+                f.write(f"  // '{chr(ascii_code)}'\n")
+        f.write("};\n\n")
+
+        # Write all bitmap data in single array
+        f.write(f"// Bitmap data for all characters (1-bit monochrome)\n")
+        f.write(f"const uint8_t ascii_bitmap_data[{len(bitmap_data)}] = {{\n")
+
+        write_hex_rows(f, bitmap_data)
+        if len(bitmap_data) % 16 != 0:
+            f.write("\n")
+        f.write("};\n\n")
+        f.write("#endif // ASCII_CHARSET_H\n")
+
+
+def charset_file_name(ttf_path, font_size):
+    """Header file name of a font and size: "Arial.ttf" at 16 -> "Arial_size16.h"."""
+    return f"{os.path.splitext(os.path.basename(ttf_path))[0]}_size{font_size}.h"
+
+
+def convert_ttf_charset(ttf_path, font_size, output_dir, padding=2, uniform_height=True, monospace=False):
+    """Rasterize one font file at one size and write its charset header to output_dir.
+    A font file that can not be loaded raises instead of falling back to the default font.
+    Returns the path of the written header. Module-level so run_parallel can send it to the worker processes."""
+    char_index_table, bitmap_data = render_charset(font_size, ttf_path, padding, uniform_height, monospace,
+                                                   fallback=False)
+    output_file = os.path.join(output_dir, charset_file_name(ttf_path, font_size))
+    write_charset_header(output_file, os.path.basename(ttf_path), font_size, char_index_table, bitmap_data)
+    return output_file
+
+
+def _text_to_bitmap_per_glyph(text, font_size, font_name, padding, fixed_width=None, fixed_height=None):
+    """Original TekstBitGen.text_to_bitmap: loads the font, measures the text on a scratch image with
+    textbbox, draws it on its own 1-bit image and packs it with a bit loop per pixel.
+    Returns (width, height, packed data)."""
+    try:
+        font = ImageFont.truetype(font_name, font_size) if font_name else ImageFont.load_default()
+    except Exception:
+        font = ImageFont.load_default()
+    bbox = ImageDraw.Draw(Image.new('RGB', (1, 1))).textbbox((0, 0), text, font=font)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+    width = fixed_width if fixed_width is not None else text_width + padding * 2
+    height = fixed_height if fixed_height is not None else text_height + padding * 2
+
+    img = Image.new('1', (width, height), 0)
+    if fixed_width is not None or fixed_height is not None:
+        x_pos, y_pos = (width - text_width) // 2 - bbox[0], height - bbox[3]
+    else:
+        x_pos, y_pos = padding - bbox[0], padding - bbox[1]
+    ImageDraw.Draw(img).text((x_pos, y_pos), text, font=font, fill=1)
+
+    bitmap_data = []
+    pixels = img.load()
+    for y in range(height):
+        for x in range(0, width, 8):
+            byte = 0
+            for bit in range(8):
+                if x + bit < width and pixels[x + bit, y]:
+                    byte |= 1 << (7 - bit)
+            bitmap_data.append(byte)
+    return width, height, bitmap_data
+
+
+def _render_charset_per_glyph(font_size=20, font_name=None, padding=2, uniform_height=True, monospace=False):
+    """Original charset converter loop, kept as the benchmark reference: a first pass renders every glyph to
+    find the largest one, a second pass renders every glyph again at the fixed size, each through
+    _text_to_bitmap_per_glyph with its own font load."""
+    max_width = 0
+    max_height = 0
+    if uniform_height or monospace:
+        for ascii_code in CHARSET_CODES:
+            width, height, _ = _text_to_bitmap_per_glyph(chr(ascii_code), font_size, font_name, padding)
+            max_width = max(max_width, width)
+            max_height = max(max_height, height)
+    fixed_width = max_width if monospace else None
+    fixed_height = max_height if uniform_height else None
+
+    char_index_table = []
+    bitmap_data = []
+    for ascii_code in CHARSET_CODES:
+        width, height, data = _text_to_bitmap_per_glyph(chr(ascii_code), font_size, font_name, padding,
+                                                        fixed_width, fixed_height)
+        char_index_table.append((ascii_code, width, height, len(bitmap_data)))
+        bitmap_data.extend(data)
+    return char_index_table, bytes(bitmap_data)
+
+
+def benchmark(font_files, font_sizes=(8, 16, 24, 48), padding=2, repeats=3):
+    """Compare render_charset against the per-glyph reference for every font file and size, with uniform
+    height and with monospace. Returns (per_glyph_seconds, strip_seconds) as the best of repeats runs."""
+    jobs = [(font_size, font_file, padding, True, monospace)
+            for font_file in font_files for font_size in font_sizes for monospace in (False, True)]
+
+    # Both rasterizers must produce the same charsets before timing them
+    for job in jobs:
+        if render_charset(*job) != _render_charset_per_glyph(*job):
+            raise AssertionError(f"render_charset output differs from the per-glyph reference for {job}")
+
+    def best_time(render):
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for job in jobs:
+                render(*job)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    return best_time(_render_charset_per_glyph), best_time(render_charset)
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+    parser = argparse.ArgumentParser(description="Benchmark the one-pass charset rasterizer against the per-glyph one")
+    parser.add_argument('fonts', nargs='*', help='Font files (default: TFF/*.ttf next to this script)')
+    parser.add_argument('--sizes', default='8,16,24,48', help='Comma-separated font sizes')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per rasterizer (best time is reported)')
+    args = parser.parse_args()
+
+    font_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'TFF')
+    fonts = args.fonts or sorted(path for path in glob.glob(os.path.join(font_dir, '*'))
+                                 if path.lower().endswith('.ttf'))
+    sizes = tuple(int(size) for size in args.sizes.split(','))
+    per_glyph, strip = benchmark(fonts, sizes, repeats=args.repeats)
+    print(f"{len(fonts)} font(s) x {len(sizes)} size(s) x 2 layouts, identical output")
+    print(f"  per-glyph images: {per_glyph * 1000:8.2f} ms")
+    print(f"  one strip:        {strip * 1000:8.2f} ms  ({per_glyph / max(strip, 1e-9):.1f}x faster)")
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import tempfile
+
+# Cache location can be moved with the PNG2BIT_CACHE_DIR environment variable
+DEFAULT_CACHE_DIR = os.environ.get('PNG2BIT_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'png2bit')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Bump when the layout of cached entries changes so old entries are never read back
+CACHE_VERSION = 1
+
+_ENTRY_SUFFIX = '.bin'
+
+# Eviction frees the cache down to this fraction of max_bytes, so a full cache is not scanned again on the next put
+EVICT_TO = 0.9
+
+# Bytes per cache directory as far as this process knows: counted once on the first put, then kept up to date
+# by cache_put and eviction. Other worker processes write too, so it is a lower bound that eviction corrects.
+_cache_totals = {}
+
+
+def cache_key(source_bytes, params):
+    """Return the hex key for a source file's bytes plus the conversion parameters (a dict)."""
+    digest = hashlib.sha256()
+    digest.update(f"v{CACHE_VERSION};".encode())
+    for name in sorted(params):
+        digest.update(f"{name}={params[name]};".encode())
+    digest.update(source_bytes)
+    return digest.hexdigest()
+
+
+def _entry_path(key, cache_dir):
+    return os.path.join(cache_dir, key + _ENTRY_SUFFIX)
+
+
+def cache_get(key, cache_dir=None):
+    """Return the cached payload for key, or None on a miss.
+    A hit refreshes the entry's modification time, which is what eviction orders by."""
+    path = _entry_path(key, cache_dir or DEFAULT_CACHE_DIR)
+    try:
+        with open(path, 'rb') as f:
+            payload = f.read()
+        os.utime(path)
+        return payload
+    except OSError:
+        return None
+
+
+def cache_put(key, payload, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+    """Store payload under key, then evict the least recently used entries once the cache is above max_bytes.
+    Only the first put of a process scans the cache directory; after that the scan only runs when the
+    running total crosses max_bytes. Writes go through a temp file and os.replace so parallel workers never
+    see half an entry."""
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    if cache_dir not in _cache_totals:
+        _cache_totals[cache_dir] = sum(size for _, size, _ in _entries(cache_dir))
+
+    path = _entry_path(key, cache_dir)
+    try:
+        replaced = os.path.getsize(path)
+    except OSError:
+        replaced = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    _cache_totals[cache_dir] += len(payload) - replaced
+    if _cache_totals[cache_dir] > max_bytes:
+        _evict(cache_dir, int(max_bytes * EVICT_TO))
+
+
+def _entries(cache_dir):
+    """Return (mtime, size, path) for every cache entry."""
+    entries = []
+    try:
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(_ENTRY_SUFFIX):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def _evict(cache_dir, max_bytes):
+    """Remove least recently used entries until the cache is at most max_bytes and record the bytes left.
+    Returns the number removed."""
+    entries = _entries(cache_dir)
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    _cache_totals[cache_dir] = total
+    return removed
+
+
+def evict_cache(cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+    """Remove least recently used entries until the cache is at most max_bytes. Returns the number removed."""
+    return _evict(cache_dir or DEFAULT_CACHE_DIR, max_bytes)
+
+
+def purge_cache(cache_dir=None):
+    """Remove every cache entry. Returns the number of entries removed."""
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    _cache_totals.pop(cache_dir, None)
+    removed = 0
+    for _, _, path in _entries(cache_dir):
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
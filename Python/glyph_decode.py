@@ -0,0 +1,162 @@
+import numpy as np
+
+# 1-bit glyph data: every row starts on a new byte, pixels MSB first, 1 = ink.
+# The charset viewers show glyphs white on black and sample text black on white.
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+# Stand-in for a character that is not in the charset
+MISSING_COLOR = (255, 200, 200)
+
+
+def row_stride(width):
+    """Bytes per glyph row."""
+    return (width + 7) // 8
+
+
+def unpack_glyph(data, width, height, offset=0, stride=None):
+    """Return the pixels of one glyph as a (height, width) bool array.
+    data: packed glyph bytes starting at offset, stride bytes per row (row_stride(width) by default).
+    Data that ends early reads as 0."""
+    stride = row_stride(width) if stride is None else stride
+    packed = np.frombuffer(bytes(data[offset:offset + stride * height]), dtype=np.uint8)
+    if packed.size < stride * height:
+        packed = np.concatenate((packed, np.zeros(stride * height - packed.size, dtype=np.uint8)))
+    return np.unpackbits(packed.reshape(height, stride), axis=1, count=width).view(bool)
+
+
+def unpack_charset(bitmap_data, char_specs):
+    """Unpack a whole charset in one go: one unpackbits over the data, then a view per glyph.
+    char_specs: (ascii_code, width, height, offset) rows of the character index table.
+    Returns {ascii_code: (height, width) bool array}."""
+    packed = np.frombuffer(bytes(bitmap_data), dtype=np.uint8)
+    end = max([offset + row_stride(width) * height for _, width, height, offset in char_specs] + [packed.size])
+    if end > packed.size:
+        packed = np.concatenate((packed, np.zeros(end - packed.size, dtype=np.uint8)))
+    bits = np.unpackbits(packed).view(bool)
+
+    glyphs = {}
+    for ascii_code, width, height, offset in char_specs:
+        stride = row_stride(width)
+        rows = bits[offset * 8:(offset + stride * height) * 8].reshape(height, stride * 8)
+        glyphs[ascii_code] = rows[:, :width]
+    return glyphs
+
+
+def glyph_rgb(pixels, ink=WHITE, paper=BLACK):
+    """Colour a bool glyph array: a (height, width, 3) uint8 RGB array."""
+    return np.where(pixels[..., None], np.array(ink, dtype=np.uint8), np.array(paper, dtype=np.uint8))
+
+
+def scale_rgb(rgb, scale):
+    """Enlarge an RGB array by a whole factor, every pixel becoming a scale x scale block."""
+    if scale <= 1:
+        return rgb
+    return np.repeat(np.repeat(rgb, scale, axis=0), scale, axis=1)
+
+
+def glyph_strip(glyphs):
+    """Put all glyphs of unpack_charset side by side, bottoms aligned, on one bool strip as high as the
+    highest glyph. Returns (strip, columns): columns maps ascii_code to (first column, width, height)."""
+    height = max([pixels.shape[0] for pixels in glyphs.values()] + [0])
+    strip = np.zeros((height, sum(pixels.shape[1] for pixels in glyphs.values()) + 1), dtype=bool)
+    columns = {}
+    x = 0
+    for ascii_code, pixels in glyphs.items():
+        glyph_height, width = pixels.shape
+        strip[height - glyph_height:, x:x + width] = pixels
+        columns[ascii_code] = (x, width, glyph_height)
+        x += width
+    # The last column stays empty, missing characters are laid out from it
+    return strip, columns
+
+
+def strip_text_rgb(rgb_strip, columns, text, missing_color=MISSING_COLOR):
+    """text_rgb from a glyph_strip coloured with glyph_rgb: the columns of every character are gathered
+    from the strip in one take, so the cost does not grow with Python work per character."""
+    blank = rgb_strip.shape[1] - 1
+    placed = [columns.get(ord(char)) for char in text]
+    starts = np.array([place[0] if place else blank for place in placed], dtype=np.intp)
+    widths = np.array([place[1] if place else 0 for place in placed], dtype=np.intp)
+    heights = np.array([place[2] if place else 0 for place in placed], dtype=np.intp)
+
+    # A missing character is a block of half the line height so far wide and that line height high
+    missing = np.array([place is None for place in placed], dtype=bool)
+    line_heights = np.maximum.accumulate(heights) if placed else heights
+    widths[missing] = np.where(line_heights[missing] > 0, line_heights[missing] // 2, 8)
+    block_heights = np.where(line_heights > 0, line_heights, 16)
+    max_height = int(heights.max(initial=0))
+    height = max_height if max_height > 0 else int(block_heights[missing].max(initial=1))
+
+    # Strip column of every output column; a missing character repeats the empty last column
+    piece_x = np.cumsum(widths) - widths
+    steps = np.where(missing, 0, 1)
+    cols = np.repeat(starts, widths) + (np.arange(widths.sum()) - np.repeat(piece_x, widths)) * np.repeat(steps, widths)
+    rgb = np.take(rgb_strip[max(0, rgb_strip.shape[0] - height):], cols, axis=1)
+    if rgb.shape[0] < height:
+        paper = np.broadcast_to(rgb_strip[:1, blank:], (height - rgb.shape[0], rgb.shape[1], 3))
+        rgb = np.concatenate((paper, rgb))
+
+    for x, width, block_height in zip(piece_x[missing].tolist(), widths[missing].tolist(),
+                                      block_heights[missing].tolist()):
+        rgb[height - min(block_height, height):, x:x + width] = missing_color
+    return rgb, [char for char, place in zip(text, placed) if place is None]
+
+
+def text_rgb(glyphs, text, ink=BLACK, paper=WHITE, missing_color=MISSING_COLOR):
+    """Lay out text with the glyphs of unpack_charset, bottoms aligned, on a paper coloured strip.
+    A character without a glyph gets a missing_color block of half the line height (so far) wide.
+    Returns (rgb, missing_chars): the (height, width, 3) strip and the characters that were missing."""
+    strip, columns = glyph_strip(glyphs)
+    return strip_text_rgb(glyph_rgb(strip, ink, paper), columns, text, missing_color)
+
+
+class GlyphCache:
+    """Decoded glyphs of one charset, unpacked on first use and kept until the charset data changes.
+    bitmap_data is read again after invalidate(), so edits made to it in place show up then."""
+
+    def __init__(self, bitmap_data, char_specs):
+        self.bitmap_data = bitmap_data
+        self.char_specs = char_specs
+        self._glyphs = None
+        self._strip = None
+        self._rgb_strips = {}
+
+    def glyphs(self):
+        """{ascii_code: (height, width) bool array} of the whole charset."""
+        if self._glyphs is None:
+            self._glyphs = unpack_charset(self.bitmap_data, self.char_specs)
+        return self._glyphs
+
+    def invalidate(self, ascii_code=None):
+        """Forget one edited glyph, or all of them when ascii_code is None."""
+        self._strip = None
+        self._rgb_strips.clear()
+        if ascii_code is None or self._glyphs is None:
+            self._glyphs = None
+            return
+        for spec in self.char_specs:
+            if spec[0] == ascii_code:
+                self._glyphs[ascii_code] = unpack_glyph(self.bitmap_data, spec[1], spec[2], spec[3])
+
+    def text_rgb(self, text, ink=BLACK, paper=WHITE, missing_color=MISSING_COLOR):
+        """text_rgb from a glyph_strip kept per (ink, paper) colour pair."""
+        if self._strip is None:
+            self._strip = glyph_strip(self.glyphs())
+        strip, columns = self._strip
+        if (ink, paper) not in self._rgb_strips:
+            self._rgb_strips[ink, paper] = glyph_rgb(strip, ink, paper)
+        return strip_text_rgb(self._rgb_strips[ink, paper], columns, text, missing_color)
+
+
+def rgb_to_qimage(rgb):
+    """Convert an RGB array to a QImage that owns its pixels."""
+    from PyQt6.QtGui import QImage
+
+    rgb = np.ascontiguousarray(rgb)
+    height, width = rgb.shape[:2]
+    return QImage(rgb.tobytes(), width, height, width * 3, QImage.Format.Format_RGB888).copy()
+
+
+def glyph_qimage(pixels, scale=1, ink=WHITE, paper=BLACK):
+    """A bool glyph array as a QImage, enlarged by scale."""
+    return rgb_to_qimage(scale_rgb(glyph_rgb(pixels, ink, paper), scale))
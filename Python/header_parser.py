@@ -0,0 +1,138 @@
+import re
+from collections import namedtuple
+
+# One array declaration from a generated header.
+# ctype:  element type as written ("uint8_t", "uint16_t", "FontInfo", ...)
+# name:   variable name
+# dims:   declared dimensions, ints where numeric, e.g. (95, 4) or ("NUM_BITMAPS",)
+# label:  name from a "// name (WxH)" comment directly above the declaration, or None
+# width, height: dimensions from that comment, or None
+# encoding: word after the dimensions in that comment, e.g. "rle" in "// name (WxH) rle", or None
+# data:   uint8_t arrays -> bytearray of the values
+#         arrays of {...} rows -> list of tuples (ints, or strings for quoted/identifier fields)
+#         other flat arrays -> list of ints
+CArray = namedtuple('CArray', ['ctype', 'name', 'dims', 'label', 'width', 'height', 'encoding', 'data'])
+
+_DECLARATION = re.compile(r'^\s*(?:static\s+)?const\s+(\w+)\s+(\w+)\s*((?:\[\s*\w*\s*\]\s*)+)'
+                          r'(?:__attribute__\s*\(\(.*?\)\)\s*)?=\s*\{(.*)$')
+_DIMENSION = re.compile(r'\[\s*(\w*)\s*\]')
+_LABEL = re.compile(r'^\s*//\s*(\w+)\s*\((\d+)x(\d+)\)\s*(\w+)?')
+_ROW = re.compile(r'\{([^{}]*)\}')
+_FIELD = re.compile(r'"([^"]*)"|([^,\s]+)')
+
+
+def _strip_comment(line):
+    """Remove a trailing // comment from a line of array body."""
+    index = line.find('//')
+    return line if index < 0 else line[:index]
+
+
+def _find_closing_brace(text, depth):
+    """Return (index of the brace that closes the array or -1, new brace depth)."""
+    opened = text.count('{')
+    closed = text.count('}')
+    if closed - opened < depth:
+        return -1, depth + opened - closed
+
+    # The closing brace is on this line, walk it to find where
+    for index, char in enumerate(text):
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return index, 0
+    return -1, depth
+
+
+def _parse_dims(text):
+    return tuple(int(d) if d.isdigit() else d for d in _DIMENSION.findall(text))
+
+
+def _parse_field(quoted, bare):
+    if quoted or not bare:
+        return quoted
+    try:
+        return int(bare, 0)
+    except ValueError:
+        return bare
+
+
+def _decode_body(ctype, name, body):
+    """Turn the collected body text of one array into its values."""
+    if ctype == 'uint8_t' and body.lstrip().startswith(('0x', '0X')):
+        # "0x2C, 0x3C, ..." -> "2C 3C ..." which bytes.fromhex decodes in one call
+        hex_text = body.replace('0x', '').replace('0X', '').replace(',', ' ')
+        try:
+            return bytearray.fromhex(hex_text)
+        except ValueError as e:
+            raise ValueError(f"Invalid hex data in array '{name}': {e}")
+
+    if '{' in body:
+        return [
+            tuple(_parse_field(quoted, bare) for quoted, bare in _FIELD.findall(row))
+            for row in _ROW.findall(body)
+        ]
+    values = [int(value, 0) for value in body.replace(',', ' ').split()]
+    return bytearray(values) if ctype == 'uint8_t' else values
+
+
+def iter_c_arrays(header_file):
+    """Stream a generated header once and yield a CArray record for every const array in it."""
+    with open(header_file, 'r', encoding='utf-8', errors='replace') as f:
+        label = None
+        current = None
+        body = []
+        depth = 0
+
+        for line in f:
+            if current is None:
+                match = _DECLARATION.match(line)
+                if not match:
+                    if line.strip():
+                        label_match = _LABEL.match(line)
+                        label = label_match.groups() if label_match else None
+                    continue
+
+                ctype, name, dims = match.group(1), match.group(2), _parse_dims(match.group(3))
+                current = (ctype, name, dims, label)
+                label = None
+                body = []
+                depth = 1
+                line = match.group(4)
+
+            # Fast path for byte array bodies: plain hex lines until the closing brace
+            if current[0] == 'uint8_t' and '}' not in line:
+                body.append(line)
+                continue
+
+            # Track braces so rows like {32, 7, 14, 0} do not end the array
+            text = _strip_comment(line)
+            end, depth = _find_closing_brace(text, depth)
+            if end < 0:
+                body.append(text)
+                continue
+
+            body.append(text[:end])
+            ctype, name, dims, array_label = current
+            current = None
+
+            label_name, width, height, encoding = array_label if array_label else (None, None, None, None)
+            yield CArray(
+                ctype,
+                name,
+                dims,
+                label_name,
+                int(width) if width else None,
+                int(height) if height else None,
+                encoding,
+                _decode_body(ctype, name, ''.join(body)),
+            )
+
+        if current is not None:
+            raise ValueError(f"Array '{current[1]}' is not closed")
+
+
+def read_c_arrays(header_file):
+    """Return all CArray records of a header file as a list."""
+    return list(iter_c_arrays(header_file))
@@ -0,0 +1,86 @@
+import re
+from collections import namedtuple
+
+from PIL import Image, ImageOps
+
+from bitmap_layout import VGA_DISPLAY_X, VGA_DISPLAY_Y
+
+# How an image is brought to a target size:
+#   fit    scale to fit inside width x height, keeping the aspect ratio (one side may come out smaller)
+#   fill   scale to cover width x height, keeping the aspect ratio, and crop the overflow around the centre
+#   exact  scale to exactly width x height
+RESIZE_MODES = ('fit', 'fill', 'exact')
+
+RESIZE_FILTERS = {
+    'nearest': Image.Resampling.NEAREST,
+    'box': Image.Resampling.BOX,
+    'bilinear': Image.Resampling.BILINEAR,
+    'hamming': Image.Resampling.HAMMING,
+    'bicubic': Image.Resampling.BICUBIC,
+    'lanczos': Image.Resampling.LANCZOS,
+}
+DEFAULT_FILTER = 'lanczos'
+
+# One target size; a tuple of plain values so it can go to the worker processes and into cache keys
+ResizeSpec = namedtuple('ResizeSpec', ['mode', 'width', 'height', 'filter'])
+
+_SPEC = re.compile(r'^(?:(\w+):)?(\d+)x(\d+)(?::(\w+))?$')
+
+
+def parse_resize_spec(text, default_filter=DEFAULT_FILTER):
+    """Parse "[mode:]WIDTHxHEIGHT[:filter]", e.g. "160x120", "fill:64x64" or "exact:32x32:nearest".
+    The mode defaults to fit. The size has to fit the VGA_DISPLAY_X x VGA_DISPLAY_Y screen."""
+    match = _SPEC.match(text.strip())
+    if not match:
+        raise ValueError(f"Invalid size '{text}', expected [fit|fill|exact:]WIDTHxHEIGHT[:filter]")
+    mode, width, height, resize_filter = match.groups()
+    spec = ResizeSpec(mode or 'fit', int(width), int(height), resize_filter or default_filter)
+    if spec.mode not in RESIZE_MODES:
+        raise ValueError(f"Unknown resize mode '{spec.mode}', expected one of {', '.join(RESIZE_MODES)}")
+    if spec.filter not in RESIZE_FILTERS:
+        raise ValueError(f"Unknown resize filter '{spec.filter}', expected one of {', '.join(RESIZE_FILTERS)}")
+    if not (0 < spec.width <= VGA_DISPLAY_X and 0 < spec.height <= VGA_DISPLAY_Y):
+        raise ValueError(f"Size {spec.width}x{spec.height} does not fit the {VGA_DISPLAY_X}x{VGA_DISPLAY_Y} screen")
+    return spec
+
+
+def read_sizes_file(sizes_file, default_filter=DEFAULT_FILTER):
+    """Read per-asset target sizes: one line per asset with its PNG name (without .png) and one or more
+    size specs, e.g. "Wolf fit:64x64 fit:32x32". Blank lines and lines starting with # are skipped.
+    Returns {name: [ResizeSpec, ...]}."""
+    sizes = {}
+    with open(sizes_file, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            name, *specs = line.split()
+            if not specs:
+                raise ValueError(f"{sizes_file}:{line_number}: no size for '{name}'")
+            try:
+                sizes[name] = [parse_resize_spec(spec, default_filter) for spec in specs]
+            except ValueError as e:
+                raise ValueError(f"{sizes_file}:{line_number}: {e}")
+    return sizes
+
+
+def resize_image(img, spec):
+    """Return img resampled to spec (a ResizeSpec). Alpha is kept for the transparency handling after it."""
+    if img.mode not in ('RGB', 'RGBA'):
+        # Palette and greyscale images are resampled in full colour, not by palette index
+        img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+
+    resample = RESIZE_FILTERS[spec.filter]
+    if spec.mode == 'exact':
+        return img.resize((spec.width, spec.height), resample)
+    if spec.mode == 'fill':
+        return ImageOps.fit(img, (spec.width, spec.height), resample)
+
+    scale = min(spec.width / img.width, spec.height / img.height)
+    size = (max(1, min(spec.width, round(img.width * scale))), max(1, min(spec.height, round(img.height * scale))))
+    return img if size == img.size else img.resize(size, resample)
+
+
+def variant_name(name, width, height):
+    """Name of one pre-scaled variant of an asset: "Wolf" -> "Wolf_32x32"."""
+    return f"{name}_{width}x{height}"
@@ -0,0 +1,29 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _run_job(func, args):
+    """Run one job in a worker and capture its error instead of raising it."""
+    try:
+        return func(*args), None
+    except Exception as e:
+        return None, str(e)
+
+
+def run_parallel(func, jobs, max_workers=None):
+    """Run func(*args) for every args tuple in jobs on a process pool.
+    func must be a module-level function so it can be sent to the worker processes.
+    Returns a list of (result, error) tuples in the same order as jobs; error is None on success
+    and the exception message otherwise. A single job, or max_workers=1, runs in this process."""
+    jobs = list(jobs)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(jobs)))
+
+    if max_workers == 1:
+        return [_run_job(func, args) for args in jobs]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # map keeps the job order; chunks cut the per-job overhead for large folders
+        chunksize = max(1, len(jobs) // (max_workers * 4))
+        return list(executor.map(_run_job, [func] * len(jobs), jobs, chunksize=chunksize))
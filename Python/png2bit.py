@@ -1,49 +1,48 @@
 import os
+import struct
 import sys
 from PIL import Image
-from PyQt6.QtWidgets import (
-    QApplication,
-    QFileDialog,
-    QMessageBox,
-    QDialog,
-    QVBoxLayout,
-    QTextEdit,
-    QPushButton,
-    QLabel,
-    QHBoxLayout,
-    QListWidget,
-)
-from PyQt6.QtGui import QPixmap, QImage
 import re
 
-def png_to_c_bitmap(png_file, output_file, use_filename=False):
-    img = Image.open(png_file)
+from bitmap_atlas import ATLAS_TABLE_NAME, DEFAULT_PAGE_SIZE, atlas_bitmaps, build_atlas, load_atlas_header, parse_page_size, reorder_atlas, write_atlas_header
+from bitmap_codec import image_to_r3g3b2, r3g3b2_to_image, r3g3b2_to_images
+from bitmap_layout import align_rows, aligned_header, unalign_rows, validate_aligned_layout
+from bitmap_header import header_version_for, read_bitmap_header, to_header_v1, to_header_v2
+from bitmap_delta import encode_animation, load_animation_header, play_animation, write_animation_header
+from bitmap_optimize import DEFAULT_MIN_PSNR, best_file_encoding, encoding_totals, optimize_bitmap, quantize_bitmap
+from bitmap_pack import load_bitmap_pack, write_bitmap_pack
+from bitmap_palette import palette_decode, palette_encode
+from bitmap_rle import rle_decode, rle_encode
+from bitmap_spans import DEFAULT_TRANSPARENT, spans_decode, spans_encode, verify_spans
+from bitmap_tiles import TILE_SIZE, build_tile_dictionary, tile_map_to_bitmap_data
+from bitmap_transforms import TRANSFORM_NAMES, expand_descriptor, find_transformed_duplicates, transform_descriptor
+from c_array_writer import write_hex_rows
+from conversion_cache import cache_get, cache_key, cache_put, purge_cache
+from header_parser import iter_c_arrays
+from image_resize import DEFAULT_FILTER, RESIZE_FILTERS, parse_resize_spec, read_sizes_file, resize_image, variant_name
+from parallel_convert import run_parallel
+from sprite_sheet import SheetSpec, is_animated, load_frames, parse_grid
 
-    # Convert to RGB if necessary
-    if img.mode != 'RGB':
-        img = img.convert('RGB')
+# PyQt6 is only imported inside the dialog functions, so conversions and the
+# command line interface below run on machines without Qt.
 
-    width, height = img.size
-    pixels = img.load()
-
-    # Convert RGB to 8-bit color (R3G3B2)
-    bitmap_data = [width & 0xFF, height & 0xFF]  # store low byte of width/height (match original behaviour)
-    for y in range(height):
-        for x in range(width):
-            r, g, b = pixels[x, y][:3]
-            color_8bit = ((r >> 5) << 5) | ((g >> 5) << 2) | (b >> 6)
-            bitmap_data.append(color_8bit)
+def png_to_c_bitmap(png_file, output_file, use_filename=False, use_cache=True, header_version=None, resize=None,
+                    variant=False):
+    filename_base, width, height, bitmap_data = png_to_bitmap_data(png_file, use_cache, resize=resize)
+    if variant:
+        # One of several pre-scaled variants of this PNG
+        filename_base = variant_name(filename_base, resize.width, resize.height)
+    header_version = header_version_for([(filename_base, width, height, bitmap_data)], header_version)
+    if header_version == 2:
+        bitmap_data = to_header_v2(width, height, bitmap_data)
 
     # Ensure output directory exists
     out_dir = os.path.dirname(output_file)
     if out_dir:
         os.makedirs(out_dir, exist_ok=True)
 
-    # Generate variable name from filename
+    # Generate variable name from filename (already sanitized by png_to_bitmap_data)
     if use_filename:
-        filename_base = os.path.splitext(os.path.basename(png_file))[0]
-        # Sanitize filename: replace hyphens and spaces with underscores, remove invalid characters
-        filename_base = re.sub(r'[^a-zA-Z0-9_]', '_', filename_base)
         var_name = f"{filename_base}_bitmap_data"
     else:
         var_name = "bitmap_data"
@@ -54,46 +53,120 @@ def png_to_c_bitmap(png_file, output_file, use_filename=False):
         f.write("#include <stdint.h>\n\n")
         f.write(f"#define BITMAP_WIDTH {width}\n")
         f.write(f"#define BITMAP_HEIGHT {height}\n\n")
+        if header_version == 2:
+            f.write("// Bitmap data starts with a version 2 header: 0, 0, version, format, uint16 width, uint16 height\n")
+            f.write("#define BITMAP_HEADER_VERSION 2\n\n")
         f.write(f"const uint8_t {var_name}[{len(bitmap_data)}] = {{\n")
 
-        for i, byte in enumerate(bitmap_data):
-            if i % 16 == 0:
-                f.write("    ")
-            f.write(f"0x{byte:02X}")
-            if i < len(bitmap_data) - 1:
-                f.write(", ")
-            if (i + 1) % 16 == 0:
-                f.write("\n")
+        write_hex_rows(f, bitmap_data)
 
         f.write("\n};\n\n")
         f.write("#endif // BITMAP_H\n")
 
-def png_to_bitmap_data(png_file):
-    """Convert PNG to bitmap data array and return (filename_base, width, height, bitmap_data)."""
-    img = Image.open(png_file)
+# Everything besides the PNG bytes that changes what png_to_bitmap_data produces.
+# Part of every cache key: change a value here when the conversion changes.
+CONVERSION_PARAMS = {
+    'pixel_format': 'R3G3B2',
+    'size_bytes': 'width_lo,height_lo',
+    'name_sanitize': '[^a-zA-Z0-9_]->_',
+}
 
-    # Convert to RGB if necessary
-    if img.mode != 'RGB':
-        img = img.convert('RGB')
+def png_to_bitmap_data(png_file, use_cache=True, transparent=None, tolerance=None, resize=None):
+    """Convert PNG to bitmap data array and return (filename_base, width, height, bitmap_data).
+    bitmap_data is a bytearray: low byte of width, low byte of height, then one R3G3B2 byte per pixel.
+    With transparent (an R3G3B2 value) the transparent pixels of a PNG with alpha get that colour,
+    and with tolerance also the pixels close to it (see image_to_r3g3b2).
+    With resize (a ResizeSpec) the image is resampled to that target size first.
+    With use_cache the result is looked up in (and stored to) the conversion cache, keyed by the PNG bytes."""
+    with open(png_file, 'rb') as f:
+        png_bytes = f.read()
 
-    width, height = img.size
-    pixels = img.load()
+    cached = None
+    if use_cache:
+        params = CONVERSION_PARAMS
+        if transparent is not None:
+            params = dict(params, transparent=transparent, tolerance=tolerance)
+        if resize is not None:
+            params = dict(params, resize=list(resize))
+        key = cache_key(png_bytes, params)
+        cached = cache_get(key)
 
-    # Convert RGB to 8-bit color (R3G3B2)
-    bitmap_data = [width & 0xFF, height & 0xFF]
-    for y in range(height):
-        for x in range(width):
-            r, g, b = pixels[x, y][:3]
-            color_8bit = ((r >> 5) << 5) | ((g >> 5) << 2) | (b >> 6)
-            bitmap_data.append(color_8bit)
+    if cached is not None:
+        width, height = struct.unpack_from('<II', cached)
+        bitmap_data = bytearray(cached[8:])
+    else:
+        img = Image.open(png_file)
+        if resize is not None:
+            img = resize_image(img, resize)
+
+        # Convert RGB to 8-bit color (R3G3B2) for the whole image at once
+        width, height, payload = image_to_r3g3b2(img, transparent, tolerance)
+        # Low bytes of width and height; the writers swap in a version 2 header for larger bitmaps (see bitmap_header)
+        bitmap_data = bytearray([width & 0xFF, height & 0xFF])
+        bitmap_data += payload
+
+        if use_cache:
+            try:
+                cache_put(key, struct.pack('<II', width, height) + bitmap_data)
+            except OSError:
+                pass  # A read-only or full cache directory must not stop the conversion
 
     filename_base = os.path.splitext(os.path.basename(png_file))[0]
     filename_base = re.sub(r'[^a-zA-Z0-9_]', '_', filename_base)
     
     return filename_base, width, height, bitmap_data
 
-def combine_bitmaps_to_file(png_files, output_file):
-    """Combine multiple PNG images into a single C header file."""
+def resize_specs_for(png_file, resize=None, sizes=None):
+    """Target sizes of one PNG: its entry in sizes (by file name without .png, or the sanitized name),
+    else the global resize list, else [None] for no resampling."""
+    if sizes:
+        name = os.path.splitext(os.path.basename(png_file))[0]
+        specs = sizes.get(name) or sizes.get(re.sub(r'[^a-zA-Z0-9_]', '_', name))
+        if specs:
+            return specs
+    return list(resize) if resize else [None]
+
+def convert_image_file(png_file, use_cache=True, transparent=None, tolerance=None, resize=None, sheet=None):
+    """Convert one input file to a list of (filename_base, width, height, bitmap_data) tuples:
+    the frames of a sprite sheet (with sheet, a SheetSpec) or of an animated GIF/APNG (see load_frames),
+    or the single bitmap of png_to_bitmap_data."""
+    if sheet is not None and (sheet.grid or sheet.rects_file):
+        return load_frames(png_file, sheet.grid, sheet.count, sheet.rects_file, transparent, tolerance, resize)
+    if is_animated(png_file):
+        return load_frames(png_file, None, sheet.count if sheet else None, None, transparent, tolerance, resize)
+    return [png_to_bitmap_data(png_file, use_cache, transparent, tolerance, resize)]
+
+def convert_pngs_to_bitmap_data(png_files, max_workers=None, use_cache=True, transparent=None, tolerance=None,
+                                resize=None, sizes=None, sheet=None):
+    """Convert PNG files with convert_image_file on a process pool.
+    resize: list of ResizeSpec every PNG is resampled to, sizes: {name: [ResizeSpec, ...]} per PNG (see
+    resize_specs_for). Every target size is a job of its own; a PNG with more than one gives one
+    pre-scaled variant per size, named like "Wolf_32x32".
+    sheet: SheetSpec to cut every input into frames; animated GIF/APNG files are always cut into their frames,
+    named like "Dance_Skel_00".
+    Returns (bitmaps, error_list): bitmaps holds (filename_base, width, height, bitmap_data) tuples
+    in the order of png_files for every file that converted, error_list a "file: error" line per failure."""
+    bitmaps = []
+    error_list = []
+    variants = [(png_file, spec, len(specs) > 1)
+                for png_file in png_files
+                for specs in [resize_specs_for(png_file, resize, sizes)]
+                for spec in specs]
+    jobs = [(png_file, use_cache, transparent, tolerance, spec, sheet) for png_file, spec, _ in variants]
+    results = run_parallel(convert_image_file, jobs, max_workers)
+    for (png_file, spec, named_variant), (file_bitmaps, error) in zip(variants, results):
+        if error is None:
+            for filename_base, width, height, bitmap_data in file_bitmaps:
+                if named_variant:
+                    filename_base = variant_name(filename_base, spec.width, spec.height)
+                bitmaps.append((filename_base, width, height, bitmap_data))
+        else:
+            error_list.append(f"{os.path.basename(png_file)}: {error}")
+    return bitmaps, error_list
+
+def combine_bitmaps_to_file(png_files, output_file, max_workers=None, use_cache=True, header_version=None):
+    """Combine multiple PNG images into a single C header file.
+    header_version: see write_combined_header"""
     
     # Ensure output directory exists
     out_dir = os.path.dirname(output_file)
@@ -101,10 +174,10 @@ def combine_bitmaps_to_file(png_files, output_file):
         os.makedirs(out_dir, exist_ok=True)
 
     # Convert all images
-    bitmaps = []
-    for png_file in png_files:
-        filename_base, width, height, bitmap_data = png_to_bitmap_data(png_file)
-        bitmaps.append((filename_base, width, height, bitmap_data))
+    bitmaps, error_list = convert_pngs_to_bitmap_data(png_files, max_workers, use_cache)
+    if error_list:
+        raise Exception("Failed to convert images:\n" + "\n".join(error_list))
+    header_version = header_version_for(bitmaps, header_version)
 
     # Write combined header file
     with open(output_file, 'w', newline='\n') as f:
@@ -114,21 +187,19 @@ def combine_bitmaps_to_file(png_files, output_file):
         
         # Write define for total number of bitmaps
         f.write(f"#define NUM_BITMAPS {len(bitmaps)}\n\n")
+        if header_version == 2:
+            f.write("// Bitmap data starts with a version 2 header: 0, 0, version, format, uint16 width, uint16 height\n")
+            f.write("#define BITMAP_HEADER_VERSION 2\n\n")
 
         # Write all bitmap arrays
         for filename_base, width, height, bitmap_data in bitmaps:
             var_name = f"{filename_base}_bitmap_data"
+            if header_version == 2:
+                bitmap_data = to_header_v2(width, height, bitmap_data)
             f.write(f"// {filename_base} ({width}x{height})\n")
             f.write(f"const uint8_t {var_name}[{len(bitmap_data)}] = {{\n")
 
-            for i, byte in enumerate(bitmap_data):
-                if i % 16 == 0:
-                    f.write("    ")
-                f.write(f"0x{byte:02X}")
-                if i < len(bitmap_data) - 1:
-                    f.write(", ")
-                if (i + 1) % 16 == 0:
-                    f.write("\n")
+            write_hex_rows(f, bitmap_data)
 
             f.write("\n};\n\n")
 
@@ -148,52 +219,102 @@ def combine_bitmaps_to_file(png_files, output_file):
 def load_bitmap_from_header(header_file):
     """Extract bitmap data and dimensions from .h file."""
     try:
-        with open(header_file, 'r') as f:
-            content = f.read()
+        # The first byte array holds the bitmap, starting with its width and height
+        for array in iter_c_arrays(header_file):
+            if array.ctype == 'uint8_t':
+                bitmap_data = array.data
+                break
+        else:
+            raise ValueError("no uint8_t array found")
 
-        # Extract hex values
-        hex_values = re.findall(r'0x([0-9A-Fa-f]{2})', content)
-        bitmap_data = [int(h, 16) for h in hex_values]
-        
-        width = bitmap_data[0]
-        height = bitmap_data[1]
-        
-        return width, height, bitmap_data
+        # Version 1 data starts with the low bytes of width and height, version 2 with a 16-bit size header
+        header = read_bitmap_header(bitmap_data)
+        return header.width, header.height, to_header_v1(bitmap_data)
     except Exception as e:
         raise Exception(f"Failed to parse header file: {e}")
 
-def bitmap_to_image(width, height, bitmap_data):
-    """Convert 8-bit bitmap data (R3G3B2) back to PIL Image."""
-    img = Image.new('RGB', (width, height))
-    pixels = img.load()
-    
-    # Skip first 2 bytes (width and height)
-    data_index = 2
-    
-    for y in range(height):
-        for x in range(width):
-            if data_index >= len(bitmap_data):
-                break
-            
-            color_8bit = bitmap_data[data_index]
-            data_index += 1
-            
-            # Decode R3G3B2
-            r = (color_8bit >> 5) << 5
-            g = ((color_8bit >> 2) & 0x07) << 5
-            b = (color_8bit & 0x03) << 6
-            
-            pixels[x, y] = (r, g, b)
-    
-    return img
+# Encodings write_combined_header can store bitmap data in. "raw" is one byte per pixel,
+# "rle" is the per-row PackBits format of bitmap_rle (decoded by API_draw_bitmap when
+# the header defines BITMAP_ENCODING_RLE), "tiles" a tile map per bitmap into one shared
+# tile dictionary, see bitmap_tiles (BITMAP_ENCODING_TILES), "palette" the smallest lossless
+# 1/2/4 bpp palette per bitmap with 8 bpp as fallback, see bitmap_palette (BITMAP_ENCODING_PALETTE),
+# "spans" only the opaque pixels with a span table per row, see bitmap_spans (BITMAP_ENCODING_SPANS),
+# "aligned" rows padded to a word-aligned stride plus a bitmap_layout table, see bitmap_layout (BITMAP_LAYOUT_ALIGNED).
+BITMAP_ENCODINGS = ('raw', 'rle', 'tiles', 'palette', 'spans', 'aligned')
+
+# Name of the shared tile dictionary array in a "tiles" header
+TILE_DICTIONARY_NAME = 'bitmap_tiles'
+
+def decode_bitmap_data(width, height, bitmap_data, encoding='raw', tile_dictionary=None):
+    """Return raw bitmap data (2 size bytes + one R3G3B2 byte per pixel) for data stored in encoding.
+    Tile maps also need the tile_dictionary of their header."""
+    if encoding == 'rle':
+        return rle_decode(width, height, bitmap_data)
+    if encoding == 'palette':
+        return palette_decode(width, height, bitmap_data)
+    if encoding == 'spans':
+        return spans_decode(width, height, bitmap_data)
+    if encoding == 'aligned':
+        return unalign_rows(width, height, bitmap_data)
+    if encoding == 'tiles':
+        if tile_dictionary is None:
+            raise ValueError("Tile map bitmap without a tile dictionary")
+        return tile_map_to_bitmap_data(width, height, bitmap_data, tile_dictionary)
+    if encoding not in (None, 'raw'):
+        raise ValueError(f"Unknown bitmap encoding '{encoding}'")
+    return bitmap_data
+
+def bitmap_to_image(width, height, bitmap_data, encoding='raw', tile_dictionary=None):
+    """Convert 8-bit bitmap data (R3G3B2) back to PIL Image.
+    Encoded bitmap data goes through its reference decoder first."""
+    return r3g3b2_to_image(width, height, decode_bitmap_data(width, height, bitmap_data, encoding, tile_dictionary))
+
+def load_bitmaps(path):
+    """Load all bitmaps of a combined header file, or of a .bin bitmap pack.
+    Returns a list of tuples: (var_name, width, height, bitmap_data)."""
+    if path.lower().endswith('.bin'):
+        return load_bitmap_pack(path)
+    return parse_combined_header(path)
+
+def decode_combined_header(header_file):
+    """Decode every bitmap in a combined header file (or bitmap pack) in one batch.
+    Returns a list of tuples: (var_name, image)."""
+    bitmaps = load_bitmaps(header_file)
+    images = r3g3b2_to_images([(width, height, bitmap_data) for _, width, height, bitmap_data in bitmaps])
+    return [(var_name, img) for (var_name, _, _, _), img in zip(bitmaps, images)]
+
+def image_to_pixmap(img, max_size=200):
+    """Scale a PIL image up for visibility and convert it to a QPixmap."""
+    from PyQt6.QtGui import QPixmap, QImage
+
+    width, height = img.size
+    scale = max(1, max_size // max(1, max(width, height)))
+    img_scaled = img.resize((width * scale, height * scale), Image.NEAREST)
+
+    # Create QImage (provide bytesPerLine)
+    b = img_scaled.tobytes()
+    bytes_per_line = img_scaled.width * 3
+    qimg = QImage(b, img_scaled.width, img_scaled.height, bytes_per_line, QImage.Format.Format_RGB888)
+    return QPixmap.fromImage(qimg)
 
 def show_file_contents_dialog(parent, path):
+    from PyQt6.QtWidgets import QMessageBox, QDialog, QVBoxLayout, QHBoxLayout, QTextEdit, QPushButton, QLabel, QScrollArea, QWidget
+
     try:
-        width, height, bitmap_data = load_bitmap_from_header(path)
-        img = bitmap_to_image(width, height, bitmap_data)
+        # Combined headers show every bitmap, single headers show just the one
+        images = decode_combined_header(path)
+        if not images:
+            width, height, bitmap_data = load_bitmap_from_header(path)
+            images = [(None, bitmap_to_image(width, height, bitmap_data))]
         
-        with open(path, 'r', encoding='utf-8', errors='replace') as f:
-            contents = f.read()
+        if path.lower().endswith('.bin'):
+            # Binary pack: list its entries instead of showing the raw bytes
+            contents = f"{os.path.basename(path)}: {len(images)} bitmap(s), {os.path.getsize(path)} bytes\n\n"
+            contents += "\n".join(f"{index}: {var_name.replace('_bitmap_data', '')} ({img.width}x{img.height})"
+                                  for index, (var_name, img) in enumerate(images))
+        else:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                contents = f.read()
     except Exception as e:
         QMessageBox.critical(parent, "Error", f"Failed to read file:\n{e}")
         return
@@ -208,17 +329,26 @@ def show_file_contents_dialog(parent, path):
     text.setPlainText(contents)
     layout.addWidget(text)
     
-    # Scale up for visibility
-    scale = max(1, 200 // max(1, max(width, height)))
-    img_scaled = img.resize((width * scale, height * scale), Image.NEAREST)
-    
-    # Create QImage (provide bytesPerLine)
-    b = img_scaled.tobytes()
-    bytes_per_line = img_scaled.width * 3
-    qimg = QImage(b, img_scaled.width, img_scaled.height, bytes_per_line, QImage.Format.Format_RGB888)
-    label = QLabel(dlg)
-    label.setPixmap(QPixmap.fromImage(qimg))
-    layout.addWidget(label)
+    if len(images) == 1:
+        label = QLabel(dlg)
+        label.setPixmap(image_to_pixmap(images[0][1]))
+        layout.addWidget(label)
+    else:
+        # Scrollable column with every bitmap and its name
+        scroll = QScrollArea(dlg)
+        scroll.setWidgetResizable(True)
+        container = QWidget()
+        container_layout = QVBoxLayout(container)
+        for index, (var_name, img) in enumerate(images):
+            display_name = var_name.replace('_bitmap_data', '')
+            container_layout.addWidget(QLabel(f"{index}: {display_name} ({img.width}x{img.height})", container))
+            label = QLabel(container)
+            label.setPixmap(image_to_pixmap(img))
+            container_layout.addWidget(label)
+        container_layout.addStretch()
+        scroll.setWidget(container)
+        scroll.setMinimumWidth(260)
+        layout.addWidget(scroll)
 
     btn_close = QPushButton("Close", dlg)
     btn_close.clicked.connect(dlg.accept)
@@ -229,6 +359,8 @@ def show_file_contents_dialog(parent, path):
 
 def pick_and_convert(parent=None):
     """Select a PNG and save as C header. parent should be a QWidget (dialog) or None."""
+    from PyQt6.QtWidgets import QFileDialog, QMessageBox
+
     png_path, _ = QFileDialog.getOpenFileName(
         parent,
         "Select PNG image",
@@ -258,6 +390,8 @@ def pick_and_convert(parent=None):
 
 def batch_convert(parent=None):
     """Select multiple PNG files and convert them all to C headers."""
+    from PyQt6.QtWidgets import QFileDialog, QMessageBox
+
     png_paths, _ = QFileDialog.getOpenFileNames(
         parent,
         "Select PNG images to convert",
@@ -278,14 +412,18 @@ def batch_convert(parent=None):
     success_count = 0
     error_list = []
 
+    # Convert on all cores, results come back in the order of png_paths
+    jobs = []
     for png_path in png_paths:
-        try:
-            filename_base = os.path.splitext(os.path.basename(png_path))[0]
-            output_file = os.path.join(output_dir, f"{filename_base}.h")
-            png_to_c_bitmap(png_path, output_file, use_filename=True)
+        filename_base = os.path.splitext(os.path.basename(png_path))[0]
+        output_file = os.path.join(output_dir, f"{filename_base}.h")
+        jobs.append((png_path, output_file, True))
+
+    for png_path, (_, error) in zip(png_paths, run_parallel(png_to_c_bitmap, jobs)):
+        if error is None:
             success_count += 1
-        except Exception as e:
-            error_list.append(f"{os.path.basename(png_path)}: {e}")
+        else:
+            error_list.append(f"{os.path.basename(png_path)}: {error}")
 
     message = f"Successfully converted {success_count} out of {len(png_paths)} images.\n"
     if error_list:
@@ -295,11 +433,13 @@ def batch_convert(parent=None):
 
 def combine_multiple_bitmaps(parent=None):
     """Select multiple PNG files and combine them into a single C header file."""
+    from PyQt6.QtWidgets import QFileDialog, QMessageBox
+
     png_paths, _ = QFileDialog.getOpenFileNames(
         parent,
         "Select PNG images to combine",
         "",
-        "PNG Images (*.png *.PNG);;All Files (*)"
+        "PNG Images (*.png *.PNG);;Animated GIF/APNG (*.gif *.GIF *.png *.apng);;All Files (*)"
     )
     if not png_paths:
         return
@@ -307,20 +447,35 @@ def combine_multiple_bitmaps(parent=None):
     default_name = "Bitmaps.h"
     default_dir = os.path.dirname(png_paths[0]) if png_paths else ""
 
-    save_path, _ = QFileDialog.getSaveFileName(
+    encoding_filters = {
+        "RLE Compressed C Header (*.h)": 'rle',
+        "Tile Dictionary C Header (*.h)": 'tiles',
+        "Indexed Palette C Header (*.h)": 'palette',
+        "Transparent Spans C Header (*.h)": 'spans',
+        "Word-Aligned Rows C Header (*.h)": 'aligned',
+    }
+    dedupe_filter = "C Header, Flips/Rotations Stored Once (*.h)"
+    atlas_filter = "Trimmed Sprite Atlas C Header (*.h)"
+    save_path, selected_filter = QFileDialog.getSaveFileName(
         parent,
         "Save combined header file",
         os.path.join(default_dir, default_name),
-        "C Header Files (*.h);;All Files (*)"
+        ";;".join(["C Header Files (*.h)", *encoding_filters, dedupe_filter, atlas_filter,
+                   "Bitmap Pack + Header (*.bin)", "All Files (*)"])
     )
     if not save_path:
         return
 
     try:
         # Convert all images to bitmap data
+        # PNG alpha becomes the transparent colour for span headers
+        transparent = DEFAULT_TRANSPARENT if encoding_filters.get(selected_filter) == 'spans' else None
+        converted, error_list = convert_pngs_to_bitmap_data(png_paths, transparent=transparent)
+        if error_list:
+            QMessageBox.critical(parent, "Error", "Failed to convert images:\n" + "\n".join(error_list))
+            return
         bitmaps = []
-        for png_file in png_paths:
-            filename_base, width, height, bitmap_data = png_to_bitmap_data(png_file)
+        for filename_base, width, height, bitmap_data in converted:
             var_name = f"{filename_base}_bitmap_data"
             bitmaps.append((var_name, width, height, bitmap_data))
         
@@ -329,57 +484,380 @@ def combine_multiple_bitmaps(parent=None):
         if reordered_bitmaps is None:
             return  # User cancelled
         
-        # Write the combined header file with reordered bitmaps
-        write_combined_header(save_path, reordered_bitmaps)
+        # Write the combined header file (or binary pack) with reordered bitmaps
+        if save_path.lower().endswith('.bin'):
+            write_bitmap_pack_files(save_path, reordered_bitmaps)
+        elif selected_filter in encoding_filters:
+            encoding = encoding_filters[selected_filter]
+            stats = write_combined_header(save_path, reordered_bitmaps, encoding)
+            show_report_dialog(parent, f"{encoding.upper()} Encoding Report",
+                               format_encoding_report(reordered_bitmaps, encoding, stats))
+        elif selected_filter == dedupe_filter:
+            transforms = find_transformed_duplicates(reordered_bitmaps)
+            write_combined_header(save_path, reordered_bitmaps, transforms=transforms)
+            show_report_dialog(parent, "Flip/Rotation Deduplication Report",
+                               format_transform_report(reordered_bitmaps, transforms))
+        elif selected_filter == atlas_filter:
+            atlas, stats, written = write_atlas_if_smaller(save_path, reordered_bitmaps, trim='auto')
+            show_report_dialog(parent, "Sprite Atlas Report", format_atlas_report(atlas, stats, written))
+        else:
+            write_combined_header(save_path, reordered_bitmaps)
         show_file_contents_dialog(parent, save_path)
     except Exception as e:
         QMessageBox.critical(parent, "Error", f"Failed to combine images:\n{e}")
 
+def show_report_dialog(parent, title, report):
+    """Show an encoding report in a read-only text dialog."""
+    from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTextEdit, QPushButton
+    from PyQt6.QtGui import QFont
+
+    dlg = QDialog(parent)
+    dlg.setWindowTitle(title)
+    dlg.resize(700, 500)
+    layout = QVBoxLayout(dlg)
+
+    text = QTextEdit(dlg)
+    text.setReadOnly(True)
+    text.setFont(QFont("Courier New", 9))
+    text.setPlainText(report)
+    layout.addWidget(text)
+
+    btn_close = QPushButton("Close", dlg)
+    btn_close.clicked.connect(dlg.accept)
+    layout.addWidget(btn_close)
+
+    dlg.exec()
+
+def create_animation_dialog(parent=None):
+    """Select the frames of an animation and save them as a keyframe + delta frames header."""
+    from PyQt6.QtWidgets import QFileDialog, QMessageBox
+
+    png_paths, _ = QFileDialog.getOpenFileNames(
+        parent,
+        "Select the animation frames",
+        "",
+        "PNG Images (*.png *.PNG);;Animated GIF/APNG (*.gif *.GIF *.png *.apng);;All Files (*)"
+    )
+    if not png_paths:
+        return
+
+    # Frame files are numbered, keep "(2)" before "(10)"
+    png_paths = sorted(png_paths, key=natural_sort_key)
+    name = animation_name(png_paths[0])
+
+    save_path, _ = QFileDialog.getSaveFileName(
+        parent,
+        "Save animation header file",
+        os.path.join(os.path.dirname(png_paths[0]), f"{name}_anim.h"),
+        "C Header Files (*.h);;All Files (*)"
+    )
+    if not save_path:
+        return
+
+    try:
+        frames, stats = create_animation(png_paths, save_path, name)
+        if verify_animation_header(save_path, frames):
+            raise Exception("Played back frames differ from the source frames")
+        show_report_dialog(parent, f"Animation Report - {name}", format_animation_report(stats))
+    except Exception as e:
+        QMessageBox.critical(parent, "Error", f"Failed to create animation:\n{e}")
+
 def load_bitmap_dialog(parent=None):
     """Load and display a bitmap from .h file. parent should be a QWidget (dialog) or None."""
+    from PyQt6.QtWidgets import QFileDialog
+
     header_path, _ = QFileDialog.getOpenFileName(
         parent,
         "Select .h bitmap file",
         "",
-        "C Header Files (*.h);;All Files (*)"
+        "C Header Files (*.h);;Bitmap Packs (*.bin);;All Files (*)"
     )
     if header_path:
         show_file_contents_dialog(parent, header_path)
 
-def parse_combined_header(header_file):
+def read_combined_header(header_file):
     """Parse a combined header file and extract bitmap information.
-    Returns a list of tuples: (var_name, width, height, bitmap_data)."""
+    Returns (bitmaps, encoding, transformed): bitmaps is a list of tuples (var_name, width, height, bitmap_data)
+    with bitmap_data always decoded to raw, encoding is how the file stores them (see BITMAP_ENCODINGS,
+    or "atlas" for a header written by write_atlas_header) and transformed tells whether some bitmaps are
+    stored as a transform of another one."""
     try:
-        with open(header_file, 'r') as f:
-            content = f.read()
-        
+        # Bitmap arrays are the byte arrays preceded by a "// name (WxH)" comment,
+        # an encoded array carries its encoding after the dimensions: "// name (WxH) rle"
         bitmaps = []
-        # Pattern to match bitmap array declarations with comments
-        pattern = r'//\s*(\w+)\s*\((\d+)x(\d+)\)\s*\nconst uint8_t (\w+)\[(\d+)\]\s*=\s*\{([^}]+)\}'
-        
-        matches = re.finditer(pattern, content, re.MULTILINE)
-        
-        for match in matches:
-            name_base = match.group(1)
-            width = int(match.group(2))
-            height = int(match.group(3))
-            var_name = match.group(4)
-            array_size = int(match.group(5))
-            hex_data = match.group(6)
-            
-            # Extract hex values
-            hex_values = re.findall(r'0x([0-9A-Fa-f]{2})', hex_data)
-            bitmap_data = [int(h, 16) for h in hex_values]
-            
-            bitmaps.append((var_name, width, height, bitmap_data))
-        
-        return bitmaps
+        encoding = 'raw'
+        transformed = False
+        tile_dictionary = None
+        for array in iter_c_arrays(header_file):
+            if array.name == ATLAS_TABLE_NAME:
+                # Atlas pages have no per-bitmap arrays, the bitmaps are cut out of them
+                return atlas_bitmaps(load_atlas_header(header_file)), 'atlas', False
+            if array.name == TILE_DICTIONARY_NAME:
+                # Written before the tile maps that use it
+                tile_dictionary = array.data
+            elif array.ctype == 'uint8_t' and array.width is not None:
+                # A version 2 header has the full size and the format, version 1 relies on the label
+                header = read_bitmap_header(array.data)
+                width, height = (header.width, header.height) if header.version == 2 else (array.width, array.height)
+                array_encoding = header.format or array.encoding
+                data = to_header_v1(array.data)
+                if array_encoding == 'transform':
+                    # Flip or rotation of an earlier bitmap, expanded for previews
+                    transformed = True
+                    bitmap_data = expand_descriptor(data, bitmaps)
+                else:
+                    if array_encoding and array_encoding != 'raw':
+                        encoding = array_encoding
+                    bitmap_data = decode_bitmap_data(width, height, data, array_encoding, tile_dictionary)
+                bitmaps.append((array.name, width, height, bitmap_data))
+        return bitmaps, encoding, transformed
     except Exception as e:
         raise Exception(f"Failed to parse combined header file: {e}")
 
-def write_combined_header(output_file, bitmaps):
+def parse_combined_header(header_file):
+    """Parse a combined header file and extract bitmap information.
+    Returns a list of tuples: (var_name, width, height, bitmap_data) with raw bitmap_data."""
+    return read_combined_header(header_file)[0]
+
+def read_transparent_color(header_file):
+    """Return the transparent colour of the span bitmaps in a combined header (DEFAULT_TRANSPARENT without any)."""
+    for array in iter_c_arrays(header_file):
+        if array.ctype != 'uint8_t' or array.width is None:
+            continue
+        # The key follows the two size bytes, so a version 2 header is taken off first
+        if (read_bitmap_header(array.data).format or array.encoding) == 'spans':
+            data = to_header_v1(array.data)
+            if len(data) > 2:
+                return data[2]
+    return DEFAULT_TRANSPARENT
+
+def parse_color(text):
+    """Parse a colour argument into an R3G3B2 value: "#RRGGBB" or an R3G3B2 byte such as "0xE3"."""
+    if text.startswith('#'):
+        if len(text) != 7:
+            raise ValueError(f"Invalid colour '{text}', expected #RRGGBB")
+        r, g, b = bytes.fromhex(text[1:])
+        return (r & 0xE0) | ((g >> 5) << 2) | (b >> 6)
+    value = int(text, 0)
+    if not 0 <= value <= 0xFF:
+        raise ValueError(f"Colour {text} is not an R3G3B2 byte")
+    return value
+
+def encode_bitmaps(bitmaps, encoding='raw', tile_size=TILE_SIZE, transparent=DEFAULT_TRANSPARENT):
+    """Encode raw bitmaps for write_combined_header.
+    transparent is the colour "spans" leaves out; every span table is walked and checked against its bitmap,
+    and every "aligned" bitmap is drawn on a simulated framebuffer and checked the same way.
+    Returns (encoded_bitmaps, tile_dictionary, stats): tile_dictionary holds the shared tiles for "tiles"
+    and is None otherwise, stats holds an RleStats, TileStats, PaletteStats, SpanStats or LayoutStats
+    per bitmap and is None for "raw"."""
+    if encoding == 'raw':
+        return bitmaps, None, None
+
+    if encoding == 'tiles':
+        tile_dictionary, tile_maps, stats = build_tile_dictionary(bitmaps, tile_size)
+        encoded_bitmaps = [(var_name, width, height, tile_map)
+                           for (var_name, width, height, _), tile_map in zip(bitmaps, tile_maps)]
+        return encoded_bitmaps, tile_dictionary, stats
+
+    if encoding == 'rle':
+        encode = rle_encode
+    elif encoding == 'palette':
+        encode = palette_encode
+    elif encoding == 'spans':
+        def encode(width, height, bitmap_data):
+            encoded, bitmap_stats = spans_encode(width, height, bitmap_data, transparent)
+            rows = verify_spans(width, height, bitmap_data, encoded)
+            if rows:
+                raise ValueError(f"Span table of {width}x{height} bitmap differs from the source in rows {rows[:8]}")
+            return encoded, bitmap_stats
+    elif encoding == 'aligned':
+        def encode(width, height, bitmap_data):
+            encoded, bitmap_stats = align_rows(width, height, bitmap_data)
+            problems = validate_aligned_layout(width, height, encoded, bitmap_data)
+            if problems:
+                raise ValueError(f"Aligned {width}x{height} bitmap: " + "; ".join(problems))
+            return encoded, bitmap_stats
+    else:
+        raise ValueError(f"Unknown bitmap encoding '{encoding}'")
+
+    encoded_bitmaps = []
+    stats = []
+    for var_name, width, height, bitmap_data in bitmaps:
+        encoded, bitmap_stats = encode(width, height, bitmap_data)
+        encoded_bitmaps.append((var_name, width, height, encoded))
+        stats.append(bitmap_stats)
+    return encoded_bitmaps, None, stats
+
+def format_rle_report(bitmaps, stats):
+    """Format the per-asset RLE report: raw and compressed bytes and the estimated decode cost."""
+    names = [var_name.replace('_bitmap_data', '') for var_name, _, _, _ in bitmaps]
+    name_width = max([len(name) for name in names] + [6])
+    lines = [f"{'bitmap':<{name_width}} {'raw':>8} {'rle':>8} {'ratio':>6} {'packets':>8} {'cycles':>9} {'raw cycles':>10}"]
+    for name, s in zip(names, stats):
+        lines.append(f"{name:<{name_width}} {s.raw_bytes:8d} {s.rle_bytes:8d} "
+                     f"{s.rle_bytes / max(1, s.raw_bytes):6.2f} {s.packets:8d} {s.decode_cycles:9d} {s.raw_cycles:10d}")
+    raw_total = sum(s.raw_bytes for s in stats)
+    rle_total = sum(s.rle_bytes for s in stats)
+    lines.append(f"{'total':<{name_width}} {raw_total:8d} {rle_total:8d} {rle_total / max(1, raw_total):6.2f} "
+                 f"{sum(s.packets for s in stats):8d} {sum(s.decode_cycles for s in stats):9d} "
+                 f"{sum(s.raw_cycles for s in stats):10d}")
+    return "\n".join(lines)
+
+def format_tile_report(bitmaps, stats, tile_size=TILE_SIZE):
+    """Format the tile dictionary report: tiles and newly added tiles per asset and the overall dedupe ratio."""
+    names = [var_name.replace('_bitmap_data', '') for var_name, _, _, _ in bitmaps]
+    name_width = max([len(name) for name in names] + [6])
+    lines = [f"{'bitmap':<{name_width}} {'raw':>8} {'map':>8} {'tiles':>6} {'new':>6}"]
+    for name, s in zip(names, stats):
+        lines.append(f"{name:<{name_width}} {s.raw_bytes:8d} {s.map_bytes:8d} {s.tiles:6d} {s.new_tiles:6d}")
+
+    total_tiles = sum(s.tiles for s in stats)
+    unique_tiles = sum(s.new_tiles for s in stats)
+    raw_total = sum(s.raw_bytes for s in stats)
+    map_total = sum(s.map_bytes for s in stats)
+    dictionary_bytes = unique_tiles * tile_size * tile_size
+    lines.append(f"{'total':<{name_width}} {raw_total:8d} {map_total:8d} {total_tiles:6d} {unique_tiles:6d}")
+    lines.append(f"{unique_tiles} unique of {total_tiles} tiles, dedupe ratio {1 - unique_tiles / max(1, total_tiles):.1%}")
+    lines.append(f"dictionary {dictionary_bytes} + maps {map_total} = {dictionary_bytes + map_total} bytes "
+                 f"({(dictionary_bytes + map_total) / max(1, raw_total):.2f} of {raw_total} raw)")
+    return "\n".join(lines)
+
+def format_transform_report(bitmaps, transforms):
+    """Format which bitmaps are stored as a flip/rotation of another one and the bytes that saves."""
+    lines = []
+    saved = 0
+    for (var_name, _, _, bitmap_data), transform in zip(bitmaps, transforms):
+        if transform:
+            source_index, transform_id = transform
+            source_name = bitmaps[source_index][0].replace('_bitmap_data', '')
+            lines.append(f"{var_name.replace('_bitmap_data', '')} = {TRANSFORM_NAMES[transform_id]} of {source_name}")
+            saved += len(bitmap_data) - len(transform_descriptor(0, 0, source_index, transform_id))
+    stored = sum(1 for transform in transforms if not transform)
+    lines.append(f"{stored} of {len(bitmaps)} bitmaps stored, {len(bitmaps) - stored} as transforms, {saved} bytes saved")
+    return "\n".join(lines)
+
+def format_palette_report(bitmaps, stats):
+    """Format the palette report: colours, chosen depth and bytes per asset."""
+    names = [var_name.replace('_bitmap_data', '') for var_name, _, _, _ in bitmaps]
+    name_width = max([len(name) for name in names] + [6])
+    lines = [f"{'bitmap':<{name_width}} {'colors':>6} {'bpp':>3} {'raw':>8} {'palette':>8} {'ratio':>6}"]
+    for name, s in zip(names, stats):
+        lines.append(f"{name:<{name_width}} {s.colors:6d} {s.bpp:3d} {s.raw_bytes:8d} {s.encoded_bytes:8d} "
+                     f"{s.encoded_bytes / max(1, s.raw_bytes):6.2f}")
+    raw_total = sum(s.raw_bytes for s in stats)
+    encoded_total = sum(s.encoded_bytes for s in stats)
+    lines.append(f"{'total':<{name_width}} {'':6} {'':3} {raw_total:8d} {encoded_total:8d} "
+                 f"{encoded_total / max(1, raw_total):6.2f}")
+    for bpp in (1, 2, 4, 8):
+        count = sum(1 for s in stats if s.bpp == bpp)
+        if count:
+            lines.append(f"{count} bitmap(s) at {bpp} bpp")
+    return "\n".join(lines)
+
+def format_span_report(bitmaps, stats):
+    """Format the transparency report: opaque pixels, spans and bytes per asset."""
+    names = [var_name.replace('_bitmap_data', '') for var_name, _, _, _ in bitmaps]
+    name_width = max([len(name) for name in names] + [6])
+    lines = [f"{'bitmap':<{name_width}} {'opaque':>7} {'spans':>6} {'raw':>8} {'spans':>8} {'ratio':>6}"]
+    for name, (_, width, height, _), s in zip(names, bitmaps, stats):
+        lines.append(f"{name:<{name_width}} {s.opaque_pixels / max(1, width * height):7.1%} {s.spans:6d} "
+                     f"{s.raw_bytes:8d} {s.span_bytes:8d} {s.span_bytes / max(1, s.raw_bytes):6.2f}")
+    raw_total = sum(s.raw_bytes for s in stats)
+    span_total = sum(s.span_bytes for s in stats)
+    lines.append(f"{'total':<{name_width}} {'':7} {sum(s.spans for s in stats):6d} {raw_total:8d} {span_total:8d} "
+                 f"{span_total / max(1, raw_total):6.2f}")
+    return "\n".join(lines)
+
+def format_layout_report(bitmaps, stats):
+    """Format the aligned layout report: stride and padding per asset."""
+    names = [var_name.replace('_bitmap_data', '') for var_name, _, _, _ in bitmaps]
+    name_width = max([len(name) for name in names] + [6])
+    lines = [f"{'bitmap':<{name_width}} {'width':>5} {'stride':>6} {'raw':>8} {'aligned':>8} {'padding':>7}"]
+    for name, (_, width, _, _), s in zip(names, bitmaps, stats):
+        lines.append(f"{name:<{name_width}} {width:5d} {s.stride:6d} {s.raw_bytes:8d} {s.aligned_bytes:8d} "
+                     f"{s.aligned_bytes - s.raw_bytes:7d}")
+    raw_total = sum(s.raw_bytes for s in stats)
+    aligned_total = sum(s.aligned_bytes for s in stats)
+    lines.append(f"{'total':<{name_width}} {'':5} {'':6} {raw_total:8d} {aligned_total:8d} {aligned_total - raw_total:7d}")
+    return "\n".join(lines)
+
+def format_atlas_report(atlas, stats, written=True):
+    """Format the atlas report: trimmed size and place of every bitmap, and how well the pages are filled.
+    written is False when write_atlas_if_smaller wrote a raw header instead."""
+    names = [var_name.replace('_bitmap_data', '') for var_name in atlas.names]
+    name_width = max([len(name) for name in names] + [6])
+    lines = [f"{'bitmap':<{name_width}} {'size':>9} {'trimmed':>9} {'page':>4} {'position':>9}"]
+    for name, r in zip(names, atlas.rects):
+        lines.append(f"{name:<{name_width}} {f'{r.full_width}x{r.full_height}':>9} {f'{r.width}x{r.height}':>9} "
+                     f"{r.page:4d} {f'{r.x},{r.y}':>9}")
+    for index, page in enumerate(atlas.pages):
+        used = sum(r.width * r.height for r in atlas.rects if r.page == index)
+        lines.append(f"page {index}: {page.shape[1]}x{page.shape[0]}, {used / max(1, page.size):.1%} filled")
+    lines.append(f"{len(atlas.rects)} bitmaps on {stats.pages} page(s): trimmed to "
+                 f"{stats.sprite_pixels / max(1, stats.full_pixels):.1%} of their pixels, packing efficiency {stats.sprite_pixels / max(1, stats.page_pixels):.1%}, "
+                 f"{stats.raw_bytes} raw bytes -> {stats.atlas_bytes} atlas bytes")
+    if stats.atlas_bytes > stats.raw_bytes:
+        lines.append(f"Warning: the atlas is {stats.atlas_bytes - stats.raw_bytes} bytes larger than the raw bitmaps"
+                     + ("" if written else ", a raw header was written instead"))
+    return "\n".join(lines)
+
+def format_encoding_report(bitmaps, encoding, stats, tile_size=TILE_SIZE):
+    """Format the report of encode_bitmaps stats for encoding."""
+    if encoding == 'rle':
+        return format_rle_report(bitmaps, stats)
+    if encoding == 'palette':
+        return format_palette_report(bitmaps, stats)
+    if encoding == 'spans':
+        return format_span_report(bitmaps, stats)
+    if encoding == 'aligned':
+        return format_layout_report(bitmaps, stats)
+    if encoding == 'tiles':
+        return format_tile_report(bitmaps, stats, tile_size)
+    return f"{len(bitmaps)} raw bitmaps, {sum(len(bitmap_data) for _, _, _, bitmap_data in bitmaps)} bytes"
+
+def write_atlas_if_smaller(output_file, bitmaps, page_size=DEFAULT_PAGE_SIZE, trim=None, header_version=None):
+    """Write bitmaps as an atlas header (see build_atlas), or as a raw combined header when the atlas would
+    take more bytes, e.g. for bitmaps without a background to trim.
+    Returns (atlas, stats, written): written tells whether the atlas was written."""
+    atlas, stats = build_atlas(bitmaps, page_size, trim)
+    if stats.atlas_bytes > stats.raw_bytes:
+        write_combined_header(output_file, bitmaps, header_version=header_version)
+        return atlas, stats, False
+    write_atlas_header(output_file, atlas)
+    return atlas, stats, True
+
+def write_combined_header(output_file, bitmaps, encoding='raw', tile_size=TILE_SIZE, transforms=None,
+                          transparent=DEFAULT_TRANSPARENT, header_version=None):
     """Write a combined header file with the given bitmaps.
-    bitmaps: list of tuples (var_name, width, height, bitmap_data)"""
+    bitmaps: list of tuples (var_name, width, height, bitmap_data) with raw bitmap_data
+    encoding: "raw", "rle", "tiles", "palette", "spans" or "aligned" (see BITMAP_ENCODINGS)
+    tile_size: tile width and height for "tiles"
+    transparent: R3G3B2 colour that "spans" does not draw
+    header_version: 1 (low bytes of the size) or 2 (16-bit size and format byte, see bitmap_header);
+                    None picks 2 only when a bitmap is larger than 255 pixels
+    transforms: result of find_transformed_duplicates(bitmaps) to store flipped/rotated copies as a
+                transform of their source (raw encoding only), or None to store every bitmap
+    Returns the per-bitmap stats of encode_bitmaps (None for "raw")."""
+    if transforms is not None and encoding != 'raw':
+        raise ValueError("Flipped/rotated bitmaps can only be stored as transforms in raw headers")
+
+    # Ensure output directory exists
+    out_dir = os.path.dirname(output_file)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    encoded_bitmaps, tile_dictionary, stats = encode_bitmaps(bitmaps, encoding, tile_size, transparent)
+    # The label after "// name (WxH)" records the format of every bitmap
+    if encoding == 'palette':
+        label_suffixes = [f" palette {bitmap_stats.bpp}bpp" for bitmap_stats in stats]
+    else:
+        label_suffixes = ["" if encoding == 'raw' else f" {encoding}"] * len(bitmaps)
+    if transforms is None or not any(transforms):
+        transforms = [None] * len(bitmaps)
+    header_version = header_version_for(bitmaps, header_version)
+    # Offset of the first row of every aligned bitmap, taken from the data as it is written
+    rows_offsets = []
+
     with open(output_file, 'w', newline='\n') as f:
         f.write("#ifndef BITMAPS_H\n")
         f.write("#define BITMAPS_H\n\n")
@@ -387,21 +865,73 @@ def write_combined_header(output_file, bitmaps):
         
         # Write define for total number of bitmaps
         f.write(f"#define NUM_BITMAPS {len(bitmaps)}\n\n")
+        if header_version == 2:
+            f.write("// Bitmap data starts with a version 2 header: 0, 0, version, format, uint16 width, uint16 height\n")
+            f.write("#define BITMAP_HEADER_VERSION 2\n\n")
+        if encoding == 'rle':
+            f.write("// Bitmap data is run-length encoded: width, height, then PackBits packets per row\n")
+            f.write("#define BITMAP_ENCODING_RLE 1\n\n")
+        elif encoding == 'palette':
+            f.write("// Bitmap data is width, height, bits per pixel, palette size, palette, then rows of palette indices\n")
+            f.write("// packed MSB first (every row starts on a new byte); 8 bits per pixel has no palette\n")
+            f.write("#define BITMAP_ENCODING_PALETTE 1\n\n")
+        elif encoding == 'spans':
+            f.write("// Bitmap data is width, height, transparent colour, 0, a uint16 row index into the spans (height + 1),\n")
+            f.write("// per opaque span uint16 x, uint16 length, uint32 payload offset, then the opaque pixels (little-endian)\n")
+            f.write("#define BITMAP_ENCODING_SPANS 1\n")
+            f.write(f"#define BITMAP_TRANSPARENT 0x{transparent:02X}\n\n")
+        elif encoding == 'aligned':
+            f.write("// Bitmap data is width, height, little-endian uint16 stride, then rows of stride bytes (pixels + zero padding).\n")
+            f.write("// Arrays and rows start on a word, so every row is one memcpy or DMA transfer of width bytes.\n")
+            f.write("#define BITMAP_LAYOUT_ALIGNED 1\n\n")
+            f.write("typedef struct {\n")
+            f.write("    uint16_t width;\n")
+            f.write("    uint16_t height;\n")
+            f.write("    uint16_t stride;\n")
+            f.write("    const uint8_t *pixels;\n")
+            f.write("} BitmapLayout;\n\n")
+        elif encoding == 'tiles':
+            f.write(f"// Bitmap data is a tile map into {TILE_DICTIONARY_NAME}: width, height, tile size, tiles per row,\n")
+            f.write("// then a little-endian uint16 tile index per tile\n")
+            f.write("#define BITMAP_ENCODING_TILES 1\n")
+            f.write(f"#define BITMAP_TILE_SIZE {tile_size}\n")
+            f.write(f"#define NUM_BITMAP_TILES {len(tile_dictionary) // (tile_size * tile_size)}\n\n")
+            f.write("// Shared tile dictionary\n")
+            f.write(f"const uint8_t {TILE_DICTIONARY_NAME}[{len(tile_dictionary)}] = {{\n")
+            write_hex_rows(f, tile_dictionary)
+            f.write("\n};\n\n")
+        if any(transforms):
+            f.write("// Transform to draw every bitmap with (0 = stored as is). A transformed bitmap holds width, height,\n")
+            f.write("// transform and the little-endian index of its source bitmap instead of pixels.\n")
+            f.write("// 1 flip_h, 2 flip_v, 3 rotate_180, 4 rotate_90, 5 rotate_270, 6 transpose, 7 antitranspose, 8 copy\n")
+            f.write("#define BITMAP_TRANSFORMS 1\n")
+            f.write("const uint8_t bitmap_transforms[NUM_BITMAPS] = {")
+            f.write(", ".join(str(transform[1] if transform else 0) for transform in transforms))
+            f.write("};\n\n")
 
         # Write all bitmap arrays
-        for var_name, width, height, bitmap_data in bitmaps:
+        for (var_name, width, height, bitmap_data), (_, _, _, raw_data), transform, label_suffix in zip(
+                encoded_bitmaps, bitmaps, transforms, label_suffixes):
             name_base = var_name.replace('_bitmap_data', '')
-            f.write(f"// {name_base} ({width}x{height})\n")
-            f.write(f"const uint8_t {var_name}[{len(bitmap_data)}] = {{\n")
+            if transform:
+                source_index, transform_id = transform
+                source_name = bitmaps[source_index][0].replace('_bitmap_data', '')
+                f.write(f"// {name_base} ({width}x{height}) transform: {TRANSFORM_NAMES[transform_id]} of {source_name}\n")
+                bitmap_data = transform_descriptor(width, height, source_index, transform_id)
+            else:
+                f.write(f"// {name_base} ({width}x{height}){label_suffix}\n")
+            if header_version == 2:
+                bitmap_data = to_header_v2(width, height, bitmap_data, 'transform' if transform else encoding)
+            if encoding == 'aligned':
+                # Check the bytes that end up in the header, after the header version change
+                problems = validate_aligned_layout(width, height, bitmap_data, raw_data)
+                if problems:
+                    raise ValueError(f"Aligned {width}x{height} bitmap {name_base}: " + "; ".join(problems))
+                rows_offsets.append(aligned_header(bitmap_data)[1])
+            attribute = " __attribute__((aligned(4)))" if encoding == 'aligned' else ""
+            f.write(f"const uint8_t {var_name}[{len(bitmap_data)}]{attribute} = {{\n")
 
-            for i, byte in enumerate(bitmap_data):
-                if i % 16 == 0:
-                    f.write("    ")
-                f.write(f"0x{byte:02X}")
-                if i < len(bitmap_data) - 1:
-                    f.write(", ")
-                if (i + 1) % 16 == 0:
-                    f.write("\n")
+            write_hex_rows(f, bitmap_data)
 
             f.write("\n};\n\n")
 
@@ -415,12 +945,122 @@ def write_combined_header(output_file, bitmaps):
             f.write("\n")
         f.write("};\n\n")
 
+        if encoding == 'aligned':
+            f.write("// Full size, row stride and first row of every bitmap\n")
+            f.write("const BitmapLayout bitmap_layout[NUM_BITMAPS] = {\n")
+            f.write(",\n".join(f"    {{{width}, {height}, {s.stride}, {var_name} + {rows_offset}}}"
+                               for (var_name, width, height, _), s, rows_offset in zip(bitmaps, stats, rows_offsets)))
+            f.write("\n};\n\n")
+
         f.write("#endif // BITMAPS_H\n")
 
+    return stats
+
+def natural_sort_key(path):
+    """Sort key that puts "Dance_Skel (2).png" before "Dance_Skel (10).png"."""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', os.path.basename(path))]
+
+def animation_name(png_file):
+    """Animation name from a frame file name: "Dance_Skel (1).png" -> "Dance_Skel"."""
+    name = os.path.splitext(os.path.basename(png_file))[0]
+    name = re.sub(r'[\s_-]*\(?\d+\)?$', '', name) or name
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+def create_animation(png_files, output_file, name=None, max_workers=None, use_cache=True, resize=None, sheet=None,
+                     header_version=None):
+    """Convert an ordered frame sequence and write it as a keyframe + delta frames animation header.
+    png_files may also be one sprite sheet (cut with sheet, a SheetSpec) or animated GIF/APNG.
+    resize: optional ResizeSpec every frame is resampled to.
+    header_version: header of the keyframe, see write_animation_header.
+    Returns (frames, stats): the raw bitmap data of every frame and the DeltaStats of every frame."""
+    bitmaps, error_list = convert_pngs_to_bitmap_data(png_files, max_workers, use_cache,
+                                                      resize=[resize] if resize else None, sheet=sheet)
+    if error_list:
+        raise Exception("Failed to convert images:\n" + "\n".join(error_list))
+
+    frames = [(width, height, bitmap_data) for _, width, height, bitmap_data in bitmaps]
+    keyframe, deltas, stats = encode_animation(frames)
+    width, height, _ = frames[0]
+    write_animation_header(output_file, name or animation_name(png_files[0]), width, height, keyframe, deltas,
+                           header_version)
+    return frames, stats
+
+def verify_animation_header(header_file, frames):
+    """Play an animation header back with the Python decoder and compare every frame to frames
+    (list of (width, height, bitmap_data)). Returns a list of the frame numbers that differ."""
+    _, width, height, keyframe, deltas = load_animation_header(header_file)
+    played = list(play_animation(width, height, keyframe, deltas))
+    mismatches = [index for index, (played_frame, (_, _, bitmap_data)) in enumerate(zip(played, frames))
+                  if played_frame != bitmap_data]
+    mismatches += list(range(min(len(played), len(frames)), max(len(played), len(frames))))
+    return mismatches
+
+def format_animation_report(stats):
+    """Format the per-frame animation report: dirty rectangles, pixels drawn and bytes against full frames."""
+    lines = [f"{'frame':>5} {'rects':>6} {'pixels':>8} {'bytes':>8} {'full':>8}"]
+    for index, s in enumerate(stats):
+        lines.append(f"{index:5d} {s.rects:6d} {s.dirty_pixels:8d} {s.delta_bytes:8d} {s.frame_bytes:8d}")
+    delta_total = sum(s.delta_bytes for s in stats)
+    full_total = sum(s.frame_bytes for s in stats)
+    pixels_total = sum(s.dirty_pixels for s in stats)
+    full_pixels = sum(s.frame_bytes - 2 for s in stats)
+    lines.append(f"{'total':>5} {sum(s.rects for s in stats):6d} {pixels_total:8d} {delta_total:8d} {full_total:8d}")
+    lines.append(f"{delta_total / max(1, full_total):.2f} of the full-frame bytes, "
+                 f"{pixels_total / max(1, full_pixels):.2f} of the full-frame pixels drawn")
+    return "\n".join(lines)
+
+def optimize_bitmaps(bitmaps, min_psnr=DEFAULT_MIN_PSNR, max_workers=None, tile_size=TILE_SIZE):
+    """Search the smallest encoding of every bitmap that keeps min_psnr, on a process pool.
+    Returns an OptimizeResult per bitmap, in order."""
+    jobs = [(width, height, bitmap_data, min_psnr, tile_size) for _, width, height, bitmap_data in bitmaps]
+    results = []
+    error_list = []
+    for (var_name, _, _, _), (result, error) in zip(bitmaps, run_parallel(optimize_bitmap, jobs, max_workers)):
+        if error is None:
+            results.append(result)
+        else:
+            error_list.append(f"{var_name.replace('_bitmap_data', '')}: {error}")
+    if error_list:
+        raise Exception("Failed to optimize bitmaps:\n" + "\n".join(error_list))
+    return results
+
+def apply_optimization(bitmaps, results, encoding):
+    """Return bitmaps reduced to the colour count each one uses for encoding in its optimize results."""
+    return [(var_name, width, height, quantize_bitmap(width, height, bitmap_data, result.candidates[encoding][1]))
+            for (var_name, width, height, bitmap_data), result in zip(bitmaps, results)]
+
+def format_optimize_report(bitmaps, results):
+    """Format the optimizer report: chosen encoding, colours, PSNR and bytes saved per asset."""
+    names = [var_name.replace('_bitmap_data', '') for var_name, _, _, _ in bitmaps]
+    name_width = max([len(name) for name in names] + [6])
+    lines = [f"{'bitmap':<{name_width}} {'encoding':<8} {'colors':>6} {'psnr':>6} {'raw':>8} {'best':>8} {'saved':>8}"]
+    for name, r in zip(names, results):
+        psnr = "exact" if r.psnr == float('inf') else f"{r.psnr:6.1f}"
+        lines.append(f"{name:<{name_width}} {r.encoding:<8} {r.colors:6d} {psnr:>6} {r.raw_bytes:8d} "
+                     f"{r.encoded_bytes:8d} {r.raw_bytes - r.encoded_bytes:8d}")
+    raw_total = sum(r.raw_bytes for r in results)
+    best_total = sum(r.encoded_bytes for r in results)
+    lines.append(f"{'total':<{name_width}} {'':8} {'':6} {'':6} {raw_total:8d} {best_total:8d} {raw_total - best_total:8d}")
+
+    # A combined header stores every bitmap in one encoding
+    totals = encoding_totals(results)
+    lines.append("Whole header per encoding (tile dictionaries counted per bitmap): " +
+                 ", ".join(f"{encoding} {size}" for encoding, size in totals.items()))
+    return "\n".join(lines)
+
+def write_bitmap_pack_files(bin_file, bitmaps, header_version=None):
+    """Write bitmaps as a .bin pack with a matching .h header and .S (.incbin) file next to it.
+    header_version: see write_bitmap_pack. Returns the path of the header file."""
+    base = os.path.splitext(bin_file)[0]
+    header_file = base + ".h"
+    write_bitmap_pack(bitmaps, bin_file, header_file, asm_file=base + ".S", header_version=header_version)
+    return header_file
+
 def show_reorder_dialog_for_bitmaps(parent, bitmaps):
     """Show a dialog to reorder bitmaps before saving.
     bitmaps: list of tuples (var_name, width, height, bitmap_data)
     Returns: reordered list of bitmaps, or None if cancelled."""
+    from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QListWidget
     
     # Create a copy so we don't modify the original
     bitmaps = list(bitmaps)
@@ -488,6 +1128,8 @@ def show_reorder_dialog_for_bitmaps(parent, bitmaps):
 
 def reorder_bitmaps_dialog(parent=None):
     """Load a combined header file and reorder the bitmaps."""
+    from PyQt6.QtWidgets import QFileDialog, QMessageBox, QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QListWidget
+
     header_path, _ = QFileDialog.getOpenFileName(
         parent,
         "Select combined .h file to reorder",
@@ -498,7 +1140,7 @@ def reorder_bitmaps_dialog(parent=None):
         return
     
     try:
-        bitmaps = parse_combined_header(header_path)
+        bitmaps, encoding, transformed = read_combined_header(header_path)
         if not bitmaps:
             QMessageBox.warning(parent, "No Bitmaps", "No bitmaps found in the header file.")
             return
@@ -561,8 +1203,16 @@ def reorder_bitmaps_dialog(parent=None):
     
     def save_reordered():
         try:
-            # Write the reordered header file
-            write_combined_header(header_path, bitmaps)
+            if encoding == 'atlas':
+                write_atlas_header(header_path, reorder_atlas(load_atlas_header(header_path),
+                                                              [bitmap[0] for bitmap in bitmaps]))
+                QMessageBox.information(dlg, "Success", f"Bitmaps reordered and saved to:\n{header_path}")
+                dlg.accept()
+                return
+            # Write the reordered header file; transforms must point back to earlier bitmaps, so find them again
+            transforms = find_transformed_duplicates(bitmaps) if transformed else None
+            write_combined_header(header_path, bitmaps, encoding, transforms=transforms,
+                                  transparent=read_transparent_color(header_path))
             QMessageBox.information(dlg, "Success", f"Bitmaps reordered and saved to:\n{header_path}")
             dlg.accept()
         except Exception as e:
@@ -573,46 +1223,382 @@ def reorder_bitmaps_dialog(parent=None):
     
     dlg.exec()
 
+def clear_cache_dialog(parent=None):
+    """Remove all cached PNG conversions."""
+    from PyQt6.QtWidgets import QMessageBox
+
+    try:
+        removed = purge_cache()
+        QMessageBox.information(parent, "Cache Cleared", f"Removed {removed} cached conversion(s).")
+    except Exception as e:
+        QMessageBox.critical(parent, "Error", f"Failed to clear cache:\n{e}")
+
 def main_menu():
+    from PyQt6.QtWidgets import QApplication, QDialog, QVBoxLayout, QPushButton
+
     app = QApplication(sys.argv)
 
     dlg = QDialog()
     dlg.setWindowTitle("PNG to Bitmap Converter")
-    dlg.resize(320, 260)
+    dlg.resize(320, 320)
     layout = QVBoxLayout(dlg)
 
     btn_convert = QPushButton("Convert Single PNG to .h", dlg)
     btn_batch = QPushButton("Batch Convert Multiple PNGs", dlg)
     btn_combine = QPushButton("Combine Multiple PNGs into 1 .h", dlg)
     btn_reorder = QPushButton("Reorder Bitmaps in .h File", dlg)
+    btn_animation = QPushButton("Create Delta-Frame Animation .h", dlg)
     btn_load = QPushButton("Load and show .h bitmap", dlg)
+    btn_clear_cache = QPushButton("Clear Conversion Cache", dlg)
     btn_exit = QPushButton("Exit", dlg)
 
     layout.addWidget(btn_convert)
     layout.addWidget(btn_batch)
     layout.addWidget(btn_combine)
     layout.addWidget(btn_reorder)
+    layout.addWidget(btn_animation)
     layout.addWidget(btn_load)
+    layout.addWidget(btn_clear_cache)
     layout.addWidget(btn_exit)
 
     btn_convert.clicked.connect(lambda: pick_and_convert(dlg))
     btn_batch.clicked.connect(lambda: batch_convert(dlg))
     btn_combine.clicked.connect(lambda: combine_multiple_bitmaps(dlg))
     btn_reorder.clicked.connect(lambda: reorder_bitmaps_dialog(dlg))
+    btn_animation.clicked.connect(lambda: create_animation_dialog(dlg))
     btn_load.clicked.connect(lambda: load_bitmap_dialog(dlg))
+    btn_clear_cache.clicked.connect(lambda: clear_cache_dialog(dlg))
     btn_exit.clicked.connect(dlg.accept)
 
     dlg.exec()
 
-if __name__ == "__main__":
+def read_order_file(order_file):
+    """Read bitmap names from an order file: one name per line, blank lines and # comments ignored.
+    Names may be given with or without the _bitmap_data suffix."""
+    names = []
+    with open(order_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            name = line.split('#', 1)[0].strip()
+            if name:
+                names.append(name if name.endswith('_bitmap_data') else f"{name}_bitmap_data")
+    return names
+
+def reorder_bitmaps(bitmaps, names):
+    """Return bitmaps in the order given by names (variable names).
+    Bitmaps that are not named keep their relative order after the named ones.
+    Raises ValueError for names that are not in bitmaps."""
+    by_name = {bitmap[0]: bitmap for bitmap in bitmaps}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise ValueError("Unknown bitmap name(s): " + ", ".join(unknown))
+
+    ordered = [by_name[name] for name in dict.fromkeys(names)]
+    named = set(names)
+    ordered += [bitmap for bitmap in bitmaps if bitmap[0] not in named]
+    return ordered
+
+def resize_options(args):
+    """Return (resize, sizes) from the --resize, --filter and --sizes arguments."""
+    resize = [parse_resize_spec(spec, args.filter) for spec in args.resize] if args.resize else None
+    sizes = read_sizes_file(args.sizes, args.filter) if args.sizes else None
+    return resize, sizes
+
+def sheet_options(args):
+    """Return the SheetSpec of the --grid, --rects and --frames arguments, or None."""
+    if args.grid and args.rects:
+        raise ValueError("Give either --grid or --rects")
+    if not (args.grid or args.rects or args.frames):
+        return None
+    return SheetSpec(parse_grid(args.grid) if args.grid else None, args.frames, args.rects)
+
+def cli_convert(args):
+    output_file = args.output or os.path.splitext(args.png)[0] + ".h"
+    specs = resize_specs_for(args.png, *resize_options(args))
+    if len(specs) > 1:
+        print("convert writes one bitmap, use batch or combine for several sizes", file=sys.stderr)
+        return 1
+    png_to_c_bitmap(args.png, output_file, use_filename=True, use_cache=not args.no_cache,
+                    header_version=args.header_version, resize=specs[0])
+    print(f"Wrote {output_file}")
+    return 0
+
+def cli_batch(args):
+    resize, sizes = resize_options(args)
+    jobs = []
+    job_pngs = []
+    for png_path in args.pngs:
+        filename_base = os.path.splitext(os.path.basename(png_path))[0]
+        specs = resize_specs_for(png_path, resize, sizes)
+        for spec in specs:
+            # Several sizes give one .h file per pre-scaled variant
+            variant = len(specs) > 1
+            output_name = variant_name(filename_base, spec.width, spec.height) if variant else filename_base
+            jobs.append((png_path, os.path.join(args.output_dir, f"{output_name}.h"), True, not args.no_cache,
+                         args.header_version, spec, variant))
+            job_pngs.append(png_path)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    error_list = []
+    for png_path, (_, error) in zip(job_pngs, run_parallel(png_to_c_bitmap, jobs, args.workers)):
+        if error is not None:
+            error_list.append(f"{os.path.basename(png_path)}: {error}")
+
+    print(f"Successfully converted {len(jobs) - len(error_list)} out of {len(jobs)} images.")
+    if error_list:
+        print("\nErrors:\n" + "\n".join(error_list), file=sys.stderr)
+        return 1
+    return 0
+
+def cli_combine(args):
+    if args.tolerance is not None and args.transparent is None:
+        print("--tolerance needs --transparent", file=sys.stderr)
+        return 1
+    if args.pack and (args.encoding != 'raw' or args.dedupe):
+        print("--pack only stores raw bitmaps, it can not be combined with --encoding or --dedupe", file=sys.stderr)
+        return 1
+    if args.atlas and (args.pack or args.encoding != 'raw' or args.dedupe):
+        print("--atlas writes its own pages, it can not be combined with --pack, --encoding or --dedupe", file=sys.stderr)
+        return 1
+    if args.trim is not None and not args.atlas:
+        print("--trim needs --atlas", file=sys.stderr)
+        return 1
+
+    bitmaps, error_list = convert_pngs_to_bitmap_data(args.pngs, args.workers, not args.no_cache,
+                                                      args.transparent, args.tolerance, *resize_options(args),
+                                                      sheet_options(args))
+    if error_list:
+        print("Failed to convert images:\n" + "\n".join(error_list), file=sys.stderr)
+        return 1
+
+    bitmaps = [(f"{name}_bitmap_data", width, height, data) for name, width, height, data in bitmaps]
+    if args.order:
+        bitmaps = reorder_bitmaps(bitmaps, read_order_file(args.order))
+
+    if args.pack:
+        bin_file = os.path.splitext(args.output)[0] + ".bin"
+        header_file = write_bitmap_pack_files(bin_file, bitmaps, args.header_version)
+        print(f"Wrote {len(bitmaps)} bitmaps to {bin_file} ({os.path.getsize(bin_file)} bytes) and {header_file}")
+    elif args.atlas:
+        atlas, stats, written = write_atlas_if_smaller(args.output, bitmaps, args.page_size, args.trim,
+                                                       args.header_version)
+        print(f"Wrote {len(bitmaps)} bitmaps to {args.output}" + ("" if written else " as a raw header"))
+        print(format_atlas_report(atlas, stats, written))
+    else:
+        transforms = find_transformed_duplicates(bitmaps) if args.dedupe else None
+        transparent = DEFAULT_TRANSPARENT if args.transparent is None else args.transparent
+        stats = write_combined_header(args.output, bitmaps, args.encoding, args.tile_size, transforms, transparent,
+                                      args.header_version)
+        print(f"Wrote {len(bitmaps)} bitmaps to {args.output}")
+        if stats:
+            print(format_encoding_report(bitmaps, args.encoding, stats, args.tile_size))
+        if transforms:
+            print(format_transform_report(bitmaps, transforms))
+    return 0
+
+def cli_reorder(args):
+    bitmaps, encoding, transformed = read_combined_header(args.header)
+    if not bitmaps:
+        print(f"No bitmaps found in {args.header}", file=sys.stderr)
+        return 1
+
+    output_file = args.output or args.header
+    bitmaps = reorder_bitmaps(bitmaps, read_order_file(args.order))
+    if encoding == 'atlas':
+        # Only the rectangle table changes, the pages stay packed as they are
+        write_atlas_header(output_file, reorder_atlas(load_atlas_header(args.header), [bitmap[0] for bitmap in bitmaps]))
+        print(f"Wrote {len(bitmaps)} bitmaps to {output_file}")
+        return 0
+    transforms = find_transformed_duplicates(bitmaps) if transformed else None
+    write_combined_header(output_file, bitmaps, encoding, transforms=transforms,
+                          transparent=read_transparent_color(args.header))
+    print(f"Wrote {len(bitmaps)} bitmaps to {output_file}")
+    return 0
+
+def cli_inspect(args):
+    bitmaps = load_bitmaps(args.header)
+    if not bitmaps:
+        # Single bitmap header without "// name (WxH)" comments
+        width, height, bitmap_data = load_bitmap_from_header(args.header)
+        bitmaps = [("bitmap_data", width, height, bitmap_data)]
+
+    print(f"{args.header}: {len(bitmaps)} bitmap(s)")
+    for index, (var_name, width, height, bitmap_data) in enumerate(bitmaps):
+        status = "" if len(bitmap_data) == width * height + 2 else f"  (expected {width * height + 2} bytes)"
+        print(f"  {index:3d}  {var_name.replace('_bitmap_data', '')}  {width}x{height}  {len(bitmap_data)} bytes{status}")
+
+    if args.report:
+        stats = encode_bitmaps(bitmaps, args.report, args.tile_size)[2]
+        print(format_encoding_report(bitmaps, args.report, stats, args.tile_size))
+
+    if args.export:
+        os.makedirs(args.export, exist_ok=True)
+        images = r3g3b2_to_images([(width, height, data) for _, width, height, data in bitmaps])
+        for (var_name, _, _, _), img in zip(bitmaps, images):
+            img.save(os.path.join(args.export, var_name.replace('_bitmap_data', '') + ".png"))
+        print(f"Exported {len(images)} preview(s) to {args.export}")
+    return 0
+
+def cli_animate(args):
+    png_files = sorted(args.pngs, key=natural_sort_key) if args.natural_sort else args.pngs
+    name = args.name or animation_name(png_files[0])
+    output_file = args.output or f"{name}_anim.h"
+    resize = resize_options(args)[0]
+    if resize and len(resize) > 1:
+        print("An animation has one frame size, give one --resize", file=sys.stderr)
+        return 1
+    frames, stats = create_animation(png_files, output_file, name, args.workers, not args.no_cache,
+                                     resize[0] if resize else None, sheet_options(args), args.header_version)
+    print(f"Wrote {len(frames)} frames of {name} to {output_file}")
+    print(format_animation_report(stats))
+
+    if args.verify:
+        mismatches = verify_animation_header(output_file, frames)
+        if mismatches:
+            print("Playback differs in frame(s): " + ", ".join(map(str, mismatches)), file=sys.stderr)
+            return 1
+        print("Playback matches all frames.")
+    return 0
+
+def cli_optimize(args):
+    resize, sizes = resize_options(args)
+    bitmaps, error_list = convert_pngs_to_bitmap_data(args.pngs, args.workers, not args.no_cache,
+                                                      resize=resize, sizes=sizes, sheet=sheet_options(args))
+    if error_list:
+        print("Failed to convert images:\n" + "\n".join(error_list), file=sys.stderr)
+        return 1
+
+    bitmaps = [(f"{name}_bitmap_data", width, height, data) for name, width, height, data in bitmaps]
+    results = optimize_bitmaps(bitmaps, args.min_psnr, args.workers, args.tile_size)
+    print(format_optimize_report(bitmaps, results))
+
+    if args.output:
+        encoding = args.encoding or best_file_encoding(results)
+        optimized = apply_optimization(bitmaps, results, encoding)
+        write_combined_header(args.output, optimized, encoding, args.tile_size)
+        print(f"Wrote {len(optimized)} bitmaps to {args.output} ({encoding}, {os.path.getsize(args.output)} bytes)")
+    return 0
+
+def cli_purge_cache(args):
+    print(f"Removed {purge_cache()} cached conversion(s).")
+    return 0
+
+def main(argv=None):
     import argparse
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(description="Convert PNG images to R3G3B2 C bitmap headers. Without a command the GUI is started.")
     parser.add_argument('--load', action='store_true', help='Load and display bitmap from .h file')
-    args = parser.parse_args()
-    
+    subparsers = parser.add_subparsers(dest='command')
+
+    # Options shared by every converting command
+    convert_options = argparse.ArgumentParser(add_help=False)
+    convert_options.add_argument('--no-cache', action='store_true', help='Do not use the conversion cache')
+    convert_options.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: all cores)')
+    convert_options.add_argument('--resize', action='append', metavar='[MODE:]WxH[:FILTER]',
+                                 help='Resample every PNG in the workers; MODE is fit (default), fill or exact, within '
+                                      '320x240. Give it more than once for pre-scaled variants named like Wolf_32x32')
+    convert_options.add_argument('--filter', choices=RESIZE_FILTERS, default=DEFAULT_FILTER,
+                                 help=f'Resampling filter (default: {DEFAULT_FILTER})')
+    convert_options.add_argument('--sizes', metavar='FILE',
+                                 help='Per-PNG sizes: lines of "name SIZE [SIZE ...]", used instead of --resize for those PNGs')
+
+    # Options of the commands that take sprite sheets; animated GIF/APNG files are always cut into frames
+    sheet_options_parser = argparse.ArgumentParser(add_help=False)
+    sheet_options_parser.add_argument('--grid', metavar='COLSxROWS', help='Cut every input as a sprite sheet of equal cells')
+    sheet_options_parser.add_argument('--rects', metavar='JSON',
+                                      help='Cut every input with the frame rectangles of a JSON file (TexturePacker/Aseprite or a plain list)')
+    sheet_options_parser.add_argument('--frames', type=int, metavar='N', help='Keep only the first N frames of a sheet or animation')
+
+    # Options of every command that writes bitmap headers
+    header_options = argparse.ArgumentParser(add_help=False)
+    header_options.add_argument('--header-version', type=int, choices=(1, 2),
+                                help='Bitmap header version: 1 stores the low byte of width and height, '
+                                     '2 16-bit sizes and a format byte (default: 2 only for bitmaps over 255 pixels)')
+
+    p = subparsers.add_parser('convert', parents=[convert_options, header_options], help='Convert one PNG to a .h file')
+    p.add_argument('png')
+    p.add_argument('-o', '--output', help='Output .h file (default: next to the PNG)')
+    p.set_defaults(func=cli_convert)
+
+    p = subparsers.add_parser('batch', parents=[convert_options, header_options], help='Convert PNGs to one .h file each')
+    p.add_argument('pngs', nargs='+')
+    p.add_argument('-o', '--output-dir', required=True, help='Directory for the .h files')
+    p.set_defaults(func=cli_batch)
+
+    p = subparsers.add_parser('combine', parents=[convert_options, sheet_options_parser, header_options], help='Combine PNGs into one .h file')
+    p.add_argument('pngs', nargs='+')
+    p.add_argument('-o', '--output', default='Bitmaps.h', help='Output .h file (default: Bitmaps.h)')
+    p.add_argument('--order', help='Order file with one bitmap name per line')
+    p.add_argument('--pack', action='store_true', help='Write the data to a .bin pack (plus .h and .S) instead of a hex header')
+    p.add_argument('--encoding', choices=BITMAP_ENCODINGS, default='raw',
+                   help='How to store the bitmap data (default: raw); prints a report for the encoded ones')
+    p.add_argument('--rle', action='store_const', dest='encoding', const='rle', help='Same as --encoding rle')
+    p.add_argument('--tile-size', type=int, default=TILE_SIZE, help=f'Tile size for --encoding tiles (default: {TILE_SIZE})')
+    p.add_argument('--dedupe', action='store_true', help='Store exact copies, flips and rotations of earlier bitmaps as transforms (raw only)')
+    p.add_argument('--transparent', nargs='?', type=parse_color, const=DEFAULT_TRANSPARENT, metavar='COLOR',
+                   help='Transparent colour as #RRGGBB or R3G3B2 byte (default 0xE3); PNG alpha is mapped to it '
+                        'and --encoding spans leaves it out')
+    p.add_argument('--tolerance', type=int, metavar='N',
+                   help='With --transparent, also make pixels whose channels are all within N of that colour transparent')
+    p.add_argument('--atlas', action='store_true', help='Pack all bitmaps onto shared atlas pages with a rectangle table')
+    p.add_argument('--page-size', type=parse_page_size, default=DEFAULT_PAGE_SIZE, metavar='WxH',
+                   help=f'Largest atlas page (default: {DEFAULT_PAGE_SIZE[0]}x{DEFAULT_PAGE_SIZE[1]})')
+    p.add_argument('--trim', nargs='?', type=lambda text: text if text == 'auto' else parse_color(text), const='auto',
+                   metavar='COLOR', help='Trim a background colour (#RRGGBB or R3G3B2 byte) off every atlas bitmap; '
+                                         'without COLOR, or with "auto", the most common border colour of each bitmap')
+    p.set_defaults(func=cli_combine)
+
+    p = subparsers.add_parser('animate', parents=[convert_options, sheet_options_parser, header_options], help='Encode a frame sequence as a keyframe plus delta frames')
+    p.add_argument('pngs', nargs='+', help='Frames in playback order')
+    p.add_argument('-o', '--output', help='Output .h file (default: <name>_anim.h)')
+    p.add_argument('--name', help='Animation name (default: first frame name without its number)')
+    p.add_argument('--natural-sort', action='store_true', help='Order the frames by the numbers in their names')
+    p.add_argument('--verify', action='store_true', help='Play the written header back and compare it to the frames')
+    p.set_defaults(func=cli_animate)
+
+    p = subparsers.add_parser('optimize', parents=[convert_options, sheet_options_parser],
+                              help='Find the smallest encoding per PNG that keeps a minimum PSNR against R3G3B2')
+    p.add_argument('pngs', nargs='+')
+    p.add_argument('--min-psnr', type=float, default=DEFAULT_MIN_PSNR,
+                   help=f'Minimum PSNR in dB for reduced colours (default: {DEFAULT_MIN_PSNR:g})')
+    p.add_argument('--tile-size', type=int, default=TILE_SIZE, help=f'Tile size for the tiles encoding (default: {TILE_SIZE})')
+    p.add_argument('-o', '--output', help='Also write the optimized bitmaps as a combined .h file')
+    p.add_argument('--encoding', choices=BITMAP_ENCODINGS,
+                   help='Encoding of the --output header (default: the smallest in total)')
+    p.set_defaults(func=cli_optimize)
+
+    p = subparsers.add_parser('reorder', help='Reorder the bitmaps of a combined .h file')
+    p.add_argument('header')
+    p.add_argument('--order', required=True, help='Order file with one bitmap name per line')
+    p.add_argument('-o', '--output', help='Output .h file (default: overwrite the input)')
+    p.set_defaults(func=cli_reorder)
+
+    p = subparsers.add_parser('inspect', help='List the bitmaps in a .h file or .bin pack')
+    p.add_argument('header')
+    p.add_argument('--export', metavar='DIR', help='Also write a PNG preview of every bitmap to DIR')
+    p.add_argument('--report', choices=BITMAP_ENCODINGS[1:], help='Print how well the bitmaps would encode')
+    p.add_argument('--rle-report', action='store_const', dest='report', const='rle', help='Same as --report rle')
+    p.add_argument('--tile-size', type=int, default=TILE_SIZE, help=f'Tile size for --report tiles (default: {TILE_SIZE})')
+    p.set_defaults(func=cli_inspect)
+
+    p = subparsers.add_parser('purge-cache', help='Remove all cached conversions')
+    p.set_defaults(func=cli_purge_cache)
+
+    args = parser.parse_args(argv)
+
+    if args.command:
+        try:
+            return args.func(args)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+
     if args.load:
         # If user called with --load, still create an app and open the load dialog directly
+        from PyQt6.QtWidgets import QApplication
         app = QApplication(sys.argv)
         load_bitmap_dialog(None)
     else:
-        main_menu()
\ No newline at end of file
+        main_menu()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import json
+import os
+import re
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+from bitmap_codec import rgb_to_r3g3b2
+from image_resize import resize_image
+
+# Frames come from one decode of the file: a sprite sheet is decoded once and cut into frame rectangles,
+# an animated GIF/APNG is decoded frame by frame in a single pass into one (frames, height, width, 4) stack.
+# The colour conversion then runs once over the whole sheet or stack and every frame is an array view of it.
+
+_GRID = re.compile(r'^(\d+)x(\d+)$')
+
+# How to cut a sprite sheet: grid (columns, rows) or rects_file (JSON frame rectangles), and count to keep
+# only the first frames. Animated images need no SheetSpec; count still applies to them.
+SheetSpec = namedtuple('SheetSpec', ['grid', 'count', 'rects_file'])
+
+
+def parse_grid(text):
+    """Parse "COLUMNSxROWS", e.g. "6x7". Returns (columns, rows)."""
+    match = _GRID.match(text.strip())
+    if not match or 0 in (int(match.group(1)), int(match.group(2))):
+        raise ValueError(f"Invalid grid '{text}', expected COLUMNSxROWS")
+    return int(match.group(1)), int(match.group(2))
+
+
+def grid_rects(width, height, columns, rows, count=None):
+    """Frame rectangles (x, y, width, height) of a sheet of equal cells, row by row.
+    count limits the number of frames when the last row is not full."""
+    if width % columns or height % rows:
+        raise ValueError(f"A {width}x{height} sheet does not divide into {columns}x{rows} cells")
+    cell_width, cell_height = width // columns, height // rows
+    rects = [(column * cell_width, row * cell_height, cell_width, cell_height)
+             for row in range(rows) for column in range(columns)]
+    return rects[:count] if count else rects
+
+
+def _rect(entry):
+    # TexturePacker/Aseprite entries nest the rectangle in "frame", plain lists hold it directly
+    frame = entry.get('frame', entry) if isinstance(entry, dict) else entry
+    if isinstance(frame, dict):
+        return int(frame['x']), int(frame['y']), int(frame['w']), int(frame['h'])
+    x, y, w, h = frame
+    return int(x), int(y), int(w), int(h)
+
+
+def read_frame_rects(json_file):
+    """Read frame rectangles (x, y, width, height) from a JSON file, in file order. Accepted are the
+    TexturePacker/Aseprite hash and array exports ({"frames": {...}} or {"frames": [...]}) and plain lists of
+    {"x", "y", "w", "h"} objects or [x, y, w, h] lists."""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    frames = data.get('frames', data) if isinstance(data, dict) else data
+    entries = frames.values() if isinstance(frames, dict) else frames
+    try:
+        return [_rect(entry) for entry in entries]
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid frame rectangle in {json_file}: {e}")
+
+
+def is_animated(path):
+    """Whether path is an image with more than one frame (animated GIF, APNG, ...); only reads the header."""
+    with Image.open(path) as img:
+        return getattr(img, 'is_animated', False)
+
+
+def decode_frames(path):
+    """Decode every frame of an animated image in one pass. Returns a (frames, height, width, 4) RGBA array."""
+    with Image.open(path) as img:
+        return np.stack([np.asarray(frame.convert('RGBA'), dtype=np.uint8) for frame in ImageSequence.Iterator(img)])
+
+
+def frame_names(base, count):
+    """Stable names for count frames: Dance_Skel_00, Dance_Skel_01, ... (more digits from 100 frames on)."""
+    digits = max(2, len(str(count - 1)))
+    return [f"{base}_{index:0{digits}d}" for index in range(count)]
+
+
+def load_frames(path, grid=None, count=None, rects_file=None, transparent=None, tolerance=None, resize=None):
+    """Cut a sprite sheet (grid (columns, rows) or rects_file) or an animated image into frames.
+    Returns a list of (name, width, height, bitmap_data) tuples like png_to_bitmap_data, named with frame_names.
+    Module-level so run_parallel can send it to the worker processes."""
+    base = re.sub(r'[^a-zA-Z0-9_]', '_', os.path.splitext(os.path.basename(path))[0])
+
+    if grid is None and rects_file is None:
+        stack = decode_frames(path)
+        if count:
+            stack = stack[:count]
+        frames = list(stack)
+    else:
+        with Image.open(path) as img:
+            sheet = np.asarray(img.convert('RGBA'), dtype=np.uint8)
+        height, width = sheet.shape[:2]
+        if rects_file:
+            rects = read_frame_rects(rects_file)
+            rects = rects[:count] if count else rects
+        else:
+            rects = grid_rects(width, height, *grid, count)
+        for x, y, w, h in rects:
+            if x < 0 or y < 0 or w <= 0 or h <= 0 or x + w > width or y + h > height:
+                raise ValueError(f"Frame {w}x{h}+{x}+{y} is outside the {width}x{height} sheet")
+        frames = [sheet[y:y + h, x:x + w] for x, y, w, h in rects]
+        stack = sheet
+
+    if resize is not None:
+        # Resampling gives every frame its own pixels, so it is done per frame
+        frames = [np.asarray(resize_image(Image.fromarray(frame), resize), dtype=np.uint8) for frame in frames]
+        colors = [rgb_to_r3g3b2(frame[..., :3], frame[..., 3], transparent, tolerance) for frame in frames]
+    else:
+        # One conversion over the whole sheet or frame stack, then the same views into the result
+        converted = rgb_to_r3g3b2(stack[..., :3], stack[..., 3], transparent, tolerance)
+        if grid is None and rects_file is None:
+            colors = list(converted[:len(frames)])
+        else:
+            colors = [converted[y:y + h, x:x + w] for x, y, w, h in rects]
+
+    bitmaps = []
+    for name, pixels in zip(frame_names(base, len(colors)), colors):
+        height, width = pixels.shape
+        bitmap_data = bytearray([width & 0xFF, height & 0xFF])
+        bitmap_data += pixels.tobytes()
+        bitmaps.append((name, width, height, bitmap_data))
+    return bitmaps
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The converters import each other as top-level modules, like when they are run from Python/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def raw_bitmap():
+    """Make raw bitmap data (width & 0xFF, height & 0xFF, one R3G3B2 byte per pixel) of random pixels.
+    colors limits the pixels to that many values, runs repeats every pixel that many times in a row."""
+    rng = np.random.default_rng(1234)
+
+    def make(width, height, colors=256, runs=1):
+        values = rng.choice(256, size=min(colors, 256), replace=False).astype(np.uint8)
+        pixels = np.repeat(rng.choice(values, size=-(-width * height // runs)), runs)[:width * height]
+        return bytearray([width & 0xFF, height & 0xFF]) + pixels.astype(np.uint8).tobytes()
+
+    return make
+
+
+@pytest.fixture
+def combined_round_trip(tmp_path):
+    """Write bitmaps with write_combined_header and read them back with read_combined_header.
+    Returns (bitmaps, encoding, header_text): the decoded bitmaps, the encoding read back and the header."""
+    import png2bit
+
+    def round_trip(bitmaps, encoding='raw', **options):
+        header_file = str(tmp_path / 'bitmaps.h')
+        png2bit.write_combined_header(header_file, bitmaps, encoding, **options)
+        decoded, read_encoding, _ = png2bit.read_combined_header(header_file)
+        with open(header_file) as f:
+            return decoded, read_encoding, f.read()
+
+    return round_trip
@@ -0,0 +1,69 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import png2bit
+from bitmap_atlas import atlas_bitmaps, build_atlas, load_atlas_header, write_atlas_header
+
+IMAGES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Images', '*.png')))
+
+
+def keyed_sprite(width, height, box, background, seed):
+    """Raw bitmap data of random pixels inside box (x, y, width, height) on a background colour."""
+    rng = np.random.default_rng(seed)
+    pixels = np.full((height, width), background, dtype=np.uint8)
+    x, y, w, h = box
+    pixels[y:y + h, x:x + w] = rng.choice([value for value in range(256) if value != background], size=(h, w))
+    return bytearray([width & 0xFF, height & 0xFF]) + pixels.tobytes()
+
+
+def test_pages_are_cropped_to_their_rectangles(tmp_path):
+    bitmaps = [(f'sprite{index}_bitmap_data', 40, 30, keyed_sprite(40, 30, (3 + index, 2, 20 + index, 11), 0xE3, index))
+               for index in range(5)]
+    atlas, stats = build_atlas(bitmaps, trim='auto')
+    for index, page in enumerate(atlas.pages):
+        rects = [rect for rect in atlas.rects if rect.page == index]
+        assert page.shape == (max(r.y + r.height for r in rects), max(r.x + r.width for r in rects))
+    assert stats.atlas_bytes < stats.raw_bytes
+
+    header_file = str(tmp_path / 'atlas.h')
+    write_atlas_header(header_file, atlas)
+    loaded = load_atlas_header(header_file)
+    assert [page.shape for page in loaded.pages] == [page.shape for page in atlas.pages]
+    assert atlas_bitmaps(loaded) == bitmaps
+
+
+@pytest.mark.skipif(not IMAGES, reason="no sample images")
+def test_atlas_of_the_sample_images_is_not_larger_than_raw(tmp_path):
+    raw_file = str(tmp_path / 'raw.h')
+    atlas_file = str(tmp_path / 'atlas.h')
+    assert png2bit.main(['combine', *IMAGES, '--no-cache', '--workers', '1', '-o', raw_file]) == 0
+    assert png2bit.main(['combine', *IMAGES, '--no-cache', '--workers', '1', '--atlas', '--trim', '-o', atlas_file]) == 0
+    assert os.path.getsize(atlas_file) <= os.path.getsize(raw_file)
+    raw_bitmaps, _, _ = png2bit.read_combined_header(raw_file)
+    assert png2bit.read_combined_header(atlas_file)[0] == raw_bitmaps
+
+
+@pytest.mark.skipif(not IMAGES, reason="no sample images")
+def test_sample_sprites_with_a_margin_are_written_as_an_atlas(tmp_path):
+    # The sample images centred on 200x160 magenta canvases, like sprites exported with padding
+    pngs = []
+    for path in IMAGES[::8]:
+        with Image.open(path) as image:
+            sprite = image.convert('RGB')
+        if sprite.width > 200 or sprite.height > 160:
+            continue
+        canvas = Image.new('RGB', (200, 160), (255, 0, 255))
+        canvas.paste(sprite, ((200 - sprite.width) // 2, (160 - sprite.height) // 2))
+        pngs.append(str(tmp_path / os.path.basename(path)))
+        canvas.save(pngs[-1])
+
+    atlas_file = str(tmp_path / 'atlas.h')
+    assert png2bit.main(['combine', *pngs, '--no-cache', '--workers', '1', '--atlas', '--trim', '-o', atlas_file]) == 0
+    bitmaps, encoding, _ = png2bit.read_combined_header(atlas_file)
+    assert encoding == 'atlas'
+    atlas, stats = build_atlas(bitmaps, trim='auto')
+    assert stats.atlas_bytes <= stats.raw_bytes
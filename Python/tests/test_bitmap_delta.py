@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from bitmap_delta import encode_animation, load_animation_header, play_animation, write_animation_header
+
+
+def make_frames(width, height, count):
+    """A sprite moving over a noisy background: every frame differs from the one before in a few places."""
+    rng = np.random.default_rng(11)
+    background = rng.integers(0, 256, (height, width), dtype=np.uint8)
+    frames = []
+    for index in range(count):
+        pixels = background.copy()
+        pixels[index % height, :] = 0xFF
+        pixels[(2 * index) % height:(2 * index) % height + 3, index % width] = index
+        frames.append((width, height, bytearray([width & 0xFF, height & 0xFF]) + pixels.tobytes()))
+    return frames
+
+
+@pytest.mark.parametrize('width, height', [(1, 1), (16, 12), (40, 9)])
+def test_round_trip(width, height):
+    frames = make_frames(width, height, 6)
+    keyframe, deltas, stats = encode_animation(frames)
+    played = list(play_animation(width, height, keyframe, deltas))
+    assert played == [bitmap_data for _, _, bitmap_data in frames]
+    assert len(stats) == len(frames)
+
+
+def test_unchanged_frame_has_an_empty_delta():
+    frames = make_frames(8, 8, 1) * 2
+    _, deltas, _ = encode_animation(frames)
+    assert deltas == [bytearray(b'\x00\x00')]
+
+
+def test_frames_of_different_sizes_are_rejected():
+    with pytest.raises(ValueError):
+        encode_animation(make_frames(8, 8, 1) + make_frames(9, 8, 1))
+
+
+@pytest.mark.parametrize('width, header_version', [(32, None), (300, None), (32, 2)])
+def test_header_round_trip(tmp_path, width, header_version):
+    frames = make_frames(width, 5, 4)
+    keyframe, deltas, _ = encode_animation(frames)
+    header_file = str(tmp_path / 'walk_anim.h')
+    write_animation_header(header_file, 'walk', width, 5, keyframe, deltas, header_version)
+    with open(header_file) as f:
+        assert ('BITMAP_HEADER_VERSION 2' in f.read()) == (width > 255 or header_version == 2)
+
+    name, read_width, read_height, read_keyframe, read_deltas = load_animation_header(header_file)
+    assert (name, read_width, read_height) == ('walk', width, 5)
+    played = list(play_animation(read_width, read_height, read_keyframe, read_deltas))
+    assert played == [bitmap_data for _, _, bitmap_data in frames]
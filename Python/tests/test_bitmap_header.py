@@ -0,0 +1,133 @@
+import re
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import png2bit
+from bitmap_header import (
+    BITMAP_FORMATS,
+    HEADER_V2_SIZE,
+    header_version_for,
+    read_bitmap_header,
+    to_header_v1,
+    to_header_v2,
+)
+from bitmap_layout import ROW_ALIGN, align_rows, aligned_header, validate_aligned_layout
+from bitmap_pack import load_bitmap_pack, write_bitmap_pack
+
+
+@pytest.mark.parametrize('bitmap_format', BITMAP_FORMATS)
+@pytest.mark.parametrize('width, height', [(3, 2), (300, 2), (2, 700)])
+def test_round_trip(raw_bitmap, bitmap_format, width, height):
+    bitmap_data = raw_bitmap(width, height)
+    header_v2 = to_header_v2(width, height, bitmap_data, bitmap_format)
+    assert read_bitmap_header(header_v2) == (2, bitmap_format, width, height)
+    if bitmap_format != 'aligned':
+        assert len(header_v2) == HEADER_V2_SIZE + len(bitmap_data) - 2
+    assert to_header_v1(header_v2) == bitmap_data
+
+
+def test_version_1_data_is_left_alone(raw_bitmap):
+    bitmap_data = raw_bitmap(4, 5)
+    assert read_bitmap_header(bitmap_data) == (1, None, 4, 5)
+    assert to_header_v1(bitmap_data) is bitmap_data
+
+
+def test_header_version_for():
+    assert header_version_for([('a', 255, 255, b'')]) == 1
+    assert header_version_for([('a', 255, 255, b''), ('b', 256, 1, b'')]) == 2
+    assert header_version_for([('a', 1, 1, b'')], header_version=2) == 2
+    assert header_version_for([('a', 300, 1, b'')], header_version=1) == 1
+
+
+def test_sizes_over_16_bits_are_rejected(raw_bitmap):
+    with pytest.raises(ValueError):
+        to_header_v2(0x10000, 1, raw_bitmap(1, 1))
+
+
+@pytest.mark.parametrize('width, height', [(17, 5), (320, 240)])
+def test_aligned_rows_stay_on_a_word(raw_bitmap, width, height):
+    bitmap_data = raw_bitmap(width, height)
+    aligned, _ = align_rows(width, height, bitmap_data)
+    header_v2 = to_header_v2(width, height, aligned, 'aligned')
+    assert aligned_header(header_v2)[1] % ROW_ALIGN == 0
+    assert validate_aligned_layout(width, height, header_v2, bitmap_data) == []
+    assert to_header_v1(header_v2) == aligned
+
+
+def test_aligned_combined_header_with_version_2(raw_bitmap, combined_round_trip):
+    bitmaps = [('bg_bitmap_data', 320, 240, raw_bitmap(320, 240)), ('icon_bitmap_data', 5, 3, raw_bitmap(5, 3))]
+    decoded, encoding, header_text = combined_round_trip(bitmaps, 'aligned')
+    assert encoding == 'aligned'
+    assert decoded == bitmaps
+    assert 'BITMAP_HEADER_VERSION 2' in header_text
+    assert '{320, 240, 320, bg_bitmap_data + 12}' in header_text
+    assert '{5, 3, 8, icon_bitmap_data + 12}' in header_text
+
+
+@pytest.mark.parametrize('encoding', png2bit.BITMAP_ENCODINGS)
+def test_combined_header_keeps_large_sizes(raw_bitmap, combined_round_trip, encoding):
+    # Aligned bitmaps have to fit the 320x240 display
+    tall = 240 if encoding == 'aligned' else 260
+    bitmaps = [('wide_bitmap_data', 300, 4, raw_bitmap(300, 4, 4, 3)), ('tall_bitmap_data', 3, tall, raw_bitmap(3, tall, 4, 3))]
+    decoded, read_encoding, header_text = combined_round_trip(bitmaps, encoding)
+    assert read_encoding == encoding
+    assert decoded == bitmaps
+    assert 'BITMAP_HEADER_VERSION 2' in header_text
+
+
+def test_bitmap_pack_keeps_large_sizes(raw_bitmap, tmp_path):
+    bitmaps = [('wide_bitmap_data', 300, 4, raw_bitmap(300, 4)), ('small_bitmap_data', 3, 3, raw_bitmap(3, 3))]
+    bin_file = str(tmp_path / 'bitmaps.bin')
+    write_bitmap_pack(bitmaps, bin_file, str(tmp_path / 'bitmaps.h'))
+    with open(bin_file, 'rb') as f:
+        pack = f.read()
+    # Every payload gets the version 2 header: 0, 0, version, format, width, height
+    assert pack.count(bytes([0, 0, 2, 0, 44, 1, 4, 0])) == 1
+    assert pack.count(bytes([0, 0, 2, 0, 3, 0, 3, 0])) == 1
+    assert [(name, width, height, bytes(data)) for name, width, height, data in load_bitmap_pack(bin_file)] == \
+        [(name, width, height, bytes(data)) for name, width, height, data in bitmaps]
+
+
+def test_png_writers_keep_large_sizes(tmp_path):
+    png_file = str(tmp_path / 'wide.png')
+    Image.fromarray(np.random.default_rng(17).integers(0, 256, (3, 270, 3), dtype=np.uint8)).save(png_file)
+    expected = png2bit.png_to_bitmap_data(png_file, use_cache=False)
+
+    single = str(tmp_path / 'single.h')
+    png2bit.png_to_c_bitmap(png_file, single, use_cache=False)
+    assert png2bit.load_bitmap_from_header(single) == (270, 3, expected[3])
+
+    combined = str(tmp_path / 'combined.h')
+    png2bit.combine_bitmaps_to_file([png_file], combined, max_workers=1, use_cache=False)
+    with open(combined) as f:
+        assert re.search(r'#define BITMAP_HEADER_VERSION 2', f.read())
+    assert png2bit.load_bitmaps(combined) == [('wide_bitmap_data', 270, 3, expected[3])]
+
+
+@pytest.mark.parametrize('width', [20, 300])
+def test_spans_reorder_keeps_the_transparent_key(tmp_path, width):
+    # Key 0x1C in a ring around opaque noise; a version 2 header puts its version byte where version 1 has the key
+    rng = np.random.default_rng(18)
+    pixels = rng.choice([value for value in range(256) if value != 0x1C], size=(6, width)).astype(np.uint8)
+    pixels[:, :3] = pixels[:, -3:] = 0x1C
+    bitmaps = [('a_bitmap_data', width, 6, bytearray([width & 0xFF, 6]) + pixels.tobytes()),
+               ('b_bitmap_data', 4, 4, bytearray([4, 4]) + bytes([0x1C]) * 16)]
+    header_file = str(tmp_path / 'sprites.h')
+    png2bit.write_combined_header(header_file, bitmaps, 'spans', transparent=0x1C)
+    assert png2bit.read_transparent_color(header_file) == 0x1C
+    with open(header_file) as f:
+        written = f.read()
+
+    order_file = tmp_path / 'order.txt'
+    order_file.write_text("b\na\n")
+    reordered = str(tmp_path / 'reordered.h')
+    assert png2bit.main(['reorder', header_file, '--order', str(order_file), '-o', reordered]) == 0
+    with open(reordered) as f:
+        text = f.read()
+    assert 'BITMAP_TRANSPARENT 0x1C' in text
+    assert text.count('0x') == written.count('0x')
+    decoded, encoding, _ = png2bit.read_combined_header(reordered)
+    assert encoding == 'spans'
+    assert decoded == bitmaps[::-1]
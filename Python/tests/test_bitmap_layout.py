@@ -0,0 +1,49 @@
+import re
+
+import pytest
+
+from bitmap_layout import (
+    ALIGNED_HEADER,
+    ROW_ALIGN,
+    align_rows,
+    aligned_header,
+    aligned_rows,
+    unalign_rows,
+    validate_aligned_layout,
+)
+
+
+@pytest.mark.parametrize('width, height', [(1, 1), (4, 3), (5, 2), (13, 7), (320, 240)])
+def test_round_trip(raw_bitmap, width, height):
+    bitmap_data = raw_bitmap(width, height)
+    aligned, stats = align_rows(width, height, bitmap_data)
+    stride, rows_offset = aligned_header(aligned)
+    assert stride == stats.stride and stride % ROW_ALIGN == 0 and stride - width < ROW_ALIGN
+    assert rows_offset == ALIGNED_HEADER
+    assert unalign_rows(width, height, aligned) == bitmap_data
+    assert aligned_rows(width, height, aligned).tobytes() == bytes(bitmap_data[2:])
+    assert validate_aligned_layout(width, height, aligned, bitmap_data) == []
+
+
+def test_validation_catches_bad_layouts(raw_bitmap):
+    bitmap_data = raw_bitmap(6, 3)
+    aligned, _ = align_rows(6, 3, bitmap_data)
+
+    padding_written = bytearray(aligned)
+    padding_written[ALIGNED_HEADER + 7] = 1
+    assert validate_aligned_layout(6, 3, padding_written, bitmap_data)
+
+    assert validate_aligned_layout(6, 3, aligned[:-1], bitmap_data)
+    assert validate_aligned_layout(6, 3, aligned, raw_bitmap(6, 3))
+
+
+def test_combined_header_rows_start_on_a_word(raw_bitmap, combined_round_trip):
+    bitmaps = [(f"b{index}_bitmap_data", width, height, raw_bitmap(width, height))
+               for index, (width, height) in enumerate([(5, 3), (16, 2), (30, 9)])]
+    decoded, encoding, header_text = combined_round_trip(bitmaps, 'aligned')
+    assert encoding == 'aligned'
+    assert decoded == bitmaps
+
+    layouts = re.findall(r'\{(\d+), (\d+), (\d+), (\w+) \+ (\d+)\}', header_text)
+    assert [(int(width), int(height)) for width, height, _, _, _ in layouts] == [(5, 3), (16, 2), (30, 9)]
+    assert all(int(stride) % ROW_ALIGN == 0 and int(offset) % ROW_ALIGN == 0 for _, _, stride, _, offset in layouts)
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from bitmap_palette import pack_indices, palette_decode, palette_encode, unpack_indices
+
+
+@pytest.mark.parametrize('colors', [1, 2, 3, 4, 16, 17, 256])
+@pytest.mark.parametrize('width', [1, 7, 8, 13])
+def test_round_trip_picks_smallest_depth(raw_bitmap, colors, width):
+    bitmap_data = raw_bitmap(width, 40, colors)
+    used = len(set(bitmap_data[2:]))
+    encoded, stats = palette_encode(width, 40, bitmap_data)
+    assert stats.colors == used
+    assert stats.bpp == next(bpp for limit, bpp in ((2, 1), (4, 2), (16, 4), (256, 8)) if used <= limit)
+    assert stats.encoded_bytes == len(encoded)
+    assert palette_decode(width, 40, encoded) == bitmap_data
+
+
+@pytest.mark.parametrize('bpp', [1, 2, 4, 8])
+def test_index_packing_round_trip(bpp):
+    indices = np.random.default_rng(bpp).integers(0, 1 << bpp, (5, 11), dtype=np.uint8)
+    packed = pack_indices(indices, bpp)
+    assert len(packed) == 5 * -(-11 * bpp // 8)
+    assert np.array_equal(unpack_indices(packed, 11, 5, bpp), indices)
+
+
+def test_combined_header_round_trip(raw_bitmap, combined_round_trip):
+    bitmaps = [(f"b{index}_bitmap_data", 12, 6, raw_bitmap(12, 6, colors)) for index, colors in enumerate([2, 4, 16, 40])]
+    decoded, encoding, header_text = combined_round_trip(bitmaps, 'palette')
+    assert encoding == 'palette'
+    assert decoded == bitmaps
+    for bpp in (1, 2, 4, 8):
+        assert f"palette {bpp}bpp" in header_text
@@ -0,0 +1,36 @@
+import pytest
+
+from bitmap_rle import rle_decode, rle_encode
+
+
+@pytest.mark.parametrize('width, height, colors, runs', [
+    (1, 1, 256, 1),
+    (16, 8, 256, 1),    # only literals
+    (200, 3, 2, 300),   # runs longer than one packet
+    (37, 11, 4, 5),     # runs and literals mixed, runs cut at row ends
+])
+def test_round_trip(raw_bitmap, width, height, colors, runs):
+    bitmap_data = raw_bitmap(width, height, colors, runs)
+    encoded, stats = rle_encode(width, height, bitmap_data)
+    assert rle_decode(width, height, encoded) == bitmap_data
+    assert stats.rle_bytes == len(encoded)
+
+
+def test_flat_bitmap_compresses(raw_bitmap):
+    bitmap_data = raw_bitmap(64, 64, colors=1)
+    encoded, _ = rle_encode(64, 64, bitmap_data)
+    assert len(encoded) < len(bitmap_data) // 20
+
+
+def test_truncated_stream_is_rejected(raw_bitmap):
+    encoded, _ = rle_encode(20, 4, raw_bitmap(20, 4))
+    with pytest.raises(ValueError):
+        rle_decode(20, 4, encoded[:-1])
+
+
+def test_combined_header_round_trip(raw_bitmap, combined_round_trip):
+    bitmaps = [(f"b{index}_bitmap_data", width, height, raw_bitmap(width, height, 3, 4))
+               for index, (width, height) in enumerate([(10, 10), (33, 7)])]
+    decoded, encoding, _ = combined_round_trip(bitmaps, 'rle')
+    assert encoding == 'rle'
+    assert decoded == bitmaps
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from bitmap_spans import DEFAULT_TRANSPARENT, spans_decode, spans_encode, verify_spans, walk_spans
+
+
+def keyed_bitmap(width, height, transparent=DEFAULT_TRANSPARENT, seed=15):
+    """Random opaque pixels (never the transparent colour) with a transparent disc cut out."""
+    rng = np.random.default_rng(seed)
+    pixels = rng.choice([value for value in range(256) if value != transparent], size=(height, width)).astype(np.uint8)
+    y, x = np.ogrid[:height, :width]
+    pixels[(x - width / 2) ** 2 + (y - height / 2) ** 2 < (min(width, height) / 3) ** 2] = transparent
+    pixels[:, 0] = transparent
+    return bytearray([width & 0xFF, height & 0xFF]) + pixels.tobytes()
+
+
+@pytest.mark.parametrize('width, height', [(1, 1), (12, 12), (31, 7)])
+@pytest.mark.parametrize('transparent', [DEFAULT_TRANSPARENT, 0x00])
+def test_round_trip(width, height, transparent):
+    bitmap_data = keyed_bitmap(width, height, transparent)
+    encoded, stats = spans_encode(width, height, bitmap_data, transparent)
+    assert spans_decode(width, height, encoded) == bitmap_data
+    assert verify_spans(width, height, bitmap_data, encoded) == []
+    assert stats.opaque_pixels == sum(1 for value in bitmap_data[2:] if value != transparent)
+
+
+def test_spans_only_cover_opaque_pixels():
+    bitmap_data = keyed_bitmap(20, 10)
+    encoded, stats = spans_encode(20, 10, bitmap_data)
+    pixels = np.frombuffer(bytes(bitmap_data[2:]), dtype=np.uint8).reshape(10, 20)
+    spans = list(walk_spans(20, 10, encoded))
+    assert len(spans) == stats.spans
+    for y, x, span_pixels in spans:
+        assert bytes(span_pixels) == pixels[y, x:x + len(span_pixels)].tobytes()
+        assert DEFAULT_TRANSPARENT not in bytes(span_pixels)
+
+
+def test_fully_transparent_bitmap_has_no_spans():
+    bitmap_data = bytearray([5, 4]) + bytes([DEFAULT_TRANSPARENT]) * 20
+    encoded, stats = spans_encode(5, 4, bitmap_data)
+    assert stats.spans == 0
+    assert spans_decode(5, 4, encoded) == bitmap_data
+
+
+def test_combined_header_round_trip(combined_round_trip):
+    bitmaps = [('a_bitmap_data', 16, 9, keyed_bitmap(16, 9)), ('b_bitmap_data', 7, 20, keyed_bitmap(7, 20, seed=16))]
+    decoded, encoding, header_text = combined_round_trip(bitmaps, 'spans')
+    assert encoding == 'spans'
+    assert decoded == bitmaps
+    assert f"BITMAP_TRANSPARENT 0x{DEFAULT_TRANSPARENT:02X}" in header_text
@@ -0,0 +1,30 @@
+import pytest
+
+from bitmap_tiles import build_tile_dictionary, tile_map_to_bitmap_data
+
+
+@pytest.mark.parametrize('tile_size', [1, 4, 8])
+def test_round_trip(raw_bitmap, tile_size):
+    # Sizes that are and are not a multiple of the tile size
+    bitmaps = [(f"b{index}_bitmap_data", width, height, raw_bitmap(width, height, 3, 6))
+               for index, (width, height) in enumerate([(16, 16), (13, 5), (1, 9)])]
+    dictionary, tile_maps, stats = build_tile_dictionary(bitmaps, tile_size)
+    for (_, width, height, bitmap_data), tile_map in zip(bitmaps, tile_maps):
+        assert tile_map_to_bitmap_data(width, height, tile_map, dictionary) == bitmap_data
+    assert sum(s.new_tiles for s in stats) == len(dictionary) // (tile_size * tile_size)
+
+
+def test_shared_tiles_are_stored_once(raw_bitmap):
+    bitmap_data = raw_bitmap(16, 16)
+    bitmaps = [('a_bitmap_data', 16, 16, bitmap_data), ('b_bitmap_data', 16, 16, bitmap_data)]
+    dictionary, _, stats = build_tile_dictionary(bitmaps, 8)
+    assert len(dictionary) == 4 * 8 * 8
+    assert [s.new_tiles for s in stats] == [4, 0]
+
+
+def test_combined_header_round_trip(raw_bitmap, combined_round_trip):
+    bitmaps = [(f"b{index}_bitmap_data", width, height, raw_bitmap(width, height, 2, 8))
+               for index, (width, height) in enumerate([(24, 8), (10, 17)])]
+    decoded, encoding, _ = combined_round_trip(bitmaps, 'tiles', tile_size=4)
+    assert encoding == 'tiles'
+    assert decoded == bitmaps
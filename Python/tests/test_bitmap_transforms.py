@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from bitmap_transforms import (
+    COPY,
+    apply_transform,
+    expand_descriptor,
+    find_transformed_duplicates,
+    transform_descriptor,
+)
+
+# Source pixel (column, row) of drawn pixel (x, y) for a W x H source, as documented in bitmap_transforms
+SOURCE_PIXEL = {
+    1: lambda x, y, w, h: (w - 1 - x, y),
+    2: lambda x, y, w, h: (x, h - 1 - y),
+    3: lambda x, y, w, h: (w - 1 - x, h - 1 - y),
+    4: lambda x, y, w, h: (y, h - 1 - x),
+    5: lambda x, y, w, h: (w - 1 - y, x),
+    6: lambda x, y, w, h: (y, x),
+    7: lambda x, y, w, h: (w - 1 - y, h - 1 - x),
+    COPY: lambda x, y, w, h: (x, y),
+}
+
+
+def as_bitmap(name, pixels):
+    height, width = pixels.shape
+    return (name, width, height, bytearray([width & 0xFF, height & 0xFF]) + np.ascontiguousarray(pixels).tobytes())
+
+
+@pytest.mark.parametrize('transform', sorted(SOURCE_PIXEL))
+def test_transform_matches_documented_mapping(transform):
+    source = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    drawn = apply_transform(source, transform)
+    for y in range(drawn.shape[0]):
+        for x in range(drawn.shape[1]):
+            column, row = SOURCE_PIXEL[transform](x, y, 4, 3)
+            assert drawn[y, x] == source[row, column]
+
+
+def test_duplicates_round_trip_through_descriptors():
+    source = np.random.default_rng(12).integers(0, 256, (5, 7), dtype=np.uint8)
+    other = np.random.default_rng(13).integers(0, 256, (5, 7), dtype=np.uint8)
+    bitmaps = [as_bitmap('source', source), as_bitmap('other', other)]
+    bitmaps += [as_bitmap(f"t{transform}", apply_transform(source, transform)) for transform in sorted(SOURCE_PIXEL)]
+
+    duplicates = find_transformed_duplicates(bitmaps)
+    assert duplicates[:2] == [None, None]
+    assert duplicates[2:] == [(0, transform) for transform in sorted(SOURCE_PIXEL)]
+    for (_, width, height, bitmap_data), (source_index, transform) in zip(bitmaps[2:], duplicates[2:]):
+        descriptor = transform_descriptor(width, height, source_index, transform)
+        assert expand_descriptor(descriptor, bitmaps[:2]) == bitmap_data
+
+
+def test_combined_header_round_trip(combined_round_trip):
+    source = np.random.default_rng(14).integers(0, 256, (6, 9), dtype=np.uint8)
+    bitmaps = [as_bitmap('a_bitmap_data', source), as_bitmap('b_bitmap_data', apply_transform(source, 4)),
+               as_bitmap('c_bitmap_data', apply_transform(source, 1))]
+    transforms = find_transformed_duplicates(bitmaps)
+    decoded, _, header_text = combined_round_trip(bitmaps, transforms=transforms)
+    assert decoded == bitmaps
+    assert 'BITMAP_TRANSFORMS' in header_text
@@ -0,0 +1,29 @@
+import io
+
+import numpy as np
+import pytest
+
+from c_array_writer import _write_hex_per_byte, format_hex_rows, write_hex_rows
+from header_parser import read_c_arrays
+
+
+@pytest.mark.parametrize('size', [0, 1, 15, 16, 17, 32, 1000])
+def test_format_hex_rows_matches_per_byte_writer(size):
+    data = np.random.default_rng(size).integers(0, 256, size, dtype=np.uint8).tobytes()
+    reference = io.StringIO()
+    _write_hex_per_byte(reference, data)
+    assert format_hex_rows(data) == reference.getvalue()
+
+
+def test_written_array_parses_back(tmp_path):
+    data = bytes(range(256)) * 3 + b'\x01'
+    header = tmp_path / 'array.h'
+    with open(header, 'w', newline='\n') as f:
+        f.write("// sprite (4x5)\n")
+        f.write(f"const uint8_t sprite_bitmap_data[{len(data)}] = {{\n")
+        write_hex_rows(f, data)
+        f.write("\n};\n")
+
+    (array,) = read_c_arrays(str(header))
+    assert (array.name, array.width, array.height) == ('sprite_bitmap_data', 4, 5)
+    assert bytes(array.data) == data
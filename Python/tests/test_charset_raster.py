@@ -0,0 +1,34 @@
+import glob
+import os
+
+import pytest
+
+from charset_raster import _render_charset_per_glyph, convert_ttf_charset, render_charset
+from header_parser import iter_c_arrays
+
+FONT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'TFF')
+FONTS = sorted(path for path in glob.glob(os.path.join(FONT_DIR, '*')) if path.lower().endswith('.ttf'))
+
+
+@pytest.mark.parametrize('font_name', [None, *FONTS[:2]])
+@pytest.mark.parametrize('font_size', [8, 16])
+@pytest.mark.parametrize('uniform_height, monospace', [(False, False), (True, False), (True, True)])
+def test_one_strip_matches_the_per_glyph_images(font_name, font_size, uniform_height, monospace):
+    args = (font_size, font_name, 2, uniform_height, monospace)
+    assert render_charset(*args) == _render_charset_per_glyph(*args)
+
+
+@pytest.mark.skipif(not FONTS, reason="no font files")
+def test_convert_ttf_charset_writes_the_rendered_charset(tmp_path):
+    output_file = convert_ttf_charset(FONTS[0], 12, str(tmp_path))
+    char_index_table, bitmap_data = render_charset(12, FONTS[0], fallback=False)
+    arrays = {array.name: array.data for array in iter_c_arrays(output_file)}
+    assert [tuple(row) for row in arrays['ascii_char_index']] == char_index_table
+    assert bytes(arrays['ascii_bitmap_data']) == bitmap_data
+
+
+def test_unreadable_font_file_raises(tmp_path):
+    bad_font = tmp_path / 'broken.ttf'
+    bad_font.write_bytes(b'not a font')
+    with pytest.raises(OSError):
+        convert_ttf_charset(str(bad_font), 12, str(tmp_path))
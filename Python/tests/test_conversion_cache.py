@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+import png2bit
+from conversion_cache import cache_get, cache_key, cache_put, evict_cache, purge_cache
+
+
+def test_put_get_round_trip(tmp_path):
+    key = cache_key(b'png bytes', {'pixel_format': 'R3G3B2'})
+    assert cache_get(key, str(tmp_path)) is None
+    cache_put(key, b'\x01\x02\x03', str(tmp_path))
+    assert cache_get(key, str(tmp_path)) == b'\x01\x02\x03'
+
+
+def test_key_depends_on_bytes_and_params():
+    key = cache_key(b'png bytes', {'a': 1, 'b': 2})
+    assert key == cache_key(b'png bytes', {'b': 2, 'a': 1})
+    assert key != cache_key(b'png bytez', {'a': 1, 'b': 2})
+    assert key != cache_key(b'png bytes', {'a': 1, 'b': 3})
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache_dir = str(tmp_path)
+    keys = [cache_key(bytes([index]), {}) for index in range(3)]
+    for age, key in enumerate(keys):
+        cache_put(key, bytes(100), cache_dir, max_bytes=1000)
+        path = os.path.join(cache_dir, key + '.bin')
+        os.utime(path, (1000 + age, 1000 + age))
+    # A hit makes the oldest entry the most recently used one
+    assert cache_get(keys[0], cache_dir) is not None
+
+    assert evict_cache(cache_dir, max_bytes=200) == 1
+    assert cache_get(keys[1], cache_dir) is None
+    assert cache_get(keys[0], cache_dir) is not None
+    assert purge_cache(cache_dir) == 2
+
+
+def test_cached_conversion_matches_fresh_conversion(tmp_path, monkeypatch):
+    monkeypatch.setattr('conversion_cache.DEFAULT_CACHE_DIR', str(tmp_path / 'cache'))
+    png_file = str(tmp_path / 'Wolf 1.png')
+    pixels = np.random.default_rng(6).integers(0, 256, (7, 300, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(png_file)
+
+    fresh = png2bit.png_to_bitmap_data(png_file, use_cache=False)
+    stored = png2bit.png_to_bitmap_data(png_file, use_cache=True)
+    cached = png2bit.png_to_bitmap_data(png_file, use_cache=True)
+    assert len(os.listdir(tmp_path / 'cache')) == 1
+    assert fresh == stored == cached
+    assert cached[:3] == ('Wolf_1', 300, 7)
+
+
+def test_put_only_scans_when_the_total_crosses_max_bytes(tmp_path, monkeypatch):
+    import conversion_cache
+
+    cache_dir = str(tmp_path)
+    scans = []
+    entries = conversion_cache._entries
+    monkeypatch.setattr(conversion_cache, '_entries', lambda directory: scans.append(directory) or entries(directory))
+
+    keys = [cache_key(bytes([index]), {}) for index in range(30)]
+    for age, key in enumerate(keys):
+        cache_put(key, bytes(100), cache_dir, max_bytes=1000)
+        os.utime(os.path.join(cache_dir, key + '.bin'), (1000 + age, 1000 + age))
+        assert sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir)) <= 1000
+
+    # One count on the first put, then a scan each time the total passes 1000 bytes again after
+    # eviction freed it down to 900
+    assert len(scans) == 1 + (30 - 10 + 1) // 2
+    assert cache_get(keys[-1], cache_dir) is not None
+    assert cache_get(keys[0], cache_dir) is None
+
+    # Overwriting an entry does not count its bytes twice
+    scans.clear()
+    for _ in range(5):
+        cache_put(keys[-1], bytes(100), cache_dir, max_bytes=1000)
+    assert scans == []
@@ -0,0 +1,61 @@
+import numpy as np
+
+from charset_raster import render_charset
+from glyph_decode import BLACK, MISSING_COLOR, WHITE, GlyphCache, text_rgb, unpack_charset, unpack_glyph
+
+
+def unpack_bits(data, width, height, offset):
+    """Bit loop of the viewers before numpy: MSB first, every row starting on a new byte."""
+    stride = (width + 7) // 8
+    return np.array([[bool(data[offset + y * stride + x // 8] & (0x80 >> (x % 8))) for x in range(width)]
+                     for y in range(height)], dtype=bool).reshape(height, width)
+
+
+def test_unpack_matches_the_bit_loop():
+    char_specs, bitmap_data = render_charset(16, uniform_height=False)
+    glyphs = unpack_charset(bitmap_data, char_specs)
+    for ascii_code, width, height, offset in char_specs:
+        expected = unpack_bits(bitmap_data, width, height, offset)
+        assert np.array_equal(glyphs[ascii_code], expected)
+        assert np.array_equal(unpack_glyph(bitmap_data, width, height, offset), expected)
+
+
+def test_short_data_reads_as_paper():
+    assert not unpack_glyph(b'\xff', 9, 3)[1:].any()
+    assert unpack_glyph(b'\xff', 9, 3)[0, :8].all()
+
+
+def test_text_is_laid_out_bottom_aligned():
+    char_specs, bitmap_data = render_charset(12, uniform_height=False)
+    glyphs = unpack_charset(bitmap_data, char_specs)
+    rgb, missing = text_rgb(glyphs, 'Ag\x01')
+    assert missing == ['\x01']
+
+    height = max(glyphs[ord('A')].shape[0], glyphs[ord('g')].shape[0])
+    x = 0
+    for char in 'Ag':
+        pixels = glyphs[ord(char)]
+        cell = rgb[height - pixels.shape[0]:height, x:x + pixels.shape[1]]
+        assert np.array_equal(cell.all(axis=2), ~pixels)  # black ink on white paper
+        x += pixels.shape[1]
+    # The missing character is a block half the line height wide
+    assert rgb.shape == (height, x + height // 2, 3)
+    assert (rgb[:, x:] == MISSING_COLOR).all()
+
+
+def test_cache_picks_up_edits_after_invalidate():
+    char_specs, bitmap_data = render_charset(12, uniform_height=False)
+    bitmap_data = bytearray(bitmap_data)
+    cache = GlyphCache(bitmap_data, char_specs)
+    before, _ = cache.text_rgb('AB', WHITE, BLACK)
+
+    # Fill the glyph of 'A' in place: the cache keeps the old one until it is told
+    _, width, height, offset = next(spec for spec in char_specs if spec[0] == ord('A'))
+    bitmap_data[offset:offset + (width + 7) // 8 * height] = b'\xff' * ((width + 7) // 8 * height)
+    assert np.array_equal(cache.text_rgb('AB', WHITE, BLACK)[0], before)
+
+    cache.invalidate(ord('A'))
+    assert cache.glyphs()[ord('A')].all()
+    after, _ = cache.text_rgb('AB', WHITE, BLACK)
+    assert np.array_equal(after, text_rgb(unpack_charset(bitmap_data, char_specs), 'AB', WHITE, BLACK)[0])
+    assert not np.array_equal(after, before)
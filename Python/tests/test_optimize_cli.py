@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import png2bit
+from bitmap_optimize import optimize_bitmap
+from bitmap_spans import DEFAULT_TRANSPARENT
+
+
+@pytest.fixture
+def sprite_pngs(tmp_path):
+    """Two smooth-gradient sprites on a magenta (transparent) background, saved as PNGs."""
+    paths = []
+    for index, (width, height) in enumerate([(40, 24), (17, 9)]):
+        y, x = np.mgrid[:height, :width]
+        rgb = np.stack([x * 255 // width, y * 255 // height, np.full_like(x, 64 * index)], axis=-1)
+        rgb[:, :3] = rgb[:2] = (255, 0, 255)
+        path = tmp_path / f'sprite{index}.png'
+        Image.fromarray(rgb.astype(np.uint8), 'RGB').save(path)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize('encoding', png2bit.BITMAP_ENCODINGS)
+def test_every_encoding_choice_writes_a_header(tmp_path, sprite_pngs, encoding):
+    output = str(tmp_path / 'optimized.h')
+    assert png2bit.main(['optimize', *sprite_pngs, '--no-cache', '--workers', '1',
+                         '--encoding', encoding, '-o', output]) == 0
+    bitmaps, read_encoding, _ = png2bit.read_combined_header(output)
+    assert read_encoding == encoding
+    assert [(width, height) for _, width, height, _ in bitmaps] == [(40, 24), (17, 9)]
+
+
+def test_spans_levels_keep_the_transparent_pixels(raw_bitmap):
+    width, height = 30, 20
+    bitmap_data = raw_bitmap(width, height, colors=40)
+    bitmap_data[2:2 + width * 4] = bytes([DEFAULT_TRANSPARENT]) * (width * 4)
+    result = optimize_bitmap(width, height, bitmap_data, min_psnr=0)
+    assert set(result.candidates) == set(png2bit.BITMAP_ENCODINGS)
+
+    # Written through apply_optimization, the chosen spans level still has the key in exactly the same pixels
+    bitmaps = [('a_bitmap_data', width, height, bitmap_data)]
+    optimized = png2bit.apply_optimization(bitmaps, [result], 'spans')[0][3]
+    keyed = np.frombuffer(bytes(bitmap_data[2:]), np.uint8) == DEFAULT_TRANSPARENT
+    assert np.array_equal(np.frombuffer(bytes(optimized[2:]), np.uint8) == DEFAULT_TRANSPARENT, keyed)
@@ -7,6 +7,7 @@
 
 //Includes
 
+#include <string.h>
 #include <API_func.h>
 #include <Bitmaps.h>
 #include <combined_charsets.h>
@@ -180,19 +181,57 @@ int API_draw_rectangle(int x, int y, int width, int height, int color, int fille
     return 0;
 }
 
-int API_draw_bitmap(int x_lup, int y_lup, int bm_nr)
+// Read the size of bitmap data with a version 1 (low bytes of width and height) or version 2 header
+// (0, 0, version, format, uint16 width, uint16 height). Returns the data moved so that, like version 1
+// data, the format specific part starts at offset 2.
+static const uint8_t *bitmap_header(const uint8_t *bitmap_data, int *width, int *height)
 {
-    const uint8_t *bitmap_data;
+    if (bitmap_data[0] == 0 && bitmap_data[1] == 0 && bitmap_data[2] == 2)
+    {
+        *width = bitmap_data[4] | (bitmap_data[5] << 8);
+        *height = bitmap_data[6] | (bitmap_data[7] << 8);
+        return bitmap_data + 6;
+    }
+    *width = bitmap_data[0];
+    *height = bitmap_data[1];
+    return bitmap_data;
+}
 
+int API_draw_bitmap(int x_lup, int y_lup, int bm_nr)
+{
     if(bm_nr < 0 || bm_nr >= NUM_BITMAPS)
     {
         return -EINVAL;
     }
 
-    bitmap_data = bitmap_array[bm_nr];
+#ifdef BITMAP_ATLAS
+    // Trimmed rectangle on an atlas page, copied row by row to its offset inside the full bitmap.
+    // The trimmed margin only holds the fill colour and is not drawn.
+    const AtlasRect *rect = &bitmap_atlas[bm_nr];
+    if (x_lup < 0 || x_lup + rect->full_width > VGA_DISPLAY_X ||
+        y_lup < 0 || y_lup + rect->full_height > VGA_DISPLAY_Y)
+    {
+        return -EINVAL;
+    }
+
+    // Pages are cropped to their rectangles, so every page has its own row length
+    const uint16_t page_width = atlas_page_widths[rect->page];
+    const uint8_t *page_row = atlas_pages[rect->page] + rect->y * page_width + rect->x;
+    for (int y = 0; y < rect->height; y++) {
+        memcpy(&VGA_RAM1[(y_lup + rect->offset_y + y) * (VGA_DISPLAY_X + 1) + x_lup + rect->offset_x],
+               page_row + y * page_width, rect->width);
+    }
+#else
+    const uint8_t *bitmap_data;
+    int bitmap_width;
+    int bitmap_height;
+    bitmap_data = bitmap_header(bitmap_array[bm_nr], &bitmap_width, &bitmap_height);
 
-    int bitmap_height = bitmap_data[1];
-    int bitmap_width = bitmap_data[0];
+#ifdef BITMAP_LAYOUT_ALIGNED
+    // Full sizes from the layout table, version 1 size bytes only hold the low byte
+    bitmap_height = bitmap_layout[bm_nr].height;
+    bitmap_width = bitmap_layout[bm_nr].width;
+#endif
 
     if (x_lup < 0 || x_lup + bitmap_width > VGA_DISPLAY_X ||
         y_lup < 0 || y_lup + bitmap_height > VGA_DISPLAY_Y)
@@ -200,6 +239,120 @@ int API_draw_bitmap(int x_lup, int y_lup, int bm_nr)
         return -EINVAL;
     }
 
+#ifdef BITMAP_TRANSFORMS
+    int transform = bitmap_transforms[bm_nr];
+    if (transform != 0)
+    {
+        // Flip or rotation of a stored bitmap: width, height, transform, source index (little-endian)
+        int source_width;
+        int source_height;
+        const uint8_t *source = bitmap_header(bitmap_array[bitmap_data[3] | (bitmap_data[4] << 8)],
+                                              &source_width, &source_height);
+        for (int y = 0; y < bitmap_height; y++) {
+            for (int x = 0; x < bitmap_width; x++) {
+                int sx, sy;
+                switch (transform) {
+                    case 1:  sx = source_width - 1 - x; sy = y; break;                      // flip_h
+                    case 2:  sx = x; sy = source_height - 1 - y; break;                     // flip_v
+                    case 3:  sx = source_width - 1 - x; sy = source_height - 1 - y; break;  // rotate_180
+                    case 4:  sx = y; sy = source_height - 1 - x; break;                     // rotate_90
+                    case 5:  sx = source_width - 1 - y; sy = x; break;                      // rotate_270
+                    case 6:  sx = y; sy = x; break;                                         // transpose
+                    case 7:  sx = source_width - 1 - y; sy = source_height - 1 - x; break;  // antitranspose
+                    default: sx = x; sy = y; break;                                         // copy
+                }
+                UB_VGA_SetPixel(x_lup + x, y_lup + y, source[sy * source_width + sx + 2]);
+            }
+        }
+        HAL_Delay(5);
+        return 0;
+    }
+#endif
+
+#ifdef BITMAP_ENCODING_RLE
+    // PackBits per row: control 0..127 -> control+1 literal pixels, 129..255 -> next byte repeated 257-control times.
+    // The bounds are checked above, so every row is written straight into the framebuffer.
+    const uint8_t *src = bitmap_data + 2;
+    for (int y = 0; y < bitmap_height; y++) {
+        uint8_t *dst = &VGA_RAM1[(y_lup + y) * (VGA_DISPLAY_X + 1) + x_lup];
+        int x = 0;
+        while (x < bitmap_width) {
+            uint8_t control = *src++;
+            if (control < 128) {
+                int count = control + 1;
+                memcpy(dst + x, src, count);
+                src += count;
+                x += count;
+            } else {
+                int count = 257 - control;
+                memset(dst + x, *src++, count);
+                x += count;
+            }
+        }
+    }
+#elif defined(BITMAP_ENCODING_PALETTE)
+    // Bits per pixel, palette size, palette, then rows of palette indices packed MSB first.
+    // 8 bits per pixel has no palette and stores the colours directly.
+    int bpp = bitmap_data[2];
+    const uint8_t *palette = bitmap_data + 4;
+    const uint8_t *pixels = palette + bitmap_data[3];
+    int row_bytes = (bitmap_width * bpp + 7) / 8;
+    uint8_t mask = (1 << bpp) - 1;
+    for (int y = 0; y < bitmap_height; y++) {
+        const uint8_t *row = pixels + y * row_bytes;
+        uint8_t *dst = &VGA_RAM1[(y_lup + y) * (VGA_DISPLAY_X + 1) + x_lup];
+        if (bpp == 8) {
+            memcpy(dst, row, bitmap_width);
+            continue;
+        }
+        for (int x = 0; x < bitmap_width; x++) {
+            int bit = x * bpp;
+            dst[x] = palette[(row[bit >> 3] >> (8 - bpp - (bit & 7))) & mask];
+        }
+    }
+#elif defined(BITMAP_ENCODING_SPANS)
+    // Only the opaque spans are drawn, transparent pixels keep whatever is on the screen.
+    // Row index (uint16, height + 1 entries), spans (uint16 x, uint16 length, uint32 payload offset), payload.
+    const uint8_t *row_index = bitmap_data + 4;
+    const uint8_t *spans = row_index + 2 * (bitmap_height + 1);
+    const uint8_t *payload = spans + 8 * (row_index[2 * bitmap_height] | (row_index[2 * bitmap_height + 1] << 8));
+    for (int y = 0; y < bitmap_height; y++) {
+        int first = row_index[2 * y] | (row_index[2 * y + 1] << 8);
+        int last = row_index[2 * y + 2] | (row_index[2 * y + 3] << 8);
+        uint8_t *dst = &VGA_RAM1[(y_lup + y) * (VGA_DISPLAY_X + 1) + x_lup];
+        for (const uint8_t *span = spans + 8 * first; span < spans + 8 * last; span += 8) {
+            int x = span[0] | (span[1] << 8);
+            int length = span[2] | (span[3] << 8);
+            uint32_t offset = span[4] | (span[5] << 8) | ((uint32_t)span[6] << 16) | ((uint32_t)span[7] << 24);
+            memcpy(dst + x, payload + offset, length);
+        }
+    }
+#elif defined(BITMAP_LAYOUT_ALIGNED)
+    // Every stored row starts on a word: one copy of width bytes per row
+    const BitmapLayout *layout = &bitmap_layout[bm_nr];
+    for (int y = 0; y < bitmap_height; y++) {
+        memcpy(&VGA_RAM1[(y_lup + y) * (VGA_DISPLAY_X + 1) + x_lup], layout->pixels + y * layout->stride, bitmap_width);
+    }
+#elif defined(BITMAP_ENCODING_TILES)
+    // Tile map: tile size, tiles per row, then a little-endian index into bitmap_tiles per tile.
+    // Edge tiles are padded in the dictionary, only the part inside the bitmap is copied.
+    int tile_size = bitmap_data[2];
+    int tiles_x = bitmap_data[3];
+    const uint8_t *tile_map = bitmap_data + 4;
+    for (int tile_y = 0; tile_y < bitmap_height; tile_y += tile_size) {
+        int rows = bitmap_height - tile_y < tile_size ? bitmap_height - tile_y : tile_size;
+        for (int tx = 0; tx < tiles_x; tx++) {
+            int tile_index = tile_map[0] | (tile_map[1] << 8);
+            tile_map += 2;
+            const uint8_t *tile = &bitmap_tiles[tile_index * tile_size * tile_size];
+            int tile_x = tx * tile_size;
+            int columns = bitmap_width - tile_x < tile_size ? bitmap_width - tile_x : tile_size;
+            for (int y = 0; y < rows; y++) {
+                memcpy(&VGA_RAM1[(y_lup + tile_y + y) * (VGA_DISPLAY_X + 1) + x_lup + tile_x], tile + y * tile_size, columns);
+            }
+        }
+    }
+#else
     for (int y = 0; y < bitmap_height; y++) {
         for (int x = 0; x < bitmap_width; x++) {
             int pixel_index = y * bitmap_width + x + 2;
@@ -207,6 +360,8 @@ int API_draw_bitmap(int x_lup, int y_lup, int bm_nr)
             UB_VGA_SetPixel(x_lup + x, y_lup + y, color);
         }
     }
+#endif
+#endif // BITMAP_ATLAS
     HAL_Delay(5);
     return 0;
 }